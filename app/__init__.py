@@ -1,27 +1,261 @@
 from flask import Flask
 import os
+import threading
+import time
 from pymongo import MongoClient
+from .catalog import CatalogCache
+from .pricing import PricingEngine
+from .search import CatalogSearch
+from .pdf_cache import ReceiptCache, file_digest
+from .pdf_render import PdfRenderer
+from .webhooks import PaymentEventProcessor
+from .analytics import BookingRollups
+from .availability import rebuild_slots
+from .images import ImageStore
+from .assets import StaticAssets, build_manifest
+from .metrics import Metrics
+from .slowlog import SlowQueryLog
+from .schema import ensure_indexes, pending_versions, run_migrations
+import click
 
-def create_app():
-    app = Flask(__name__)
+def bootstrap_schema(db):
+    result = ensure_indexes(db)
+    result['migrations'] = run_migrations(db)
+    # Versions still claimed by another worker (or left behind by one that died, until its lease expires)
+    result['pending_migrations'] = pending_versions(db)
+    return result
+
+
+def _bootstrap_in_background(app):
+    started = time.perf_counter()
+    try:
+        result = bootstrap_schema(app.mongo_db)
+        app.schema_status = {'state': 'done', 'failed_indexes': result['failed'], 'migrations': result['migrations'],
+                             'pending_migrations': result['pending_migrations']}
+    except Exception as ex:
+        app.logger.warning('Schema bootstrap skipped: %s', ex)
+        app.schema_status = {'state': 'failed', 'error': str(ex)}
+    app.schema_status['seconds'] = round(time.perf_counter() - started, 3)
+
+
+class EventApp(Flask):
+    """Flask app whose Mongo client is created on first use instead of at boot.
+
+    ``mongo_factory`` builds the client; it is called again in a process that
+    did not create the current client (after a fork), since pymongo clients
+    must not be shared across processes. ``async_mongo_factory`` does the same
+    for the ``AsyncMongoClient`` used by the ASGI read path (app.asgi).
+    """
+
+    mongo_factory = None
+    async_mongo_factory = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.started_at = time.time()
+        self._mongo_lock = threading.Lock()
+        self._mongo = None
+        self._mongo_pid = None
+        self._async_mongo = None
+        self._async_mongo_pid = None
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        # A thread of the parent may have held the lock at fork time; the parent's client is
+        # dropped without closing it since its sockets still belong to the parent
+        self._mongo_lock = threading.Lock()
+        self._mongo = None
+        self._mongo_pid = None
+        self._async_mongo = None
+        self._async_mongo_pid = None
+
+    @property
+    def mongo_client(self):
+        pid = os.getpid()
+        if self._mongo is None or self._mongo_pid != pid:
+            with self._mongo_lock:
+                if self._mongo is None or self._mongo_pid != pid:
+                    self._mongo = self.mongo_factory()
+                    self._mongo_pid = pid
+        return self._mongo
+
+    @property
+    def mongo_db(self):
+        return self.mongo_client[self.config['MONGO_DB_NAME']]
+
+    @property
+    def async_mongo_client(self):
+        # Only touched from the event loop thread, so no lock is needed
+        pid = os.getpid()
+        if self._async_mongo is None or self._async_mongo_pid != pid:
+            self._async_mongo = self.async_mongo_factory()
+            self._async_mongo_pid = pid
+        return self._async_mongo
+
+    @property
+    def async_mongo_db(self):
+        return self.async_mongo_client[self.config['MONGO_DB_NAME']]
+
+    async def close_async_mongo(self):
+        if self._async_mongo is not None and self._async_mongo_pid == os.getpid():
+            await self._async_mongo.close()
+        self._async_mongo = None
+
+
+def create_app(mongo_client=None, async_mongo_client=None):
+    """Build the app; pass ``mongo_client`` (and ``async_mongo_client``) to use existing clients (e.g. in benchmarks)."""
+    app = EventApp(__name__)
     app.secret_key = os.getenv('SECRET_KEY', 'dev')
 
-    # Optional MongoDB connection (non-breaking). Set MONGO_URI env to enable.
+    # Request latency and per-endpoint Mongo command metrics, served at /metrics
+    metrics = Metrics()
+    metrics.init_app(app)
+    # Commands slower than SLOW_QUERY_MS are kept with their explain plan (0 disables)
+    app.slow_queries = SlowQueryLog(
+        threshold_ms=float(os.getenv('SLOW_QUERY_MS', '100')),
+        capacity=int(os.getenv('SLOW_QUERY_LOG_SIZE', '200')),
+        explain=os.getenv('SLOW_QUERY_EXPLAIN', '1') == '1',
+    )
+
+    # The Mongo client is created on first use (see EventApp), so boot never waits on the server
+    app.config['MONGO_DB_NAME'] = os.getenv('MONGO_DB_NAME', 'event_management')
     mongo_uri = os.getenv('MONGO_URI', 'mongodb://localhost:27017')
-    mongo_db_name = os.getenv('MONGO_DB_NAME', 'event_management')
-    try:
-        mongo_client = MongoClient(mongo_uri, serverSelectionTimeoutMS=500)
-        # Trigger a quick ping to fail fast if server unavailable (but do not crash app)
+    selection_timeout = int(os.getenv('MONGO_SERVER_SELECTION_TIMEOUT_MS', '500'))
+    # Each worker process has its own client; size its pool to the worker's threads (plus
+    # background threads) instead of pymongo's default of 100 connections per process
+    max_pool = int(os.getenv('MONGO_MAX_POOL_SIZE', '0')) or int(os.getenv('WEB_THREADS', '8')) + 4
+    min_pool = int(os.getenv('MONGO_MIN_POOL_SIZE', '0'))
+
+    def connect():
+        client = mongo_client
+        if client is None:
+            client = MongoClient(mongo_uri, serverSelectionTimeoutMS=selection_timeout,
+                                 maxPoolSize=max_pool, minPoolSize=min_pool,
+                                 event_listeners=metrics.listeners + [app.slow_queries])
+        app.slow_queries.client = client
+        return client
+
+    def connect_async():
+        client = async_mongo_client
+        if client is None:
+            from pymongo import AsyncMongoClient
+            # One event loop serves many requests at once, so this pool is not sized from WEB_THREADS
+            client = AsyncMongoClient(mongo_uri, serverSelectionTimeoutMS=selection_timeout,
+                                      maxPoolSize=int(os.getenv('MONGO_ASYNC_MAX_POOL_SIZE', '32')),
+                                      minPoolSize=min_pool, event_listeners=metrics.listeners + [app.slow_queries])
+        return client
+
+    app.mongo_factory = connect
+    app.async_mongo_factory = connect_async
+    app.catalog = CatalogCache(
+        lambda: app.mongo_db,
+        ttl=float(os.getenv('CATALOG_CACHE_TTL', '300')),
+        version_check=float(os.getenv('CATALOG_VERSION_CHECK', '2')),
+    )
+    app.pricing = PricingEngine(app.catalog)
+    # Text/location/price search over venues, caterers and vendors, indexed in memory per catalog load
+    app.search = CatalogSearch(app.catalog)
+
+    # Rendered receipt PDFs, keyed by booking content and template version
+    app.receipt_cache = ReceiptCache(
+        os.getenv('RECEIPT_CACHE_DIR', os.path.join(app.instance_path, 'receipts')),
+        max_bytes=int(os.getenv('RECEIPT_CACHE_MAX_MB', '256')) * 1024 * 1024,
+        template_version=file_digest(os.path.join(app.root_path, 'templates', 'receipt.html')),
+    )
+
+    # Receipts of at most RECEIPT_SYNC_MAX_HTML characters of HTML render inline, the rest in a process pool.
+    # A rendered receipt has one line item and measures 2.0-2.4K characters whatever the booking holds,
+    # so size does not single out cheap receipts: by default all of them use the pool (2500 renders all inline)
+    app.config['RECEIPT_SYNC_MAX_HTML'] = int(os.getenv('RECEIPT_SYNC_MAX_HTML', '0'))
+    app.pdf_renderer = PdfRenderer(
+        app.receipt_cache,
+        workers=int(os.getenv('RECEIPT_RENDER_WORKERS', '2')),
+        max_pending=int(os.getenv('RECEIPT_RENDER_MAX_PENDING', '32')),
+    )
+    app.pdf_renderer.observer = metrics.record_render
+
+    # Uploaded catalog images are content-addressed; resized WebP/JPEG variants are built in the background
+    app.images = ImageStore(app.static_folder, workers=int(os.getenv('IMAGE_WORKERS', '1')))
+    app.jinja_env.globals['image_sources'] = app.images.sources
+
+    # Templates' url_for('static', ...) points at content-hashed copies (flask build-assets), served immutable
+    StaticAssets(app, enabled=os.getenv('STATIC_MANIFEST', '1') == '1')
+    app.images.url_for = app.assets.url_for
+
+    # Revenue/booking counters per hotel, catering, event type and month for the admin dashboard
+    app.rollups = BookingRollups(lambda: app.mongo_db, logger=app.logger)
+
+    # Payment webhooks are stored once and applied in batches by a background thread
+    app.payment_events = PaymentEventProcessor(
+        app,
+        batch_size=int(os.getenv('PAYMENT_EVENTS_BATCH', '200')),
+        interval=float(os.getenv('PAYMENT_EVENTS_INTERVAL', '1')),
+    )
+
+    # Apply declared indexes and pending migrations (idempotent) in the background so startup does not
+    # block on Mongo. Disable with MONGO_AUTO_MIGRATE=0 and run `flask --app run init-db` from a deploy step instead.
+    app.schema_status = {'state': 'disabled'}
+    if os.getenv('MONGO_AUTO_MIGRATE', '1') == '1':
+        app.schema_status = {'state': 'pending'}
+        threading.Thread(target=_bootstrap_in_background, args=(app,), name='schema-bootstrap', daemon=True).start()
+
+    @app.cli.command('init-db')
+    def init_db_command():
+        """Create indexes and apply pending migrations."""
+        result = bootstrap_schema(app.mongo_db)
+        for name in result['created']:
+            click.echo(f'index ok: {name}')
+        for failure in result['failed']:
+            click.echo(f'index failed: {failure}')
+        click.echo(f"migrations applied: {result['migrations'] or 'none'}")
+        if result['pending_migrations']:
+            click.echo(f"migrations still pending (claimed by another process): {result['pending_migrations']}")
+
+    @app.cli.command('rebuild-slots')
+    def rebuild_slots_command():
+        """Rebuild venue slot reservations from all bookings."""
+        result = rebuild_slots(app.mongo_db)
+        click.echo(f"{result['slots']} slots from {result['bookings']} bookings in {result['seconds']}s "
+                   f"({result['replayed']} concurrent changes replayed)")
+
+    @app.cli.command('rebuild-rollups')
+    def rebuild_rollups_command():
+        """Recompute the analytics rollups from all bookings."""
+        result = app.rollups.rebuild()
+        click.echo(f"{result['rollups']} rollups from {result['bookings']} bookings "
+                   f"({result['marked']} re-marked) in {result['seconds']}s")
+
+    @app.cli.command('build-assets')
+    @click.option('--clean', is_flag=True, help='Delete versioned files that are no longer in the manifest.')
+    def build_assets_command(clean):
+        """Fingerprint static files into static/dist and precompress text assets."""
+        stats = build_manifest(app.static_folder, clean=clean)
+        app.assets.load()
+        click.echo(f"{stats['files']} files ({stats['bytes']} bytes); "
+                   f"gzip {stats['gzip_bytes']} bytes, brotli {stats['br_bytes']} bytes for text assets")
+
+    @app.cli.command('build-images')
+    @click.argument('extra', nargs=-1)
+    @click.option('--force', is_flag=True, help='Rebuild variants that already exist.')
+    def build_images_command(extra, force):
+        """Generate resized variants for every catalog image, plus EXTRA paths under static/."""
         try:
-            mongo_client.admin.command('ping')
-        except Exception:
-            pass
-        app.mongo_client = mongo_client
-        app.mongo_db = mongo_client[mongo_db_name]
-    except Exception:
-        # If Mongo is not available, keep the app running but without Mongo features
-        app.mongo_client = None
-        app.mongo_db = None
+            import PIL  # noqa: F401
+        except ImportError:
+            raise click.ClickException('Pillow is not installed (pip install Pillow).')
+        db = app.mongo_db
+        paths = set(extra)
+        for collection, field in (('hotels', 'hotel_img1'), ('caterings', 'cater_img'), ('vendors', 'vendor_img')):
+            paths.update(p for p in db[collection].distinct(field) if p)
+        for path in sorted(paths):
+            if not force and app.images.manifest(path) is not None:
+                continue
+            try:
+                manifest = app.images.build_now(path)
+                click.echo(f"variants ok: {path} ({len(manifest['webp'])} widths)")
+            except Exception as ex:
+                click.echo(f'variants failed: {path}: {ex}')
 
     from .routes.main import main as main_blueprint
     app.register_blueprint(main_blueprint)
@@ -0,0 +1,299 @@
+import threading
+import time
+from datetime import date
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from pymongo import DESCENDING, UpdateOne
+from pymongo.errors import BulkWriteError
+
+from app.mongo import BOOKING_REFS, maybe_object_id
+
+ROLLUPS_COLLECTION = 'booking_rollups'
+STAGING_SUFFIX = '__rebuild'
+# What a booking was last counted as; kept on the booking so deltas are exact
+STATE_FIELD = 'rollup_state'
+STATE_PROJECTION = {
+    'event_date': 1, 'amount': 1, 'payment_status': 1,
+    'hotel_id': 1, 'catering_id': 1, 'event_id': 1, STATE_FIELD: 1,
+}
+TOTAL = 'total'
+ALL_MONTHS = 'all'
+NO_MONTH = 'undated'
+# Dimensions besides the overall total; see BOOKING_REFS
+DIMENSIONS = tuple(BOOKING_REFS)
+PAYMENT_STATUSES = {0: 'pending', 1: 'paid', 2: 'failed'}
+MAX_SYNC_ATTEMPTS = 5
+BATCH_SIZE = 1000
+
+Key = Tuple[str, str, str]
+
+
+def _as_int(value: Any) -> int:
+    try:
+        return int(value or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def rollup_id(dim: str, key: str, month: str) -> str:
+    return f'{dim}:{key}:{month}'
+
+
+def booking_state(booking: Dict[str, Any]) -> Dict[str, Any]:
+    """The part of a booking the rollups count, keyed by event month.
+
+    Stored as-is in :data:`STATE_FIELD` and compared by equality in queries,
+    so the field order here must not change.
+    """
+    event_date = booking.get('event_date')
+    state: Dict[str, Any] = {
+        'month': event_date[:7] if isinstance(event_date, str) and len(event_date) >= 7 else NO_MONTH,
+        'amount': _as_int(booking.get('amount')),
+        'payment_status': _as_int(booking.get('payment_status')),
+    }
+    for dim, (field, _) in BOOKING_REFS.items():
+        state[dim] = str(booking.get(field) or '')
+    return state
+
+
+def _contribute(totals: Dict[Key, Dict[str, int]], state: Optional[Dict[str, Any]], sign: int) -> None:
+    if not state:
+        return
+    amount = state['amount'] * sign
+    status = state['payment_status']
+    counts = {
+        'bookings': sign,
+        'amount': amount,
+        'revenue': amount if status == 1 else 0,
+        f'payment_status.{status}.bookings': sign,
+        f'payment_status.{status}.amount': amount,
+    }
+    keys = [(TOTAL, '')] + [(dim, state[dim]) for dim in DIMENSIONS if state.get(dim)]
+    for dim, key in keys:
+        for month in (state['month'], ALL_MONTHS):
+            entry = totals.setdefault((dim, key, month), {})
+            for name, value in counts.items():
+                entry[name] = entry.get(name, 0) + value
+
+
+def rollup_delta(old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]],
+                 into: Optional[Dict[Key, Dict[str, int]]] = None) -> Dict[Key, Dict[str, int]]:
+    """Counter changes for a booking going from state ``old`` to ``new`` (None = absent)."""
+    delta = into if into is not None else {}
+    if old != new:
+        _contribute(delta, old, -1)
+        _contribute(delta, new, 1)
+    return delta
+
+
+def _rollup_ops(delta: Dict[Key, Dict[str, int]]) -> List[UpdateOne]:
+    ops = []
+    for (dim, key, month), counts in sorted(delta.items()):
+        inc = {name: value for name, value in counts.items() if value}
+        if inc:
+            ops.append(UpdateOne(
+                {'_id': rollup_id(dim, key, month)},
+                {'$inc': inc, '$setOnInsert': {'dim': dim, 'key': key, 'month': month}},
+                upsert=True,
+            ))
+    return ops
+
+
+def apply_rollup_delta(db, delta: Dict[Key, Dict[str, int]]) -> int:
+    """``$inc`` the rollup documents in one ``bulk_write``; returns the number of documents touched."""
+    ops = _rollup_ops(delta)
+    if not ops:
+        return 0
+    try:
+        db[ROLLUPS_COLLECTION].bulk_write(ops, ordered=False)
+    except BulkWriteError as ex:
+        # Two writers creating the same rollup document race on _id; the retry finds it and increments
+        errors = ex.details.get('writeErrors') or []
+        if not errors or any(e.get('code') != 11000 for e in errors):
+            raise
+        db[ROLLUPS_COLLECTION].bulk_write([ops[e['index']] for e in errors], ordered=False)
+    return len(ops)
+
+
+def sync_rollups(db, booking_ids: Iterable[Any]) -> int:
+    """Bring the rollups in line with the current state of some bookings.
+
+    Each booking's new state replaces the one it was last counted as with a
+    compare-and-set on :data:`STATE_FIELD`, and only bookings that won it add
+    their difference, so concurrent writers (request threads, the webhook
+    applier, reconciliation) never count a change twice. Deleted bookings are
+    handled by the caller with the state returned by ``find_one_and_delete``.
+    Returns the number of bookings whose contribution changed.
+    """
+    pending = [oid for oid in (maybe_object_id(b) for b in booking_ids) if oid is not None]
+    delta: Dict[Key, Dict[str, int]] = {}
+    changed = 0
+    for _ in range(MAX_SYNC_ATTEMPTS):
+        if not pending:
+            break
+        lost = []
+        for booking in db.bookings.find({'_id': {'$in': pending}}, STATE_PROJECTION):
+            old = booking.get(STATE_FIELD)
+            new = booking_state(booking)
+            if old == new:
+                continue
+            result = db.bookings.update_one({'_id': booking['_id'], STATE_FIELD: old}, {'$set': {STATE_FIELD: new}})
+            if result.matched_count:
+                rollup_delta(old, new, delta)
+                changed += 1
+            else:
+                lost.append(booking['_id'])
+        pending = lost
+    apply_rollup_delta(db, delta)
+    return changed
+
+
+def rebuild_rollups(db, batch_size: int = BATCH_SIZE) -> Dict[str, Any]:
+    """Recompute every rollup from the bookings collection (backfill and repair).
+
+    Bookings are read once; each one's state marker is rewritten where it
+    changed and the totals are built in memory, loaded into a staging
+    collection and renamed over the live one. Counter updates made by
+    requests while the rebuild runs are replaced by the rebuilt totals, so run
+    it when booking traffic is low.
+    """
+    started = time.perf_counter()
+    totals: Dict[Key, Dict[str, int]] = {}
+    ops: List[UpdateOne] = []
+    scanned = marked = 0
+    for booking in db.bookings.find({}, STATE_PROJECTION).batch_size(batch_size):
+        scanned += 1
+        state = booking_state(booking)
+        _contribute(totals, state, 1)
+        if booking.get(STATE_FIELD) != state:
+            ops.append(UpdateOne({'_id': booking['_id']}, {'$set': {STATE_FIELD: state}}))
+        if len(ops) >= batch_size:
+            marked += db.bookings.bulk_write(ops, ordered=False).modified_count
+            ops = []
+    if ops:
+        marked += db.bookings.bulk_write(ops, ordered=False).modified_count
+
+    staging = db[ROLLUPS_COLLECTION + STAGING_SUFFIX]
+    staging.drop()
+    docs = []
+    for (dim, key, month), counts in totals.items():
+        doc: Dict[str, Any] = {'_id': rollup_id(dim, key, month), 'dim': dim, 'key': key, 'month': month}
+        for name, value in counts.items():
+            target = doc
+            *parents, leaf = name.split('.')
+            for part in parents:
+                target = target.setdefault(part, {})
+            target[leaf] = value
+        docs.append(doc)
+    for i in range(0, len(docs), batch_size):
+        staging.insert_many(docs[i:i + batch_size], ordered=False)
+    if docs:
+        from app.schema import ensure_indexes
+        ensure_indexes(db, collection=ROLLUPS_COLLECTION, target=staging)
+        staging.rename(ROLLUPS_COLLECTION, dropTarget=True)
+    else:
+        db[ROLLUPS_COLLECTION].delete_many({})
+    return {'bookings': scanned, 'marked': marked, 'rollups': len(docs),
+            'seconds': round(time.perf_counter() - started, 3)}
+
+
+# --- reading ------------------------------------------------------------------------
+
+def recent_months(end: Optional[str] = None, count: int = 12) -> List[str]:
+    """``('2025-03', 3)`` -> ``['2025-01', '2025-02', '2025-03']``."""
+    year, month = (int(p) for p in (end or date.today().strftime('%Y-%m')).split('-')[:2])
+    index = year * 12 + month - 1
+    return [f'{i // 12:04d}-{i % 12 + 1:02d}' for i in range(index - count + 1, index + 1)]
+
+
+def _row(doc: Optional[Dict[str, Any]], dim: str, key: str, month: str) -> Dict[str, Any]:
+    doc = doc or {}
+    by_status = doc.get('payment_status') or {}
+    return {
+        'dim': dim,
+        'key': key,
+        'month': month,
+        'bookings': doc.get('bookings', 0),
+        'amount': doc.get('amount', 0),
+        'revenue': doc.get('revenue', 0),
+        'payment_status': {
+            label: {'bookings': by_status.get(str(code), {}).get('bookings', 0),
+                    'amount': by_status.get(str(code), {}).get('amount', 0)}
+            for code, label in PAYMENT_STATUSES.items()
+        },
+    }
+
+
+def series(db, dim: str, key: str, months: List[str]) -> Dict[str, Any]:
+    """All-time row plus one row per month for one hotel/catering/event (or ``total``), in one query."""
+    wanted = [ALL_MONTHS] + list(months)
+    found = {d['month']: d for d in db[ROLLUPS_COLLECTION].find(
+        {'_id': {'$in': [rollup_id(dim, key, m) for m in wanted]}})}
+    return {
+        'all_time': _row(found.get(ALL_MONTHS), dim, key, ALL_MONTHS),
+        'months': [_row(found.get(m), dim, key, m) for m in months],
+    }
+
+
+def top(db, dim: str, month: str = ALL_MONTHS, limit: int = 10) -> List[Dict[str, Any]]:
+    """Highest-revenue keys of a dimension for a month (or all time); one indexed query."""
+    cursor = db[ROLLUPS_COLLECTION].find({'dim': dim, 'month': month}).sort('revenue', DESCENDING).limit(limit)
+    return [_row(d, dim, d['key'], month) for d in cursor]
+
+
+class BookingRollups:
+    """Keeps ``booking_rollups`` current from the booking write paths.
+
+    Request handlers and background appliers call :meth:`record` (when they
+    know the old and new state, as on create and delete) or :meth:`sync`
+    (after updating bookings by id). Rollup failures are counted and logged
+    rather than raised, so a booking write never fails because of
+    reporting; ``flask rebuild-rollups`` repairs any drift. ``db`` may be a
+    zero-argument callable, as for :class:`app.catalog.CatalogCache`.
+    """
+
+    def __init__(self, db, logger=None):
+        self._db = db
+        self.logger = logger
+        self.synced = 0
+        self.failed = 0
+        self.rebuilds = 0
+        self.last_error: Optional[str] = None
+        self._lock = threading.Lock()
+
+    @property
+    def db(self):
+        return self._db() if callable(self._db) else self._db
+
+    def _guard(self, what: str, fn: Callable[[], int]) -> int:
+        try:
+            count = fn()
+        except Exception as ex:
+            with self._lock:
+                self.failed += 1
+                self.last_error = f'{what}: {ex}'
+            if self.logger is not None:
+                self.logger.warning('Updating booking rollups failed (%s): %s', what, ex)
+            return 0
+        with self._lock:
+            self.synced += count
+        return count
+
+    def record(self, old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]]) -> int:
+        """Apply a known state change, e.g. ``record(None, state)`` for a booking inserted with ``state``."""
+        return self._guard('record', lambda: 1 if apply_rollup_delta(self.db, rollup_delta(old, new)) else 0)
+
+    def sync(self, booking_ids: Iterable[Any]) -> int:
+        ids = list(booking_ids)
+        return self._guard('sync', lambda: sync_rollups(self.db, ids)) if ids else 0
+
+    def rebuild(self) -> Dict[str, Any]:
+        result = rebuild_rollups(self.db)
+        with self._lock:
+            self.rebuilds += 1
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'synced': self.synced, 'failed': self.failed, 'rebuilds': self.rebuilds,
+                    'last_error': self.last_error}
@@ -0,0 +1,348 @@
+import asyncio
+import io
+from datetime import datetime
+from functools import wraps
+from typing import Any, Callable, Dict, Optional
+
+from bson import ObjectId
+from flask import current_app, flash, jsonify, redirect, render_template, request, session, url_for
+from pymongo import DESCENDING
+
+from app.availability import availability_async, booking_window, is_free_async, month_range
+from app.mongo import DETAIL_FIELDS, LIST_FIELDS, attach_related_async, normalize_booking, to_str_id
+from app.pagination import paginate_async
+from app.pricing import MAX_QUOTES_PER_REQUEST
+from app.routes.booking import BOOKING_LIST_PROJECTION, search_params
+from app.routes.catering import CATERING_LIST_PROJECTION
+from app.routes.hotel import HOTEL_LIST_PROJECTION
+from app.routes.vendor import VENDOR_LIST_PROJECTION
+
+ADMIN_ROLES = ('Admin', 'SuperAdmin')
+# Request bodies larger than this (declared or as received) are left to the WSGI app
+MAX_ASYNC_BODY = 1024 * 1024
+
+# Flask endpoint -> coroutine serving it
+ASYNC_VIEWS: Dict[str, Callable] = {}
+
+
+def async_view(endpoint: str):
+    def register(fn):
+        ASYNC_VIEWS[endpoint] = fn
+        return fn
+    return register
+
+
+def login_required(fn):
+    @wraps(fn)
+    async def wrapper(*args, **kwargs):
+        if 'user_id' not in session:
+            flash('Please login to access this page', 'warning')
+            return redirect(url_for('user.user_login_page'))
+        return await fn(*args, **kwargs)
+    return wrapper
+
+
+def admin_required(fn):
+    @wraps(fn)
+    async def wrapper(*args, **kwargs):
+        if session.get('user_role') not in ADMIN_ROLES:
+            flash('Admin access required.', 'danger')
+            return redirect(url_for('user.user_login_page'))
+        return await fn(*args, **kwargs)
+    return wrapper
+
+
+# --- async variants of the read-only views ------------------------------------------
+# Each mirrors the sync view of the same endpoint in app/routes/.
+
+@async_view('booking.view_bookings')
+@login_required
+async def view_bookings():
+    db = current_app.async_mongo_db
+    page = await paginate_async(db.bookings, {'user_id': session.get('user_id')},
+                                sort=[('event_date', DESCENDING)], projection=BOOKING_LIST_PROJECTION,
+                                args=request.args)
+    bookings = page.items
+    for b in bookings:
+        normalize_booking(b)
+    await attach_related_async(db, bookings, LIST_FIELDS)
+    return render_template('bookings.html', bookings=bookings, page=page)
+
+
+async def _user_booking(booking_id: str) -> Optional[Dict[str, Any]]:
+    db = current_app.async_mongo_db
+    booking = await db.bookings.find_one({'_id': ObjectId(booking_id), 'user_id': session.get('user_id')})
+    if booking:
+        normalize_booking(booking)
+        await attach_related_async(db, [booking], DETAIL_FIELDS)
+    return booking
+
+
+@async_view('booking.view_booking_detail')
+@login_required
+async def view_booking_detail(booking_id):
+    booking = await _user_booking(booking_id)
+    if not booking:
+        flash('Booking not found', 'danger')
+        return redirect(url_for('booking.view_bookings'))
+    return render_template('booking_detail.html', booking=booking)
+
+
+@async_view('booking.booking_status')
+@login_required
+async def booking_status(booking_id):
+    booking = await _user_booking(booking_id)
+    if not booking:
+        flash('Booking not found', 'danger')
+        return redirect(url_for('booking.view_bookings'))
+    return render_template('booking_status.html', booking=booking)
+
+
+@async_view('booking.hotel_slot_check')
+@login_required
+async def hotel_slot_check(hotel_id):
+    try:
+        event_date = datetime.strptime(request.args.get('date', ''), '%Y-%m-%d').date().isoformat()
+    except ValueError:
+        return jsonify({'error': 'date must be YYYY-MM-DD'}), 400
+    start, end = booking_window(request.args.get('start_at'), request.args.get('max_total_hour'))
+    free = await is_free_async(current_app.async_mongo_db, hotel_id, event_date, start, end,
+                               exclude_booking=request.args.get('booking_id'))
+    return jsonify({'hotel_id': hotel_id, 'date': event_date, 'start': start, 'end': end, 'free': free})
+
+
+@async_view('booking.hotel_availability')
+@login_required
+async def hotel_availability(hotel_id):
+    try:
+        months = max(1, min(int(request.args.get('months', 1)), 12))
+        first, last = month_range(request.args.get('month') or datetime.now().strftime('%Y-%m'), months)
+    except ValueError:
+        return jsonify({'error': 'month must be YYYY-MM'}), 400
+    return jsonify(await availability_async(current_app.async_mongo_db, hotel_id, first, last))
+
+
+@async_view('booking.quote')
+@login_required
+async def quote():
+    # Prices come from the in-process catalog cache, which reloads with the sync client now and
+    # then; run it on a thread so a reload never blocks the event loop
+    pricing = current_app.pricing
+    if request.method == 'GET':
+        return jsonify(await asyncio.to_thread(
+            pricing.quote, request.args.get('hotel_id'), request.args.get('catering_id'),
+            request.args.getlist('vendor_ids')))
+    payload = request.get_json(silent=True) or {}
+    selections = payload.get('selections')
+    if not isinstance(selections, list):
+        return jsonify({'error': 'selections must be a list of objects'}), 400
+    if len(selections) > MAX_QUOTES_PER_REQUEST:
+        return jsonify({'error': f'at most {MAX_QUOTES_PER_REQUEST} selections per request'}), 400
+    try:
+        quotes = await asyncio.to_thread(pricing.quote_many, selections)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'quotes': quotes})
+
+
+@async_view('booking.search_catalog')
+@login_required
+async def search_catalog():
+    try:
+        params = search_params(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    # Served from memory, but a catalog reload queries Mongo with the sync client
+    return jsonify(await asyncio.to_thread(current_app.search.search, **params))
+
+
+@async_view('hotel.list_hotels')
+@admin_required
+async def list_hotels():
+    page = await paginate_async(current_app.async_mongo_db.hotels, projection=HOTEL_LIST_PROJECTION,
+                                args=request.args)
+    return render_template('hotels.html', hotels=[to_str_id(h) for h in page], page=page)
+
+
+@async_view('vendor.list_vendors')
+@admin_required
+async def list_vendors():
+    page = await paginate_async(current_app.async_mongo_db.vendors, projection=VENDOR_LIST_PROJECTION,
+                                args=request.args)
+    return render_template('vendors.html', vendors=[to_str_id(v) for v in page], page=page)
+
+
+@async_view('catering.list_catering')
+async def list_catering():
+    page = await paginate_async(current_app.async_mongo_db.caterings, projection=CATERING_LIST_PROJECTION,
+                                args=request.args)
+    return render_template('catering.html', catering=[to_str_id(c) for c in page],
+                           is_admin=session.get('user_role') in ADMIN_ROLES, page=page)
+
+
+# --- ASGI adapter ------------------------------------------------------------------
+
+def build_environ(scope: Dict[str, Any], body: bytes = b'') -> Dict[str, Any]:
+    """WSGI environ for an ASGI HTTP scope, so Flask's request context can be reused."""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', ''),
+        # ASGI paths are already percent-decoded; WSGI carries the raw UTF-8 bytes as latin-1
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client[0],
+        'REMOTE_PORT': str(client[1]),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        # The whole body is buffered, so it is read to EOF even when it arrived chunked without a length
+        'wsgi.input_terminated': True,
+        'wsgi.errors': io.StringIO(),
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for raw_name, raw_value in scope.get('headers', []):
+        name = raw_name.decode('latin-1').upper().replace('-', '_')
+        value = raw_value.decode('latin-1')
+        if name in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            environ[name] = value
+            continue
+        key = f'HTTP_{name}'
+        environ[key] = f'{environ[key]},{value}' if key in environ else value
+    return environ
+
+
+def _terminated_input(wsgi_app):
+    # asgiref hands over the fully spooled body but no length for chunked requests, and Werkzeug
+    # reads nothing from an input of unknown length unless it is marked as terminated
+    def app(environ, start_response):
+        environ['wsgi.input_terminated'] = True
+        return wsgi_app(environ, start_response)
+    return app
+
+
+class AsgiApp:
+    """ASGI application serving :data:`ASYNC_VIEWS` natively and everything else through Flask.
+
+    Requests are matched against the Flask URL map. Endpoints with an async
+    variant run on the event loop inside a regular Flask request context, so
+    sessions, flashing, ``url_for``, templates and the metrics hooks work
+    unchanged, while their Mongo lookups go through ``app.async_mongo_db``
+    (independent ones concurrently with ``asyncio.gather``). All other
+    endpoints, including every write, go to the WSGI app on asgiref's
+    thread pool.
+    """
+
+    def __init__(self, flask_app):
+        try:
+            from asgiref.wsgi import WsgiToAsgi
+        except ImportError:
+            raise RuntimeError('asgiref is not installed (pip install asgiref uvicorn)') from None
+        self.flask_app = flask_app
+        self.wsgi = WsgiToAsgi(_terminated_input(flask_app))
+        self.served_async = 0
+        self.served_wsgi = 0
+        flask_app.asgi = self
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self._lifespan(receive, send)
+        if scope['type'] != 'http':
+            return await self.wsgi(scope, receive, send)
+        view = self._match(scope)
+        length = int(dict(scope.get('headers', [])).get(b'content-length', b'0') or 0)
+        if view is None or length > MAX_ASYNC_BODY:
+            self.served_wsgi += 1
+            return await self.wsgi(scope, receive, send)
+        # Read whatever the headers say: a chunked body has no content-length
+        body, complete = await self._read_body(receive, MAX_ASYNC_BODY)
+        if not complete:
+            self.served_wsgi += 1
+            return await self.wsgi(scope, self._replay(body, receive), send)
+        self.served_async += 1
+        response = await self._dispatch(view, build_environ(scope, body))
+        try:
+            await send({'type': 'http.response.start', 'status': response.status_code,
+                        'headers': [(k.lower().encode('latin-1'), v.encode('latin-1'))
+                                    for k, v in response.headers.items()]})
+            data = b'' if scope['method'] == 'HEAD' else response.get_data()
+            await send({'type': 'http.response.body', 'body': data})
+        finally:
+            response.close()
+
+    def _match(self, scope) -> Optional[Callable]:
+        from werkzeug.exceptions import HTTPException
+        from werkzeug.routing import RequestRedirect
+
+        adapter = self.flask_app.url_map.bind_to_environ(build_environ(scope),
+                                                         server_name=self.flask_app.config.get('SERVER_NAME'))
+        try:
+            endpoint, _ = adapter.match(method=scope['method'])
+        except (HTTPException, RequestRedirect):
+            return None
+        return ASYNC_VIEWS.get(endpoint)
+
+    @staticmethod
+    async def _read_body(receive, limit: int):
+        """``(body, complete)``; stops early, with ``complete`` False, once more than ``limit`` bytes arrived."""
+        chunks = []
+        size = 0
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return b''.join(chunks), True
+            chunk = message.get('body', b'')
+            chunks.append(chunk)
+            size += len(chunk)
+            if not message.get('more_body'):
+                return b''.join(chunks), True
+            if size > limit:
+                return b''.join(chunks), False
+
+    @staticmethod
+    def _replay(body: bytes, receive):
+        """A ``receive`` that yields the part of the body already read, then the rest of the stream."""
+        pending = [{'type': 'http.request', 'body': body, 'more_body': True}]
+
+        async def replay():
+            return pending.pop() if pending else await receive()
+        return replay
+
+    async def _dispatch(self, view, environ):
+        """Flask's full_dispatch_request with an awaited view."""
+        app = self.flask_app
+        ctx = app.request_context(environ)
+        error = None
+        try:
+            ctx.push()
+            try:
+                rv = app.preprocess_request()
+                if rv is None:
+                    rv = await view(**request.view_args)
+            except Exception as ex:
+                rv = app.handle_user_exception(ex)
+            return app.finalize_request(rv)
+        except Exception as ex:
+            error = ex
+            return app.handle_exception(ex)
+        finally:
+            ctx.pop(error)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.flask_app.close_async_mongo()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def stats(self) -> Dict[str, Any]:
+        return {'served_async': self.served_async, 'served_wsgi': self.served_wsgi}
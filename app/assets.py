@@ -0,0 +1,182 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import threading
+from typing import Any, Dict
+
+try:
+    import brotli
+except Exception:  # pragma: no cover
+    brotli = None
+
+DIST_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+# Content-addressed already (see app.images); never fingerprinted again
+SKIP_PREFIXES = (DIST_DIR + '/', 'images/uploads/')
+COMPRESSIBLE = {'.css', '.js', '.svg', '.json', '.txt', '.html', '.map'}
+MIN_COMPRESS_BYTES = 512
+IMMUTABLE = 'public, max-age=31536000, immutable'
+# Best encoding first; only encodings with a file on disk are offered
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def fingerprint(path: str, data: bytes) -> str:
+    """``css/home.css`` -> ``css/home.<12 hex>.css``."""
+    stem, ext = os.path.splitext(path)
+    return f'{stem}.{hashlib.sha256(data).hexdigest()[:12]}{ext}'
+
+
+def _write(path: str, data: bytes) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def build_manifest(static_root: str, clean: bool = False) -> Dict[str, Any]:
+    """Copy every static file to ``dist/`` under a content-hashed name and write the manifest.
+
+    Text files are also written as ``.gz`` and ``.br`` (when the ``brotli``
+    package is installed) if that makes them smaller. Relative ``url()``
+    references inside CSS are not rewritten, so stylesheets must use absolute
+    or ``data:`` URLs.
+    """
+    dist = os.path.join(static_root, DIST_DIR)
+    files: Dict[str, str] = {}
+    written = {MANIFEST_NAME}
+    stats = {'files': 0, 'bytes': 0, 'gzip_bytes': 0, 'br_bytes': 0}
+    for folder, dirs, names in os.walk(static_root):
+        dirs.sort()
+        for name in sorted(names):
+            full = os.path.join(folder, name)
+            logical = os.path.relpath(full, static_root).replace(os.sep, '/')
+            if logical.startswith(SKIP_PREFIXES) or name.startswith('.') or name.endswith('.variants.json'):
+                continue
+            with open(full, 'rb') as f:
+                data = f.read()
+            versioned = fingerprint(logical, data)
+            files[logical] = f'{DIST_DIR}/{versioned}'
+            target = os.path.join(dist, versioned)
+            written.add(versioned)
+            if not os.path.exists(target):
+                _write(target, data)
+            stats['files'] += 1
+            stats['bytes'] += len(data)
+            if os.path.splitext(name)[1].lower() not in COMPRESSIBLE or len(data) < MIN_COMPRESS_BYTES:
+                continue
+            variants = [('.gz', 'gzip_bytes', lambda d: gzip.compress(d, 9, mtime=0))]
+            if brotli is not None:
+                variants.append(('.br', 'br_bytes', lambda d: brotli.compress(d, quality=11)))
+            for suffix, counter, compress in variants:
+                packed = compress(data)
+                if len(packed) >= len(data):
+                    continue
+                written.add(versioned + suffix)
+                if not os.path.exists(target + suffix):
+                    _write(target + suffix, packed)
+                stats[counter] += len(packed)
+    manifest = {'files': files}
+    _write(os.path.join(dist, MANIFEST_NAME), json.dumps(manifest, indent=1, sort_keys=True).encode())
+    if clean:
+        # Old versions are kept by default so pages rendered before a deploy still load
+        for folder, _, names in os.walk(dist):
+            for name in names:
+                rel = os.path.relpath(os.path.join(folder, name), dist).replace(os.sep, '/')
+                if rel not in written:
+                    os.remove(os.path.join(folder, name))
+    return stats
+
+
+class StaticAssets:
+    """Serves fingerprinted static files with far-future caching and precompressed bodies.
+
+    ``url_for('static', filename='css/home.css')`` in templates resolves to the
+    versioned copy listed in ``static/dist/manifest.json`` (written by
+    ``flask build-assets``). Those files never change under their name, so they
+    are sent with ``Cache-Control: immutable`` and, when the client accepts it,
+    as the prebuilt ``.br`` or ``.gz`` file. Files missing from the manifest,
+    or every file when no manifest has been built, are served by Flask's
+    default static handler as before.
+    """
+
+    def __init__(self, app=None, enabled: bool = True):
+        self.enabled = enabled
+        self.files: Dict[str, str] = {}
+        self.versioned: set = set()
+        self.served = {'identity': 0, 'gzip': 0, 'br': 0}
+        self._lock = threading.Lock()
+        self.app = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app) -> None:
+        from flask import url_for
+
+        self.app = app
+        app.assets = self
+        self.root = app.static_folder
+        self.load()
+        default_static = app.view_functions['static']
+
+        def static(filename):
+            if filename in self.versioned or filename.startswith('images/uploads/'):
+                return self.send(filename)
+            return default_static(filename=filename)
+
+        app.view_functions['static'] = static
+
+        def asset_url_for(endpoint: str, **values) -> str:
+            # Drop-in replacement for url_for in templates
+            if endpoint == 'static' and 'filename' in values:
+                values['filename'] = self.files.get(values['filename'], values['filename'])
+            return url_for(endpoint, **values)
+
+        self.url_for = asset_url_for
+        app.jinja_env.globals['url_for'] = asset_url_for
+
+    def load(self) -> int:
+        """(Re)read the manifest; returns the number of fingerprinted files."""
+        files: Dict[str, str] = {}
+        if self.enabled:
+            try:
+                with open(os.path.join(self.root, DIST_DIR, MANIFEST_NAME)) as f:
+                    files = json.load(f)['files']
+            except (OSError, ValueError, KeyError):
+                files = {}
+        self.files = files
+        self.versioned = set(files.values())
+        return len(files)
+
+    def send(self, filename: str):
+        from flask import request, send_from_directory
+        from werkzeug.utils import safe_join
+
+        mimetype = None
+        encoding = None
+        accepted = request.accept_encodings
+        for name, suffix in ENCODINGS:
+            path = safe_join(self.root, filename + suffix)
+            if accepted[name] and path and os.path.isfile(path):
+                encoding = name
+                mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+                filename += suffix
+                break
+        response = send_from_directory(self.root, filename, mimetype=mimetype, max_age=31536000)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.headers['Cache-Control'] = IMMUTABLE
+        response.vary.add('Accept-Encoding')
+        with self._lock:
+            self.served[encoding or 'identity'] += 1
+        return response
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'fingerprinted': len(self.files),
+            'served_identity': self.served['identity'],
+            'served_gzip': self.served['gzip'],
+            'served_br': self.served['br'],
+        }
@@ -0,0 +1,242 @@
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+
+from app.mongo import TOMBSTONES_COLLECTION
+
+SLOTS_COLLECTION = 'hotel_slots'
+STAGING_SUFFIX = '__rebuild'
+DAY_MINUTES = 24 * 60
+# Bookings written this long before a rebuild's scan started are replayed too (clock skew between app hosts)
+REBUILD_REPLAY_MARGIN = timedelta(seconds=60)
+
+
+class SlotUnavailable(Exception):
+    """Raised when a hotel is already reserved for an overlapping time window."""
+
+
+def booking_window(start_at: Optional[str], max_total_hour: Any) -> Tuple[int, int]:
+    """Return ``(start, end)`` in minutes from midnight; missing data books the whole day.
+
+    Windows running past midnight are clamped to the end of the event date.
+    """
+    try:
+        hours, minutes = (int(p) for p in (start_at or '').split(':')[:2])
+        start = hours * 60 + minutes
+    except ValueError:
+        return 0, DAY_MINUTES
+    try:
+        duration = int(float(max_total_hour) * 60)
+    except (TypeError, ValueError):
+        duration = 0
+    if duration <= 0:
+        return start, DAY_MINUTES
+    return start, min(start + duration, DAY_MINUTES)
+
+
+def slot_id(hotel_id: str, event_date: str) -> str:
+    return f'{hotel_id}:{event_date}'
+
+
+def _overlap(start: int, end: int, exclude_booking: Optional[str] = None) -> Dict[str, Any]:
+    cond: Dict[str, Any] = {'start': {'$lt': end}, 'end': {'$gt': start}}
+    if exclude_booking:
+        cond['booking_id'] = {'$ne': exclude_booking}
+    return {'$elemMatch': cond}
+
+
+def _conflict_query(hotel_id: str, event_date: str, start: int, end: int, exclude_booking: Optional[str]):
+    return {'_id': slot_id(hotel_id, event_date), 'windows': _overlap(start, end, exclude_booking)}
+
+
+def is_free(db, hotel_id: str, event_date: str, start: int, end: int, exclude_booking: Optional[str] = None) -> bool:
+    """Single indexed point lookup: is the hotel free for this window on this date?"""
+    return db[SLOTS_COLLECTION].find_one(
+        _conflict_query(hotel_id, event_date, start, end, exclude_booking), {'_id': 1}) is None
+
+
+async def is_free_async(db, hotel_id: str, event_date: str, start: int, end: int,
+                        exclude_booking: Optional[str] = None) -> bool:
+    """:func:`is_free` for a pymongo ``AsyncDatabase``."""
+    return await db[SLOTS_COLLECTION].find_one(
+        _conflict_query(hotel_id, event_date, start, end, exclude_booking), {'_id': 1}) is None
+
+
+def reserve(db, hotel_id: str, event_date: str, start: int, end: int, booking_id: str, force: bool = False) -> None:
+    """Atomically add (or move) a booking's window in the hotel's slot for ``event_date``.
+
+    The conflict check and the write are one ``update_one`` on the slot
+    document: when another booking overlaps, the filter does not match, the
+    upsert collides with the existing ``_id`` and :class:`SlotUnavailable` is
+    raised (after one retry, in case the collision was with a concurrent
+    first reservation of the slot). Any previous window of the same booking
+    on that date is replaced.
+    """
+    sid = slot_id(hotel_id, event_date)
+    query: Dict[str, Any] = {'_id': sid}
+    if not force:
+        query['windows'] = {'$not': _overlap(start, end, booking_id)}
+    window = {'booking_id': booking_id, 'start': start, 'end': end}
+    pipeline = [{'$set': {
+        'hotel_id': hotel_id,
+        'date': event_date,
+        'windows': {'$concatArrays': [
+            {'$filter': {
+                'input': {'$ifNull': ['$windows', []]},
+                'cond': {'$ne': ['$$this.booking_id', booking_id]},
+            }},
+            [window],
+        ]},
+    }}]
+    # Two first reservations of an empty slot both upsert and one loses the insert race on _id even
+    # when the windows do not overlap; by the retry the document exists, so its filter gives the real answer
+    for attempt in range(2):
+        try:
+            db[SLOTS_COLLECTION].update_one(query, pipeline, upsert=True)
+            return
+        except DuplicateKeyError:
+            if attempt:
+                raise SlotUnavailable(f'Hotel is already booked on {event_date} for an overlapping time.') from None
+
+
+def release(db, hotel_id: Optional[str], event_date: Optional[str], booking_id: str) -> None:
+    if not hotel_id or not event_date:
+        return
+    db[SLOTS_COLLECTION].update_one(
+        {'_id': slot_id(hotel_id, event_date)},
+        {'$pull': {'windows': {'booking_id': booking_id}}},
+    )
+
+
+def month_range(start_month: str, months: int = 1) -> Tuple[date, date]:
+    """``('2025-09', 2)`` -> first day of September .. last day of October."""
+    year, month = (int(p) for p in start_month.split('-')[:2])
+    first = date(year, month, 1)
+    month_index = year * 12 + (month - 1) + months
+    last = date(month_index // 12, month_index % 12 + 1, 1) - timedelta(days=1)
+    return first, last
+
+
+AVAILABILITY_PROJECTION = {'date': 1, 'windows.start': 1, 'windows.end': 1}
+
+
+def _availability_query(hotel_id: str, first: date, last: date) -> Dict[str, Any]:
+    return {'hotel_id': hotel_id, 'date': {'$gte': first.isoformat(), '$lte': last.isoformat()}}
+
+
+def availability(db, hotel_id: str, first: date, last: date) -> Dict[str, Any]:
+    """Free dates and busy windows for one hotel between two dates, in one query."""
+    cursor = db[SLOTS_COLLECTION].find(_availability_query(hotel_id, first, last), AVAILABILITY_PROJECTION)
+    return summarize_availability(hotel_id, first, last, cursor)
+
+
+async def availability_async(db, hotel_id: str, first: date, last: date) -> Dict[str, Any]:
+    """:func:`availability` for a pymongo ``AsyncDatabase``."""
+    cursor = db[SLOTS_COLLECTION].find(_availability_query(hotel_id, first, last), AVAILABILITY_PROJECTION)
+    return summarize_availability(hotel_id, first, last, await cursor.to_list(None))
+
+
+def summarize_availability(hotel_id: str, first: date, last: date, docs: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    busy: Dict[str, List[Dict[str, int]]] = {}
+    for doc in docs:
+        windows = sorted((w['start'], w['end']) for w in doc.get('windows') or [])
+        if windows:
+            busy[doc['date']] = [{'start': s, 'end': e} for s, e in windows]
+    free, partial, full = [], [], []
+    day = first
+    while day <= last:
+        key = day.isoformat()
+        windows = busy.get(key)
+        if not windows:
+            free.append(key)
+        elif sum(w['end'] - w['start'] for w in windows) >= DAY_MINUTES:
+            full.append(key)
+        else:
+            partial.append(key)
+        day += timedelta(days=1)
+    return {'hotel_id': hotel_id, 'from': first.isoformat(), 'to': last.isoformat(),
+            'free': free, 'partial': partial, 'full': full, 'busy': busy}
+
+
+SLOTTED_BOOKINGS = {'hotel_id': {'$nin': [None, '']}, 'event_date': {'$type': 'string'}}
+SLOT_FIELDS = {'hotel_id': 1, 'event_date': 1, 'start_at': 1, 'max_total_hour': 1}
+
+
+def backfill_slots(db) -> None:
+    """Build slot documents from existing bookings (overlaps already in the data are kept)."""
+    cursor = db.bookings.find(SLOTTED_BOOKINGS, SLOT_FIELDS)
+    for b in cursor:
+        start, end = booking_window(b.get('start_at'), b.get('max_total_hour'))
+        reserve(db, b['hotel_id'], b['event_date'], start, end, str(b['_id']), force=True)
+
+
+def rebuild_slots(db, batch_size: int = 1000) -> Dict[str, Any]:
+    """Replace ``hotel_slots`` with slots rebuilt from the bookings collection.
+
+    Needed whenever bookings are replaced wholesale (imports, delta replays):
+    slots of bookings that no longer exist would block their windows and
+    imported bookings would have none. Bookings are streamed in hotel/date
+    order (served by the bookings_hotel_event_date index), so each slot
+    document is complete when written; the staging collection is then renamed
+    over the live one. Overlaps already in the data are kept.
+
+    Requests keep reserving in the live collection while the scan runs, and
+    the rename discards those reservations, so bookings created or changed
+    since the scan started are then replayed with ``reserve(force=True)`` and
+    bookings deleted since then are pulled from their slots (see
+    :func:`replay_slots`). A booking that moved during the scan may keep its
+    old window as well, which blocks that time rather than double-booking it.
+    """
+    started = time.perf_counter()
+    since = datetime.utcnow() - REBUILD_REPLAY_MARGIN
+    staging = db[SLOTS_COLLECTION + STAGING_SUFFIX]
+    staging.drop()
+    batch: List[Dict[str, Any]] = []
+    slot: Optional[Dict[str, Any]] = None
+    bookings = slots = 0
+    cursor = db.bookings.find(SLOTTED_BOOKINGS, SLOT_FIELDS).sort([('hotel_id', 1), ('event_date', 1)])
+    for b in cursor.batch_size(batch_size):
+        bookings += 1
+        sid = slot_id(b['hotel_id'], b['event_date'])
+        if slot is None or slot['_id'] != sid:
+            slot = {'_id': sid, 'hotel_id': b['hotel_id'], 'date': b['event_date'], 'windows': []}
+            batch.append(slot)
+            slots += 1
+        start, end = booking_window(b.get('start_at'), b.get('max_total_hour'))
+        slot['windows'].append({'booking_id': str(b['_id']), 'start': start, 'end': end})
+        if len(batch) > batch_size:
+            # Keep the open slot: later bookings may still belong to it
+            staging.insert_many(batch[:-1], ordered=False)
+            batch = batch[-1:]
+    if batch:
+        staging.insert_many(batch, ordered=False)
+    if slots:
+        from app.schema import ensure_indexes
+        ensure_indexes(db, collection=SLOTS_COLLECTION, target=staging)
+        staging.rename(SLOTS_COLLECTION, dropTarget=True)
+    else:
+        db[SLOTS_COLLECTION].delete_many({})
+    replayed = replay_slots(db, since)
+    return {'bookings': bookings, 'slots': slots, 'replayed': replayed,
+            'seconds': round(time.perf_counter() - started, 3)}
+
+
+def replay_slots(db, since: datetime) -> int:
+    """Re-apply slot changes of bookings written or deleted since ``since``; returns the bookings replayed."""
+    query = dict(SLOTTED_BOOKINGS)
+    query['$or'] = [{'updated_at': {'$gte': since}}, {'_id': {'$gte': ObjectId.from_datetime(since)}}]
+    replayed = 0
+    for b in db.bookings.find(query, SLOT_FIELDS):
+        start, end = booking_window(b.get('start_at'), b.get('max_total_hour'))
+        reserve(db, b['hotel_id'], b['event_date'], start, end, str(b['_id']), force=True)
+        replayed += 1
+    deleted = [t['doc_id'] for t in db[TOMBSTONES_COLLECTION].find(
+        {'collection': 'bookings', 'deleted_at': {'$gte': since}}, {'doc_id': 1})]
+    if deleted:
+        db[SLOTS_COLLECTION].update_many({'windows.booking_id': {'$in': deleted}},
+                                         {'$pull': {'windows': {'booking_id': {'$in': deleted}}}})
+        replayed += len(deleted)
+    return replayed
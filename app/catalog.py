@@ -0,0 +1,106 @@
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from app.mongo import to_str_id
+
+CATALOG_COLLECTIONS = ('hotels', 'caterings', 'events', 'vendors')
+VERSION_COLLECTION = 'catalog_versions'
+
+
+class CatalogCache:
+    """In-process cache for the small, rarely edited catalog collections.
+
+    Each collection is loaded in full and kept for ``ttl`` seconds. Admin
+    writes call :meth:`invalidate`, which drops the local copy and bumps a
+    per-collection version document in Mongo; other worker processes compare
+    that version at most every ``version_check`` seconds and reload on change.
+    ``db`` may be a zero-argument callable so the Mongo client is only
+    created when the cache is first used.
+    """
+
+    def __init__(self, db, ttl: float = 300.0, version_check: float = 2.0):
+        self._db = db
+        self.ttl = ttl
+        self.version_check = version_check
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = {}
+
+    @property
+    def db(self):
+        return self._db() if callable(self._db) else self._db
+
+    def _remote_version(self, name: str) -> int:
+        doc = self.db[VERSION_COLLECTION].find_one({'_id': name}, {'version': 1})
+        return int(doc.get('version', 0)) if doc else 0
+
+    def _load(self, name: str) -> Dict[str, Any]:
+        version = self._remote_version(name)
+        docs = [to_str_id(d) for d in self.db[name].find()]
+        now = time.monotonic()
+        return {
+            'docs': docs,
+            'by_id': {d['id']: d for d in docs if 'id' in d},
+            'version': version,
+            'loaded_at': now,
+            'checked_at': now,
+        }
+
+    def _entry(self, name: str) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(name)
+        if entry is not None and now - entry['loaded_at'] < self.ttl:
+            if now - entry['checked_at'] < self.version_check:
+                self.hits += 1
+                return entry
+            if self._remote_version(name) == entry['version']:
+                entry['checked_at'] = now
+                self.hits += 1
+                return entry
+        self.misses += 1
+        entry = self._load(name)
+        with self._lock:
+            self._entries[name] = entry
+        return entry
+
+    def all(self, name: str) -> List[Dict[str, Any]]:
+        """Return every document of a catalog collection (with string ``id``)."""
+        return [dict(d) for d in self._entry(name)['docs']]
+
+    def get(self, name: str, doc_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Return a single catalog document by string id, or None."""
+        if not doc_id:
+            return None
+        doc = self._entry(name)['by_id'].get(str(doc_id))
+        return dict(doc) if doc is not None else None
+
+    def derived(self, name: str, key: str, build: Callable[[List[Dict[str, Any]]], Any]) -> Any:
+        """Return ``build(docs)`` memoized on the currently loaded copy of a collection.
+
+        Derived structures (price tables, search indexes) are rebuilt
+        automatically whenever the collection is reloaded after a TTL expiry
+        or an invalidation.
+        """
+        entry = self._entry(name)
+        derived = entry.setdefault('derived', {})
+        if key not in derived:
+            derived[key] = build(entry['docs'])
+        return derived[key]
+
+    def invalidate(self, name: str) -> None:
+        """Drop the local copy and bump the shared version so other workers reload."""
+        with self._lock:
+            self._entries.pop(name, None)
+        self.db[VERSION_COLLECTION].update_one({'_id': name}, {'$inc': {'version': 1}}, upsert=True)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': (self.hits / total) if total else 0.0,
+            'collections': {name: len(e['docs']) for name, e in self._entries.items()},
+        }
@@ -0,0 +1,531 @@
+import datetime as _dt
+import gzip
+import io
+import json
+import os
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional
+
+from bson import ObjectId
+from pymongo import DeleteOne, ReplaceOne
+from pymongo.errors import BulkWriteError
+
+from app.mongo import TOMBSTONES_COLLECTION
+from app.schema import ensure_indexes
+
+try:
+    import zstandard
+except Exception:  # pragma: no cover
+    zstandard = None
+
+COLLECTIONS = ['users', 'events', 'hotels', 'caterings', 'vendors', 'bookings']
+BATCH_SIZE = 1000
+COMPRESSIONS = {None: '', 'gzip': '.gz', 'zstd': '.zst'}
+
+
+def json_default(o: Any) -> Any:
+    if isinstance(o, ObjectId):
+        return str(o)
+    # Serialize datetime/date to ISO strings
+    if isinstance(o, (_dt.datetime, _dt.date)):
+        return o.isoformat()
+    raise TypeError(f'Object of type {type(o).__name__} is not JSON serializable')
+
+
+def dumps(doc: Dict[str, Any]) -> str:
+    return json.dumps(doc, ensure_ascii=False, separators=(',', ':'), default=json_default)
+
+
+def export_filename(name: str, fmt: str = 'ndjson', compression: Optional[str] = None) -> str:
+    return f'{name}.{fmt}{COMPRESSIONS[compression]}'
+
+
+def _open_writer(path: str, compression: Optional[str]):
+    if compression == 'gzip':
+        return gzip.open(path, 'wt', encoding='utf-8', compresslevel=6)
+    if compression == 'zstd':
+        if zstandard is None:
+            raise RuntimeError('zstd compression requires the "zstandard" package.')
+        raw = open(path, 'wb')
+        return zstandard.ZstdCompressor(level=3).stream_writer(raw, closefd=True)
+    return open(path, 'w', encoding='utf-8')
+
+
+def iter_docs(db, name: str, batch_size: int = BATCH_SIZE) -> Iterator[Dict[str, Any]]:
+    """Iterate a collection in _id order with a bounded cursor batch size."""
+    return db[name].find().sort('_id', 1).batch_size(batch_size)
+
+
+def export_collection(db, name: str, out_dir: str, fmt: str = 'ndjson', compression: Optional[str] = None,
+                      batch_size: int = BATCH_SIZE) -> Dict[str, Any]:
+    """Write one collection to ``out_dir`` incrementally and return ``{'path', 'count'}``.
+
+    ``fmt='ndjson'`` writes one document per line; ``fmt='json'`` writes a
+    single JSON array (the historical ``data/*.json`` layout) without holding
+    the collection in memory. The file is written under a temporary name and
+    renamed into place when complete.
+    """
+    path = os.path.join(out_dir, export_filename(name, fmt, compression))
+    tmp_path = path + '.partial'
+    count = 0
+    writer = _open_writer(tmp_path, compression)
+    zstd = compression == 'zstd'
+    try:
+        if fmt == 'json':
+            _write(writer, '[', zstd)
+        for doc in iter_docs(db, name, batch_size):
+            line = dumps(doc)
+            if fmt == 'json':
+                _write(writer, (',\n' if count else '\n') + line, zstd)
+            else:
+                _write(writer, line + '\n', zstd)
+            count += 1
+        if fmt == 'json':
+            _write(writer, '\n]\n', zstd)
+    finally:
+        writer.close()
+    os.replace(tmp_path, path)
+    return {'collection': name, 'path': path, 'count': count}
+
+
+def _write(writer, text: str, binary: bool) -> None:
+    writer.write(text.encode('utf-8') if binary else text)
+
+
+def export_all(db, out_dir: str, collections: Optional[List[str]] = None, fmt: str = 'ndjson',
+               compression: Optional[str] = None, workers: int = 3) -> List[Dict[str, Any]]:
+    """Export collections concurrently, one thread per collection (bounded by ``workers``)."""
+    os.makedirs(out_dir, exist_ok=True)
+    names = collections or COLLECTIONS
+    started_at = _dt.datetime.utcnow()
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(names)))) as pool:
+        futures = [pool.submit(export_collection, db, name, out_dir, fmt, compression) for name in names]
+        results = [f.result() for f in futures]
+    # A full export is the new base snapshot for incremental exports
+    set_watermarks(db, names, started_at)
+    return results
+
+
+def _stream_sections(sections, compression: Optional[str], batch_size: int) -> Iterator[bytes]:
+    """Encode ``(collection, records)`` sections as archive lines, batch by batch."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compression == 'gzip' else None
+    for name, records in sections:
+        lines = [dumps({'$collection': name})]
+        for record in records:
+            lines.append(dumps(record))
+            if len(lines) >= batch_size:
+                chunk = ('\n'.join(lines) + '\n').encode('utf-8')
+                lines = []
+                chunk = compressor.compress(chunk) if compressor else chunk
+                if chunk:
+                    yield chunk
+        if lines:
+            chunk = ('\n'.join(lines) + '\n').encode('utf-8')
+            chunk = compressor.compress(chunk) if compressor else chunk
+            if chunk:
+                yield chunk
+    if compressor:
+        yield compressor.flush()
+
+
+def stream_export(db, collections: Optional[List[str]] = None, compression: Optional[str] = 'gzip',
+                  batch_size: int = BATCH_SIZE) -> Iterator[bytes]:
+    """Yield a single NDJSON archive of several collections, optionally gzip-compressed.
+
+    Each collection starts with a ``{"$collection": name}`` header line followed
+    by its documents, one per line. Output is produced batch by batch so it can
+    be sent to the client as a chunked response.
+    """
+    sections = ((name, iter_docs(db, name, batch_size)) for name in collections or COLLECTIONS)
+    return _stream_sections(sections, compression, batch_size)
+
+
+# --- import -----------------------------------------------------------------
+
+IMPORT_SUFFIXES = ['.ndjson', '.ndjson.gz', '.ndjson.zst', '.json', '.json.gz', '.json.zst']
+STAGING_SUFFIX = '__import_staging'
+DATETIME_FIELDS = ('created_at', 'updated_at')
+
+
+def open_reader(path_or_file, name: str = ''):
+    """Open a (possibly gzip/zstd compressed) export as a text stream."""
+    fileobj = open(path_or_file, 'rb') if isinstance(path_or_file, str) else path_or_file
+    name = name or (path_or_file if isinstance(path_or_file, str) else getattr(fileobj, 'name', '') or '')
+    head = fileobj.peek(4)[:4] if hasattr(fileobj, 'peek') else b''
+    if name.endswith('.gz') or head[:2] == b'\x1f\x8b':
+        fileobj = gzip.GzipFile(fileobj=fileobj)
+    elif name.endswith('.zst') or head == b'\x28\xb5\x2f\xfd':
+        if zstandard is None:
+            raise RuntimeError('zstd input requires the "zstandard" package.')
+        fileobj = zstandard.ZstdDecompressor().stream_reader(fileobj)
+    return io.TextIOWrapper(fileobj, encoding='utf-8')
+
+
+def iter_json_array(reader, chunk_size: int = 1 << 16) -> Iterator[Any]:
+    """Incrementally decode the elements of a top-level JSON array."""
+    decoder = json.JSONDecoder()
+    buf = ''
+    pos = 0
+    eof = False
+    started = False
+    while True:
+        # skip separators between elements
+        while pos < len(buf) and buf[pos] in ' \t\r\n,' + ('' if started else '['):
+            if buf[pos] == '[':
+                started = True
+            pos += 1
+        if pos < len(buf) and buf[pos] == ']':
+            return
+        if pos >= len(buf) or not started:
+            if eof:
+                if started:
+                    raise ValueError('Unexpected end of JSON array')
+                return
+            chunk = reader.read(chunk_size)
+            eof = not chunk
+            buf = buf[pos:] + chunk
+            pos = 0
+            continue
+        try:
+            value, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            chunk = reader.read(chunk_size)
+            eof = not chunk
+            buf = buf[pos:] + chunk
+            pos = 0
+            continue
+        # a value ending exactly at the buffer edge may be a truncated number
+        if end == len(buf) and not eof and not isinstance(value, (dict, list, str)):
+            chunk = reader.read(chunk_size)
+            eof = not chunk
+            buf = buf[pos:] + chunk
+            pos = 0
+            continue
+        yield value
+        pos = end
+
+
+def iter_ndjson(reader) -> Iterator[Any]:
+    for line in reader:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+def iter_file_docs(path: str) -> Iterator[Dict[str, Any]]:
+    reader = open_reader(path)
+    try:
+        is_ndjson = '.ndjson' in os.path.basename(path)
+        for doc in (iter_ndjson(reader) if is_ndjson else iter_json_array(reader)):
+            if isinstance(doc, dict):
+                yield doc
+    finally:
+        reader.close()
+
+
+def iter_archive(reader) -> Iterator[Any]:
+    """Yield ``(collection, doc)`` pairs from a stream_export() archive."""
+    current = None
+    for doc in iter_ndjson(reader):
+        if isinstance(doc, dict) and len(doc) == 1 and '$collection' in doc:
+            current = doc['$collection']
+            continue
+        if current is not None and isinstance(doc, dict):
+            yield current, doc
+
+
+def coerce_doc(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert exported _id values (string or {'$oid': ...}) back to ObjectId
+    and ISO timestamps back to datetimes so watermark queries can compare them."""
+    _id = doc.get('_id')
+    if isinstance(_id, dict) and '$oid' in _id:
+        doc['_id'] = ObjectId(_id['$oid'])
+    elif isinstance(_id, str) and ObjectId.is_valid(_id):
+        doc['_id'] = ObjectId(_id)
+    for field in DATETIME_FIELDS:
+        value = doc.get(field)
+        if isinstance(value, str):
+            try:
+                doc[field] = _dt.datetime.fromisoformat(value)
+            except ValueError:
+                pass
+    return doc
+
+
+def find_import_file(data_dir: str, name: str) -> Optional[str]:
+    """Pick the most recently written export of a collection in ``data_dir``."""
+    candidates = [os.path.join(data_dir, name + s) for s in IMPORT_SUFFIXES]
+    existing = [p for p in candidates if os.path.isfile(p)]
+    return max(existing, key=os.path.getmtime) if existing else None
+
+
+class CollectionImporter:
+    """Load documents into a staging collection, index it, then swap it live.
+
+    Documents are inserted with unordered ``insert_many`` batches; the live
+    collection keeps serving reads until the final ``renameCollection`` with
+    ``dropTarget`` replaces it in one step. Nothing is swapped when no
+    documents arrived or the registered indexes cannot be built.
+    """
+
+    def __init__(self, db, name: str, batch_size: int = BATCH_SIZE, progress=None):
+        self.db = db
+        self.name = name
+        self.batch_size = batch_size
+        self.progress = progress
+        self.staging = db[name + STAGING_SUFFIX]
+        self.count = 0
+        self.errors = 0
+        self._batch: List[Dict[str, Any]] = []
+        self._started = None
+
+    def add(self, doc: Dict[str, Any]) -> None:
+        if self._started is None:
+            self._started = time.perf_counter()
+            self.staging.drop()
+        self._batch.append(coerce_doc(doc))
+        if len(self._batch) >= self.batch_size:
+            self._flush()
+
+    def _flush(self) -> None:
+        if not self._batch:
+            return
+        try:
+            result = self.staging.insert_many(self._batch, ordered=False)
+            self.count += len(result.inserted_ids)
+        except BulkWriteError as ex:
+            self.count += ex.details.get('nInserted', 0)
+            self.errors += len(ex.details.get('writeErrors', []))
+        self._batch = []
+        if self.progress:
+            self.progress(self.name, self.count, self.elapsed())
+
+    def _removed_ids(self) -> List[Any]:
+        """Live ids missing from staging; only needed once deltas have been exported."""
+        if self.db[WATERMARKS_COLLECTION].find_one({'_id': self.name}) is None:
+            return []
+        removed: List[Any] = []
+        ids: List[Any] = []
+
+        def check():
+            present = {d['_id'] for d in self.staging.find({'_id': {'$in': ids}}, {'_id': 1})}
+            removed.extend(i for i in ids if i not in present)
+            del ids[:]
+
+        for doc in self.db[self.name].find({}, {'_id': 1}).batch_size(self.batch_size):
+            ids.append(doc['_id'])
+            if len(ids) >= self.batch_size:
+                check()
+        if ids:
+            check()
+        return removed
+
+    def elapsed(self) -> float:
+        return (time.perf_counter() - self._started) if self._started is not None else 0.0
+
+    def finish(self) -> Dict[str, Any]:
+        self._flush()
+        result = {'collection': self.name, 'count': self.count, 'errors': self.errors, 'swapped': False}
+        if self.count:
+            indexes = ensure_indexes(self.db, collection=self.name, target=self.staging)
+            if indexes['failed']:
+                result['index_errors'] = indexes['failed']
+                self.staging.drop()
+            else:
+                removed = self._removed_ids()
+                self.staging.rename(self.name, dropTarget=True)
+                result['swapped'] = True
+                result['removed'] = reset_watermark(self.db, self.name, removed)
+        elif self._started is not None:
+            self.staging.drop()
+        result['seconds'] = self.elapsed()
+        result['docs_per_sec'] = (self.count / result['seconds']) if result['seconds'] else 0.0
+        return result
+
+
+def import_docs(db, name: str, docs, batch_size: int = BATCH_SIZE, progress=None) -> Dict[str, Any]:
+    importer = CollectionImporter(db, name, batch_size=batch_size, progress=progress)
+    for doc in docs:
+        importer.add(doc)
+    return importer.finish()
+
+
+def import_dir(db, data_dir: str, collections: Optional[List[str]] = None, batch_size: int = BATCH_SIZE,
+               progress=None) -> List[Dict[str, Any]]:
+    """Import every collection that has an export file in ``data_dir``."""
+    results = []
+    for name in collections or COLLECTIONS:
+        path = find_import_file(data_dir, name)
+        if path is None:
+            continue
+        result = import_docs(db, name, iter_file_docs(path), batch_size=batch_size, progress=progress)
+        result['path'] = path
+        results.append(result)
+    return results
+
+
+def import_archive(db, reader, batch_size: int = BATCH_SIZE, progress=None) -> List[Dict[str, Any]]:
+    """Import a stream_export() archive, swapping each collection as it completes."""
+    results = []
+    importer = None
+    for name, doc in iter_archive(reader):
+        if name not in COLLECTIONS or DELETE_KEY in doc:
+            continue
+        if importer is None or importer.name != name:
+            if importer is not None:
+                results.append(importer.finish())
+            importer = CollectionImporter(db, name, batch_size=batch_size, progress=progress)
+        importer.add(doc)
+    if importer is not None:
+        results.append(importer.finish())
+    return results
+
+
+# --- incremental (delta) export ---------------------------------------------
+
+WATERMARKS_COLLECTION = 'export_watermarks'
+DELTA_DIR = 'deltas'
+DELETE_KEY = '$delete'
+# Re-read a few seconds before the previous watermark so writes that were in
+# flight during the last export are not missed; replays are idempotent.
+DELTA_OVERLAP = _dt.timedelta(seconds=5)
+
+
+def get_watermarks(db) -> Dict[str, _dt.datetime]:
+    return {d['_id']: d['exported_at'] for d in db[WATERMARKS_COLLECTION].find() if 'exported_at' in d}
+
+
+def get_resets(db) -> Dict[str, _dt.datetime]:
+    return {d['_id']: d['reset_at'] for d in db[WATERMARKS_COLLECTION].find() if 'reset_at' in d}
+
+
+def set_watermarks(db, names: List[str], exported_at: _dt.datetime) -> None:
+    for name in names:
+        db[WATERMARKS_COLLECTION].update_one(
+            {'_id': name}, {'$set': {'exported_at': exported_at}, '$unset': {'reset_at': ''}}, upsert=True)
+
+
+def reset_watermark(db, name: str, removed_ids: List[Any]) -> int:
+    """Force the next delta of ``name`` to be a full one after an import replaced it.
+
+    Imported documents keep their old ``updated_at``, so a watermark delta
+    would miss them; ids that disappeared get tombstones stamped after
+    ``reset_at`` so the full delta still deletes them downstream.
+    """
+    reset_at = _dt.datetime.utcnow()
+    db[WATERMARKS_COLLECTION].update_one(
+        {'_id': name}, {'$set': {'reset_at': reset_at}, '$unset': {'exported_at': ''}}, upsert=True)
+    for i in range(0, len(removed_ids), BATCH_SIZE):
+        db[TOMBSTONES_COLLECTION].insert_many([
+            {'collection': name, 'doc_id': str(doc_id), 'deleted_at': reset_at}
+            for doc_id in removed_ids[i:i + BATCH_SIZE]
+        ])
+    return len(removed_ids)
+
+
+def changed_query(since: _dt.datetime) -> Dict[str, Any]:
+    """Documents written after ``since``: stamped via updated_at, or unstamped but created later."""
+    return {'$or': [
+        {'updated_at': {'$gt': since}},
+        {'updated_at': {'$exists': False}, '_id': {'$gt': ObjectId.from_datetime(since)}},
+    ]}
+
+
+def _delta_records(db, name: str, since: Optional[_dt.datetime], batch_size: int,
+                   reset_at: Optional[_dt.datetime] = None) -> Iterator[Dict[str, Any]]:
+    if since is None:
+        yield from iter_docs(db, name, batch_size)
+        if reset_at is None:
+            return
+        # Full delta after an import: still delete what the import dropped
+        tombstones = db[TOMBSTONES_COLLECTION].find(
+            {'collection': name, 'deleted_at': {'$gte': reset_at}}, {'doc_id': 1})
+    else:
+        since = since - DELTA_OVERLAP
+        yield from db[name].find(changed_query(since)).sort('_id', 1).batch_size(batch_size)
+        tombstones = db[TOMBSTONES_COLLECTION].find({'collection': name, 'deleted_at': {'$gt': since}}, {'doc_id': 1})
+    for t in tombstones.batch_size(batch_size):
+        yield {DELETE_KEY: t['doc_id']}
+
+
+def export_delta(db, out_dir: str, collections: Optional[List[str]] = None, compression: Optional[str] = 'gzip',
+                 batch_size: int = BATCH_SIZE) -> Dict[str, Any]:
+    """Write the changes since each collection's watermark to ``out_dir/deltas``.
+
+    Collections without a watermark (never exported, or replaced by a full
+    import since) are written in full. The
+    output uses the archive format with ``{"$delete": id}`` tombstone lines and
+    the watermarks advance only after the file is complete.
+    """
+    names = collections or COLLECTIONS
+    compression = 'gzip' if compression == 'gzip' else None
+    started_at = _dt.datetime.utcnow()
+    watermarks = get_watermarks(db)
+    resets = get_resets(db)
+    delta_dir = os.path.join(out_dir, DELTA_DIR)
+    os.makedirs(delta_dir, exist_ok=True)
+    path = os.path.join(delta_dir, f"delta-{started_at.strftime('%Y%m%dT%H%M%S')}.ndjson{COMPRESSIONS[compression]}")
+    counts = {name: 0 for name in names}
+
+    def counted(name, records):
+        for record in records:
+            counts[name] += 1
+            yield record
+
+    sections = ((name, counted(name, _delta_records(db, name, watermarks.get(name), batch_size, resets.get(name))))
+                for name in names)
+    tmp_path = path + '.partial'
+    with open(tmp_path, 'wb') as f:
+        for chunk in _stream_sections(sections, compression, batch_size):
+            f.write(chunk)
+    os.replace(tmp_path, path)
+    set_watermarks(db, names, started_at)
+    return {'path': path, 'counts': counts, 'since': {n: watermarks.get(n) for n in names}}
+
+
+def apply_delta(db, reader, batch_size: int = BATCH_SIZE) -> Dict[str, Dict[str, int]]:
+    """Replay a delta (or full) archive onto live collections with upserts and deletes.
+
+    Venue slots and analytics rollups are not touched; callers rebuild them
+    when bookings changed (``rebuild_slots`` and ``app.rollups.rebuild()``).
+    """
+    stats: Dict[str, Dict[str, int]] = {}
+    ops: List[Any] = []
+    current = None
+
+    def flush():
+        if ops:
+            result = db[current].bulk_write(ops, ordered=True)
+            entry = stats.setdefault(current, {'written': 0, 'deleted': 0})
+            entry['written'] += result.upserted_count + result.modified_count
+            entry['deleted'] += result.deleted_count
+            del ops[:]
+
+    for name, doc in iter_archive(reader):
+        if name not in COLLECTIONS:
+            continue
+        if name != current:
+            flush()
+            current = name
+        if DELETE_KEY in doc:
+            doc_id = doc[DELETE_KEY]
+            ops.append(DeleteOne({'_id': ObjectId(doc_id) if ObjectId.is_valid(doc_id) else doc_id}))
+        elif '_id' in doc:
+            doc = coerce_doc(doc)
+            ops.append(ReplaceOne({'_id': doc['_id']}, doc, upsert=True))
+        if len(ops) >= batch_size:
+            flush()
+    flush()
+    return stats
+
+
+def list_deltas(out_dir: str) -> List[str]:
+    delta_dir = os.path.join(out_dir, DELTA_DIR)
+    if not os.path.isdir(delta_dir):
+        return []
+    return sorted(os.path.join(delta_dir, f) for f in os.listdir(delta_dir)
+                  if f.startswith('delta-') and not f.endswith('.partial'))
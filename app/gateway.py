@@ -0,0 +1,226 @@
+import hashlib
+import hmac
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+FAKE_KEY_ID = 'rzp_test_fake'
+FAKE_KEY_SECRET = 'fake_secret'
+
+
+class GatewayStats:
+    """Call counts and cumulative latency of payment gateway calls, per operation."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+        self.seconds: Dict[str, float] = {}
+
+    @contextmanager
+    def track(self, operation: str):
+        started = time.perf_counter()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.calls[operation] = self.calls.get(operation, 0) + 1
+                self.seconds[operation] = self.seconds.get(operation, 0.0) + elapsed
+                if not ok:
+                    self.errors[operation] = self.errors.get(operation, 0) + 1
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {
+                op: {
+                    'calls': n,
+                    'errors': self.errors.get(op, 0),
+                    'avg_ms': 1000.0 * self.seconds[op] / n if n else 0.0,
+                }
+                for op, n in self.calls.items()
+            }
+
+
+gateway_stats = GatewayStats()
+
+
+def payment_signature(order_id: str, payment_id: str, key_secret: str) -> str:
+    """Razorpay checkout signature: HMAC-SHA256 of ``order_id|payment_id``."""
+    return hmac.new(key_secret.encode('utf-8'), f'{order_id}|{payment_id}'.encode('utf-8'), hashlib.sha256).hexdigest()
+
+
+class FakeRazorpayClient:
+    """In-memory stand-in for ``razorpay.Client`` used for offline and load testing.
+
+    Supports the calls this app makes (``order.create``/``order.fetch``/
+    ``order.payments`` and ``utility.verify_payment_signature``) with real
+    signature checks, plus :meth:`pay` to simulate a completed checkout.
+    ``latency_ms`` adds an artificial delay per call to mimic the network.
+    """
+
+    def __init__(self, key_secret: str = FAKE_KEY_SECRET, latency_ms: float = 0.0):
+        self.key_secret = key_secret
+        self.latency = latency_ms / 1000.0
+        self.orders: Dict[str, Dict[str, Any]] = {}
+        self.payments: Dict[str, list] = {}
+        self._lock = threading.Lock()
+        self.order = _FakeOrders(self)
+        self.utility = _FakeUtility(self)
+
+    def _sleep(self) -> None:
+        if self.latency:
+            time.sleep(self.latency)
+
+    def pay(self, order_id: str, status: str = 'captured') -> Dict[str, str]:
+        """Simulate the checkout completing; returns the payload posted to /payment/verify."""
+        payment_id = f'pay_{uuid.uuid4().hex[:14]}'
+        with self._lock:
+            order = self.orders[order_id]
+            self.payments.setdefault(order_id, []).append({
+                'id': payment_id, 'order_id': order_id, 'amount': order['amount'], 'status': status,
+            })
+            if status == 'captured':
+                order['status'] = 'paid'
+                order['amount_paid'] = order['amount']
+                order['amount_due'] = 0
+            else:
+                order['attempts'] += 1
+                if order['status'] == 'created':
+                    order['status'] = 'attempted'
+        return {
+            'razorpay_order_id': order_id,
+            'razorpay_payment_id': payment_id,
+            'razorpay_signature': payment_signature(order_id, payment_id, self.key_secret),
+        }
+
+
+class _FakeOrders:
+    def __init__(self, client: FakeRazorpayClient):
+        self.client = client
+
+    def create(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        self.client._sleep()
+        order = {
+            'id': f'order_{uuid.uuid4().hex[:14]}',
+            'entity': 'order',
+            'amount': data.get('amount'),
+            'amount_paid': 0,
+            'amount_due': data.get('amount'),
+            'currency': data.get('currency', 'INR'),
+            'receipt': data.get('receipt'),
+            'notes': data.get('notes') or {},
+            'status': 'created',
+            'attempts': 0,
+            'created_at': int(time.time()),
+        }
+        with self.client._lock:
+            self.client.orders[order['id']] = order
+        return dict(order)
+
+    def fetch(self, order_id: str) -> Dict[str, Any]:
+        self.client._sleep()
+        with self.client._lock:
+            if order_id not in self.client.orders:
+                raise KeyError(f'order {order_id} does not exist')
+            return dict(self.client.orders[order_id])
+
+    def payments(self, order_id: str) -> Dict[str, Any]:
+        self.client._sleep()
+        with self.client._lock:
+            items = [dict(p) for p in self.client.payments.get(order_id, [])]
+        return {'entity': 'collection', 'count': len(items), 'items': items}
+
+
+class _FakeUtility:
+    def __init__(self, client: FakeRazorpayClient):
+        self.client = client
+
+    def verify_payment_signature(self, params: Dict[str, str]) -> bool:
+        expected = payment_signature(params.get('razorpay_order_id', ''), params.get('razorpay_payment_id', ''),
+                                     self.client.key_secret)
+        if not hmac.compare_digest(expected, params.get('razorpay_signature') or ''):
+            raise ValueError('Razorpay Signature Verification Failed')
+        return True
+
+
+def _http_session(timeout: float, retries: int, pool_size: int):
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    class TimeoutSession(requests.Session):
+        def request(self, *args, **kwargs):
+            kwargs.setdefault('timeout', timeout)
+            return super().request(*args, **kwargs)
+
+    session = TimeoutSession()
+    # Only idempotent reads are retried; creating an order twice would charge twice
+    retry = Retry(total=retries, connect=retries, read=retries, backoff_factor=0.2,
+                  status_forcelist=(502, 503, 504), allowed_methods=frozenset(['GET']))
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+_client_lock = threading.Lock()
+_client: Optional[Any] = None
+_client_pid: Optional[int] = None
+
+
+def gateway_mode() -> str:
+    return os.getenv('PAYMENT_GATEWAY', 'razorpay').lower()
+
+
+def gateway_key_id() -> Optional[str]:
+    return FAKE_KEY_ID if gateway_mode() == 'fake' else os.getenv('RAZORPAY_KEY_ID')
+
+
+def build_client():
+    """Construct a gateway client from the environment (see get_client for reuse)."""
+    if gateway_mode() == 'fake':
+        return FakeRazorpayClient(latency_ms=float(os.getenv('FAKE_GATEWAY_LATENCY_MS', '0')))
+    key_id = os.getenv('RAZORPAY_KEY_ID')
+    key_secret = os.getenv('RAZORPAY_KEY_SECRET')
+    if not key_id or not key_secret:
+        raise RuntimeError('Razorpay keys are not configured. Set RAZORPAY_KEY_ID and RAZORPAY_KEY_SECRET environment variables.')
+    # Imported here so processes that never take a payment do not load the SDK
+    try:
+        import razorpay
+    except ImportError:
+        raise RuntimeError('razorpay package is not installed. Add "razorpay" to requirements and install dependencies.') from None
+    session = _http_session(
+        timeout=float(os.getenv('RAZORPAY_TIMEOUT', '10')),
+        retries=int(os.getenv('RAZORPAY_RETRIES', '2')),
+        pool_size=int(os.getenv('RAZORPAY_POOL_SIZE', '10')),
+    )
+    return razorpay.Client(session=session, auth=(key_id, key_secret))
+
+
+def get_client():
+    """Return this process's shared gateway client, creating it on first use.
+
+    The client (and its keep-alive HTTP connection pool) is rebuilt after a
+    fork so worker processes never share sockets with their parent.
+    """
+    global _client, _client_pid
+    pid = os.getpid()
+    if _client is None or _client_pid != pid:
+        with _client_lock:
+            if _client is None or _client_pid != pid:
+                _client = build_client()
+                _client_pid = pid
+    return _client
+
+
+def reset_client() -> None:
+    global _client, _client_pid
+    with _client_lock:
+        _client = None
+        _client_pid = None
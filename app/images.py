@@ -0,0 +1,219 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional
+
+ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
+# Widths generated for every image; never larger than the original
+WIDTHS = (160, 320, 640, 1280)
+WEBP_QUALITY = 80
+JPEG_QUALITY = 82
+UPLOAD_DIR = 'images/uploads'
+
+
+def allowed_file(filename: Optional[str]) -> bool:
+    return bool(filename) and '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+
+
+def variant_path(path: str, width: int, ext: str) -> str:
+    """``images/uploads/ab/<hash>.jpg`` -> ``images/uploads/ab/<hash>.w320.webp``."""
+    return f'{os.path.splitext(path)[0]}.w{width}.{ext}'
+
+
+def manifest_path(path: str) -> str:
+    return os.path.splitext(path)[0] + '.variants.json'
+
+
+def _write_atomic(target: str, write) -> None:
+    tmp = f'{target}.{os.getpid()}.{threading.get_ident()}.tmp'
+    try:
+        write(tmp)
+        os.replace(tmp, target)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def _write_bytes(path: str, data: bytes) -> None:
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def build_variants(root: str, path: str, widths: Iterable[int] = WIDTHS) -> Dict[str, Any]:
+    """Write resized WebP and JPEG/PNG copies of ``root/path`` and a manifest listing them."""
+    from PIL import Image, ImageOps
+
+    with Image.open(os.path.join(root, path)) as src:
+        src = ImageOps.exif_transpose(src)
+        has_alpha = src.mode in ('RGBA', 'LA') or (src.mode == 'P' and 'transparency' in src.info)
+        src = src.convert('RGBA' if has_alpha else 'RGB')
+        fallback = 'png' if has_alpha else 'jpg'
+        manifest: Dict[str, Any] = {'width': src.width, 'height': src.height, 'webp': [], fallback: []}
+        manifest['fallback'] = fallback
+        for width in sorted(set(min(w, src.width) for w in widths)):
+            if width == src.width:
+                resized = src
+            else:
+                resized = src.resize((width, max(1, round(src.height * width / src.width))), Image.LANCZOS)
+            for ext in ('webp', fallback):
+                rel = variant_path(path, width, ext)
+                if ext == 'webp':
+                    options = {'format': 'WEBP', 'quality': WEBP_QUALITY, 'method': 4}
+                elif ext == 'jpg':
+                    options = {'format': 'JPEG', 'quality': JPEG_QUALITY, 'optimize': True, 'progressive': True}
+                else:
+                    options = {'format': 'PNG', 'optimize': True}
+                _write_atomic(os.path.join(root, rel), lambda tmp: resized.save(tmp, **options))
+                manifest[ext].append({'w': width, 'path': rel})
+    # Written last: its presence means every variant is in place
+    _write_atomic(os.path.join(root, manifest_path(path)),
+                  lambda tmp: _write_bytes(tmp, json.dumps(manifest).encode()))
+    return manifest
+
+
+class ImageStore:
+    """Content-addressed image uploads with resized variants built off the request thread.
+
+    Uploads are stored under ``static/images/uploads/<aa>/<sha256>.<ext>``, so
+    the same picture uploaded twice is stored once and a new upload never
+    overwrites another. Each width in :data:`WIDTHS` is written as WebP plus a
+    JPEG (or PNG when the image has transparency) by a small thread pool, and a
+    ``.variants.json`` manifest is written once they are all in place.
+    :meth:`sources` turns a stored path into ``src``/``srcset`` values for the
+    templates, falling back to the original until the variants exist.
+    Pillow is optional: without it only the originals are served.
+    """
+
+    def __init__(self, static_root: str, workers: int = 1):
+        self.root = static_root
+        self.workers = workers
+        self.processed = 0
+        self.failed = 0
+        self.deduplicated = 0
+        self.process_seconds = 0.0
+        self.last_error: Optional[str] = None
+        # URL builder for static paths; create_app points it at the fingerprinting one (app.assets)
+        self.url_for = None
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending: Dict[str, Any] = {}
+        self._manifests: Dict[str, Dict[str, Any]] = {}
+        try:
+            import PIL  # noqa: F401
+            self.enabled = workers > 0
+        except ImportError:
+            self.enabled = False
+
+    # --- uploads -------------------------------------------------------------------
+
+    def save(self, file) -> Optional[str]:
+        """Store an uploaded ``FileStorage``; returns its path relative to ``static`` or None if not an image."""
+        if not file or not allowed_file(file.filename):
+            return None
+        data = file.read()
+        if not data:
+            return None
+        ext = file.filename.rsplit('.', 1)[1].lower()
+        ext = 'jpg' if ext == 'jpeg' else ext
+        digest = hashlib.sha256(data).hexdigest()
+        path = f'{UPLOAD_DIR}/{digest[:2]}/{digest}.{ext}'
+        target = os.path.join(self.root, path)
+        if os.path.exists(target):
+            with self._lock:
+                self.deduplicated += 1
+        else:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            _write_atomic(target, lambda tmp: _write_bytes(tmp, data))
+        self.submit(path)
+        return path
+
+    def submit(self, path: str) -> bool:
+        """Queue variant generation unless it is done, already queued or Pillow is missing."""
+        if not self.enabled or not path or self.manifest(path) is not None:
+            return False
+        with self._lock:
+            if path in self._pending:
+                return False
+            if self._executor is None:
+                # Created on first use so preforked workers each get their own threads
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='image-variants')
+            self._pending[path] = self._executor.submit(self._process, path)
+        return True
+
+    def _process(self, path: str) -> None:
+        started = time.perf_counter()
+        ok = False
+        try:
+            self._manifests[path] = build_variants(self.root, path)
+            ok = True
+        except Exception as ex:
+            self.last_error = f'{path}: {ex}'
+        finally:
+            with self._lock:
+                self._pending.pop(path, None)
+                self.process_seconds += time.perf_counter() - started
+                if ok:
+                    self.processed += 1
+                else:
+                    self.failed += 1
+
+    def build_now(self, path: str) -> Dict[str, Any]:
+        """Generate variants synchronously (backfill command)."""
+        manifest = build_variants(self.root, path)
+        self._manifests[path] = manifest
+        return manifest
+
+    # --- reading -------------------------------------------------------------------
+
+    def manifest(self, path: str) -> Optional[Dict[str, Any]]:
+        found = self._manifests.get(path)
+        if found is not None:
+            return found
+        try:
+            with open(os.path.join(self.root, manifest_path(path))) as f:
+                found = json.load(f)
+        except (OSError, ValueError):
+            return None
+        self._manifests[path] = found
+        return found
+
+    def sources(self, path: Optional[str], width: int = WIDTHS[0]) -> Dict[str, str]:
+        """``src``, ``srcset`` and ``webp_srcset`` for an image shown about ``width`` CSS pixels wide.
+
+        ``src`` is the smallest variant covering ``width`` on a 2x screen, so
+        browsers that ignore ``srcset`` still get a small file.
+        """
+        from flask import url_for as flask_url_for
+
+        url_for = self.url_for or flask_url_for
+        if not path:
+            return {'src': '', 'srcset': '', 'webp_srcset': ''}
+        manifest = self.manifest(path)
+        if manifest is None:
+            return {'src': url_for('static', filename=path), 'srcset': '', 'webp_srcset': ''}
+
+        def srcset(entries: List[Dict[str, Any]]) -> str:
+            return ', '.join(f"{url_for('static', filename=e['path'])} {e['w']}w" for e in entries)
+
+        fallback = manifest[manifest['fallback']]
+        src = next((e for e in fallback if e['w'] >= width * 2), fallback[-1])
+        return {
+            'src': url_for('static', filename=src['path']),
+            'srcset': srcset(fallback),
+            'webp_srcset': srcset(manifest['webp']),
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'processed': self.processed,
+                'failed': self.failed,
+                'deduplicated': self.deduplicated,
+                'pending': len(self._pending),
+                'process_seconds': round(self.process_seconds, 3),
+                'last_error': self.last_error,
+            }
@@ -0,0 +1,296 @@
+import bisect
+import contextvars
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from pymongo import monitoring
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+MONGO_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55)
+PDF_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Commands issued outside a request (payment-event applier, CLI scripts)
+NO_ENDPOINT = 'background'
+
+Labels = Tuple[str, ...]
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names: Sequence[str], values: Labels, extra: str = '') -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def _num(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name, self.help, self.label_names = name, help, tuple(labels)
+        self._lock = threading.Lock()
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, labels: Labels = (), amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{_labels(self.label_names, labels)} {_num(value)}')
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name, self.help, self.label_names = name, help, tuple(labels)
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        # labels -> [per-bucket counts..., +Inf count], sum
+        self._series: Dict[Labels, List[Any]] = {}
+
+    def observe(self, labels: Labels, value: float) -> None:
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][i] += 1
+            series[1] += value
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            snapshot = sorted((k, list(v[0]), v[1]) for k, v in self._series.items())
+        for labels, counts, total in snapshot:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float('inf'),), counts):
+                cumulative += n
+                le = 'le="%s"' % ('+Inf' if bound == float('inf') else _num(bound))
+                lines.append(f'{self.name}_bucket{_labels(self.label_names, labels, le)} {cumulative}')
+            lines.append(f'{self.name}_sum{_labels(self.label_names, labels)} {_num(total)}')
+            lines.append(f'{self.name}_count{_labels(self.label_names, labels)} {cumulative}')
+        return lines
+
+
+class _CommandListener(monitoring.CommandListener):
+    def __init__(self, metrics: 'Metrics'):
+        self.metrics = metrics
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self.metrics.record_command(event.command_name, event.duration_micros / 1e6, ok=True)
+
+    def failed(self, event):
+        self.metrics.record_command(event.command_name, event.duration_micros / 1e6, ok=False)
+
+
+class _PoolListener(monitoring.ConnectionPoolListener):
+    """Tracks open/checked-out connections and checkout wait time per server."""
+
+    def __init__(self, metrics: 'Metrics'):
+        self.metrics = metrics
+        self._lock = threading.Lock()
+        self._checkout_started: contextvars.ContextVar = contextvars.ContextVar('pool_checkout_started', default=None)
+        self.open: Dict[str, int] = {}
+        self.checked_out: Dict[str, int] = {}
+
+    def _adjust(self, gauge: Dict[str, int], address, delta: int) -> None:
+        key = '%s:%s' % address
+        with self._lock:
+            gauge[key] = gauge.get(key, 0) + delta
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self.metrics.pool_events.inc(('cleared',))
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self._adjust(self.open, event.address, 1)
+        self.metrics.pool_events.inc(('created',))
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._adjust(self.open, event.address, -1)
+        self.metrics.pool_events.inc(('closed',))
+
+    def connection_check_out_started(self, event):
+        self._checkout_started.set(time.perf_counter())
+
+    def connection_check_out_failed(self, event):
+        self.metrics.pool_events.inc(('checkout_failed',))
+
+    def connection_checked_out(self, event):
+        self._adjust(self.checked_out, event.address, 1)
+        started = self._checkout_started.get()
+        if started is not None:
+            self.metrics.pool_wait.observe((), time.perf_counter() - started)
+
+    def connection_checked_in(self, event):
+        self._adjust(self.checked_out, event.address, -1)
+
+
+class Metrics:
+    """Per-process request and Mongo instrumentation rendered in Prometheus text format.
+
+    Flask hooks time every request by endpoint; the pymongo command listener
+    attributes each command to the endpoint of the request running on the
+    same thread (pymongo reports commands on the calling thread), so
+    per-endpoint command counts and durations need no changes in the routes.
+    The per-request state is a context variable, so requests interleaved on
+    one event loop by the ASGI read path (see app.asgi) are kept apart too.
+    Pass :attr:`listeners` to ``MongoClient(event_listeners=...)``.
+    """
+
+    def __init__(self):
+        self._request: contextvars.ContextVar = contextvars.ContextVar('metrics_request', default=None)
+        self._lock = threading.Lock()
+        self.requests_in_flight = 0
+        self.request_latency = Histogram(
+            'http_request_duration_seconds', 'Request latency by endpoint.', ('endpoint', 'method', 'status'))
+        self.mongo_commands = Counter(
+            'mongo_commands_total', 'Mongo commands by endpoint and command.', ('endpoint', 'command', 'outcome'))
+        self.mongo_seconds = Histogram(
+            'mongo_command_duration_seconds', 'Mongo command latency.', ('endpoint', 'command'), MONGO_BUCKETS)
+        self.request_commands = Histogram(
+            'mongo_commands_per_request', 'Mongo commands issued per request.', ('endpoint',), COUNT_BUCKETS)
+        self.request_mongo_seconds = Histogram(
+            'mongo_time_per_request_seconds', 'Time spent in Mongo per request.', ('endpoint',), MONGO_BUCKETS)
+        self.pool_events = Counter('mongo_pool_events_total', 'Connection pool events.', ('event',))
+        self.pool_wait = Histogram('mongo_pool_checkout_wait_seconds', 'Time to check out a pooled connection.',
+                                   buckets=MONGO_BUCKETS)
+        self.pdf_render = Histogram('receipt_render_duration_seconds', 'Receipt PDF render time.',
+                                    ('mode', 'outcome'), PDF_BUCKETS)
+        self.command_listener = _CommandListener(self)
+        self.pool_listener = _PoolListener(self)
+        self.app = None
+
+    @property
+    def listeners(self) -> list:
+        return [self.command_listener, self.pool_listener]
+
+    # --- per-request state ------------------------------------------------------
+
+    def begin_request(self, endpoint: str) -> None:
+        self._request.set({'endpoint': endpoint, 'commands': 0, 'mongo_seconds': 0.0, 'started': time.perf_counter()})
+        with self._lock:
+            self.requests_in_flight += 1
+
+    def end_request(self, method: str, status: int) -> Optional[Dict[str, float]]:
+        state = self._request.get()
+        if state is None:
+            return None
+        self._request.set(None)
+        endpoint = state['endpoint']
+        elapsed = time.perf_counter() - state['started']
+        with self._lock:
+            self.requests_in_flight -= 1
+        self.request_latency.observe((endpoint, method, str(status)), elapsed)
+        self.request_commands.observe((endpoint,), state['commands'])
+        self.request_mongo_seconds.observe((endpoint,), state['mongo_seconds'])
+        return {'seconds': elapsed, 'commands': state['commands'], 'mongo_seconds': state['mongo_seconds']}
+
+    def current_endpoint(self) -> Optional[str]:
+        state = self._request.get()
+        return state['endpoint'] if state else None
+
+    def record_command(self, command: str, seconds: float, ok: bool = True) -> None:
+        state = self._request.get()
+        endpoint = NO_ENDPOINT
+        if state is not None:
+            state['commands'] += 1
+            state['mongo_seconds'] += seconds
+            endpoint = state['endpoint']
+        self.mongo_commands.inc((endpoint, command, 'ok' if ok else 'error'))
+        self.mongo_seconds.observe((endpoint, command), seconds)
+
+    def record_render(self, mode: str, seconds: float, ok: bool) -> None:
+        self.pdf_render.observe((mode, 'ok' if ok else 'error'), seconds)
+
+    # --- Flask wiring -----------------------------------------------------------
+
+    def init_app(self, app) -> None:
+        from flask import request
+
+        self.app = app
+        app.metrics = self
+
+        @app.before_request
+        def _start_timer():
+            self.begin_request(request.endpoint or 'unmatched')
+
+        @app.after_request
+        def _stop_timer(response):
+            summary = self.end_request(request.method, response.status_code)
+            if summary is not None:
+                response.headers['Server-Timing'] = (
+                    f"app;dur={summary['seconds'] * 1000:.1f}, "
+                    f"mongo;dur={summary['mongo_seconds'] * 1000:.1f};desc=\"{summary['commands']} commands\""
+                )
+            return response
+
+        @app.teardown_request
+        def _abandon_timer(exc):
+            # after_request is skipped for unhandled exceptions
+            if self._request.get() is not None:
+                self.end_request(request.method, 500)
+
+    # --- exposition -------------------------------------------------------------
+
+    def _gauges(self) -> List[str]:
+        lines = ['# HELP http_requests_in_flight Requests currently being served.',
+                 '# TYPE http_requests_in_flight gauge',
+                 f'http_requests_in_flight {self.requests_in_flight}']
+        pool = self.pool_listener
+        for name, gauge, help in (('mongo_pool_connections', pool.open, 'Open pooled connections.'),
+                                  ('mongo_pool_checked_out', pool.checked_out, 'Connections in use.')):
+            lines += [f'# HELP {name} {help}', f'# TYPE {name} gauge']
+            for address, value in sorted(gauge.items()):
+                lines.append(f'{name}{{address="{_escape(address)}"}} {value}')
+        app = self.app
+        if app is None:
+            return lines
+        sources = [
+            ('catalog_cache', app.catalog.stats() if getattr(app, 'catalog', None) else {}),
+            ('receipt_cache', app.receipt_cache.stats()),
+            ('receipt_renderer', app.pdf_renderer.stats()),
+            ('payment_events', app.payment_events.stats()),
+            ('booking_rollups', app.rollups.stats() if getattr(app, 'rollups', None) else {}),
+            ('static_assets', app.assets.stats() if getattr(app, 'assets', None) else {}),
+            ('asgi', app.asgi.stats() if getattr(app, 'asgi', None) else {}),
+            ('image_variants', app.images.stats() if getattr(app, 'images', None) else {}),
+            ('slow_queries', app.slow_queries.stats() if getattr(app, 'slow_queries', None) else {}),
+        ]
+        for prefix, stats in sources:
+            for key, value in sorted(stats.items()):
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    lines += [f'# TYPE {prefix}_{key} gauge', f'{prefix}_{key} {_num(value)}']
+        return lines
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in (self.request_latency, self.request_commands, self.request_mongo_seconds, self.mongo_commands,
+                       self.mongo_seconds, self.pool_events, self.pool_wait, self.pdf_render):
+            lines += metric.render()
+        lines += self._gauges()
+        return '\n'.join(lines) + '\n'
@@ -1,4 +1,5 @@
-from typing import Any, Dict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
 
 from bson import ObjectId
 
@@ -17,3 +18,107 @@ def to_object_id(id_str: str) -> ObjectId:
     return ObjectId(id_str)
 
 
+def maybe_object_id(value: Any) -> Optional[ObjectId]:
+    """Return an ObjectId for a valid id string (or ObjectId), else None."""
+    if isinstance(value, ObjectId):
+        return value
+    if isinstance(value, str) and ObjectId.is_valid(value):
+        return ObjectId(value)
+    return None
+
+
+def normalize_booking(booking: Dict[str, Any]) -> Dict[str, Any]:
+    """Add string id and parse the ISO event_date in place so templates can strftime it."""
+    if booking.get('_id') is not None:
+        booking['id'] = str(booking['_id'])
+    ev = booking.get('event_date')
+    if isinstance(ev, str):
+        try:
+            booking['event_date'] = datetime.fromisoformat(ev)
+        except Exception:
+            pass
+    return booking
+
+
+TOMBSTONES_COLLECTION = 'tombstones'
+
+
+def record_deletion(db, collection: str, doc_id: Any) -> None:
+    """Remember a deleted document so incremental exports can emit a tombstone."""
+    db[TOMBSTONES_COLLECTION].insert_one({
+        'collection': collection,
+        'doc_id': str(doc_id),
+        'deleted_at': datetime.utcnow(),
+    })
+
+
+# key on booking -> (foreign key field, collection)
+BOOKING_REFS = {
+    'event': ('event_id', 'events'),
+    'hotel': ('hotel_id', 'hotels'),
+    'catering': ('catering_id', 'caterings'),
+}
+
+# Fields shown on the bookings listing
+LIST_FIELDS = {
+    'event': ('eventname',),
+    'hotel': ('hotel_name',),
+    'catering': ('catername',),
+}
+
+# Fields shown on booking detail/status pages and receipts
+DETAIL_FIELDS = {
+    'event': ('eventname', 'event_desc'),
+    'hotel': ('hotel_name', 'hotel_desc', 'location', 'price'),
+    'catering': ('catername', 'cater_desc', 'cater_location', 'cater_price'),
+}
+
+
+def attach_related(db, bookings: Iterable[Dict[str, Any]], fields: Optional[Dict[str, Iterable[str]]] = None) -> List[Dict[str, Any]]:
+    """Attach event/hotel/catering sub-documents to bookings.
+
+    Issues at most one ``$in`` query per referenced collection regardless of
+    how many bookings are passed, projecting only the requested fields.
+    """
+    bookings = list(bookings)
+    for key, collection, query, projection in _related_queries(bookings, fields):
+        _attach(bookings, key, projection, db[collection].find(query, projection))
+    return bookings
+
+
+async def attach_related_async(db, bookings: Iterable[Dict[str, Any]],
+                               fields: Optional[Dict[str, Iterable[str]]] = None) -> List[Dict[str, Any]]:
+    """:func:`attach_related` for a pymongo ``AsyncDatabase``; the per-collection lookups run concurrently."""
+    import asyncio
+
+    bookings = list(bookings)
+    queries = _related_queries(bookings, fields)
+    results = await asyncio.gather(*(db[collection].find(query, projection).to_list(None)
+                                     for _, collection, query, projection in queries))
+    for (key, _, _, projection), docs in zip(queries, results):
+        _attach(bookings, key, projection, docs)
+    return bookings
+
+
+def _related_queries(bookings: List[Dict[str, Any]], fields: Optional[Dict[str, Iterable[str]]]):
+    """``(key, collection, query, projection)`` for each referenced collection with ids to look up."""
+    fields = fields or LIST_FIELDS
+    queries = []
+    for key, (ref_field, collection) in BOOKING_REFS.items():
+        wanted = tuple(fields.get(key) or ())
+        if not wanted:
+            continue
+        ids = {oid for oid in (maybe_object_id(b.get(ref_field)) for b in bookings) if oid is not None}
+        if not ids:
+            continue
+        queries.append((key, collection, {'_id': {'$in': list(ids)}}, {f: 1 for f in wanted}))
+    return queries
+
+
+def _attach(bookings: List[Dict[str, Any]], key: str, projection: Dict[str, int], docs: Iterable[Dict[str, Any]]) -> None:
+    ref_field = BOOKING_REFS[key][0]
+    found = {str(d['_id']): d for d in docs}
+    for b in bookings:
+        doc = found.get(str(b.get(ref_field) or ''))
+        if doc:
+            b[key] = {f: doc.get(f) for f in projection}
@@ -0,0 +1,142 @@
+import base64
+import json
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def encode_token(values: Sequence[Any]) -> str:
+    """Encode the sort-key values of a boundary document as an opaque URL-safe token."""
+    raw = json.dumps([{'$oid': str(v)} if isinstance(v, ObjectId) else v for v in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_token(token: str) -> Optional[List[Any]]:
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except Exception:
+        return None
+    if not isinstance(values, list):
+        return None
+    decoded = []
+    for v in values:
+        if isinstance(v, dict) and list(v) == ['$oid'] and ObjectId.is_valid(v['$oid']):
+            v = ObjectId(v['$oid'])
+        elif isinstance(v, (dict, list)):
+            # Anything else structured would reach the filter as an operator document
+            return None
+        decoded.append(v)
+    return decoded
+
+
+def _keyset_filter(sort: Sequence[Tuple[str, int]], values: Sequence[Any], forward: bool) -> Dict[str, Any]:
+    """Build the range filter selecting documents strictly after (or before) ``values``."""
+    clauses = []
+    for i, (field, direction) in enumerate(sort):
+        ascending = (direction == ASCENDING) == forward
+        clause = {f: v for (f, _), v in zip(sort[:i], values[:i])}
+        clause[field] = {'$gt' if ascending else '$lt': values[i]}
+        clauses.append(clause)
+    return {'$or': clauses}
+
+
+class Page:
+    """One page of a keyset-paginated query."""
+
+    def __init__(self, items: List[Dict[str, Any]], next_token: Optional[str], prev_token: Optional[str], limit: int):
+        self.items = items
+        self.next_token = next_token
+        self.prev_token = prev_token
+        self.limit = limit
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def page_size(value: Any, default: int = DEFAULT_PAGE_SIZE) -> int:
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+def paginate(collection, query: Optional[Dict[str, Any]] = None, sort: Sequence[Tuple[str, int]] = (),
+             projection: Optional[Dict[str, Any]] = None, args: Optional[Dict[str, Any]] = None) -> Page:
+    """Return one page of ``collection.find(query)`` using keyset (seek) pagination.
+
+    ``sort`` lists the ordering keys; ``_id`` is appended as a tie-breaker so
+    every position is unique. ``args`` is usually ``request.args`` and may hold
+    ``after``/``before`` tokens and a ``limit``. Only ``limit + 1`` documents
+    are fetched, so cost does not depend on how deep the page is.
+    """
+    plan = _plan(query, sort, projection, args)
+    docs = list(collection.find(plan['spec'], plan['projection']).sort(plan['order']).limit(plan['limit'] + 1))
+    return _page(docs, plan)
+
+
+async def paginate_async(collection, query: Optional[Dict[str, Any]] = None, sort: Sequence[Tuple[str, int]] = (),
+                         projection: Optional[Dict[str, Any]] = None, args: Optional[Dict[str, Any]] = None) -> Page:
+    """:func:`paginate` for a pymongo ``AsyncCollection``."""
+    plan = _plan(query, sort, projection, args)
+    cursor = collection.find(plan['spec'], plan['projection']).sort(plan['order']).limit(plan['limit'] + 1)
+    return _page(await cursor.to_list(None), plan)
+
+
+def _plan(query, sort, projection, args) -> Dict[str, Any]:
+    args = args or {}
+    sort = [tuple(s) for s in sort] or [('_id', ASCENDING)]
+    if sort[-1][0] != '_id':
+        sort.append(('_id', sort[-1][1]))
+    limit = page_size(args.get('limit'))
+    fields = [f for f, _ in sort]
+
+    after = decode_token(args['after']) if args.get('after') else None
+    before = decode_token(args['before']) if args.get('before') and not after else None
+    forward = before is None
+    cursor_values = after if forward else before
+
+    filters = [query or {}]
+    if cursor_values and len(cursor_values) == len(sort):
+        filters.append(_keyset_filter(sort, cursor_values, forward))
+    else:
+        cursor_values = None
+        forward = True
+    if projection is not None:
+        projection = dict(projection)
+        for f in fields:
+            projection.setdefault(f, 1)
+
+    order = sort if forward else [(f, DESCENDING if d == ASCENDING else ASCENDING) for f, d in sort]
+    spec = filters[0] if len(filters) == 1 else {'$and': filters}
+    return {'spec': spec, 'projection': projection, 'order': order, 'limit': limit, 'fields': fields,
+            'forward': forward, 'cursor_values': cursor_values}
+
+
+def _page(docs: List[Dict[str, Any]], plan: Dict[str, Any]) -> Page:
+    limit, fields, forward, cursor_values = plan['limit'], plan['fields'], plan['forward'], plan['cursor_values']
+    has_more = len(docs) > limit
+    docs = docs[:limit]
+    if not forward:
+        docs.reverse()
+
+    def token(doc):
+        return encode_token([doc.get(f) for f in fields])
+
+    next_token = prev_token = None
+    if docs:
+        if forward:
+            next_token = token(docs[-1]) if has_more else None
+            prev_token = token(docs[0]) if cursor_values else None
+        else:
+            next_token = token(docs[-1])
+            prev_token = token(docs[0]) if has_more else None
+    return Page(docs, next_token, prev_token, limit)
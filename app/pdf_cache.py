@@ -0,0 +1,186 @@
+import glob
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+# Bump when receipt rendering changes in a way the template hash cannot see
+RECEIPT_TEMPLATE_VERSION = 1
+# Render job states recorded next to the PDF so every worker process sees them
+JOB_STATES = ('pending', 'failed')
+
+
+def file_digest(path: str) -> str:
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()[:16]
+    except OSError:
+        return 'missing'
+
+
+class ReceiptCache:
+    """Size-bounded, content-addressed disk cache for rendered receipt PDFs.
+
+    Files are named ``<booking_id>-<digest>.pdf`` where the digest covers every
+    value rendered into the receipt plus the template version, so a changed
+    booking never serves a stale PDF. :meth:`invalidate` removes all variants
+    of a booking eagerly; least recently used files are evicted once the
+    directory grows beyond ``max_bytes``, counted over every worker's files
+    by re-scanning it (see :meth:`_scan`). Render jobs leave an empty
+    ``<key>.pending`` or ``<key>.failed`` marker beside the PDF (see
+    :meth:`mark`), so a poll landing on another worker knows the job exists.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 256 * 1024 * 1024, template_version: str = '',
+                 scan_interval: float = 30.0, stale_after: float = 600.0):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.template_version = f'{RECEIPT_TEMPLATE_VERSION}:{template_version}'
+        self.scan_interval = scan_interval
+        self.stale_after = stale_after
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._files: 'OrderedDict[str, int]' = OrderedDict()
+        self._bytes = 0
+        self._scanned = 0.0
+        os.makedirs(directory, exist_ok=True)
+        self._scan()
+
+    def _scan(self) -> None:
+        """Re-read the directory, which every worker writes to.
+
+        PDFs written by other workers count towards ``max_bytes`` and are
+        ordered by mtime (``get`` touches files, so this is recency across
+        workers); job markers and temp files older than ``stale_after`` were
+        left by crashed writers and are removed.
+        """
+        now = time.time()
+        entries = []
+        leftovers = ('.tmp',) + tuple(f'.{name}' for name in JOB_STATES)
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                if entry.name.endswith('.pdf'):
+                    entries.append((st.st_mtime, entry.path, st.st_size))
+                elif entry.name.endswith(leftovers) and now - st.st_mtime > self.stale_after:
+                    try:
+                        os.remove(entry.path)
+                    except OSError:
+                        pass
+        files: 'OrderedDict[str, int]' = OrderedDict((path, size) for _, path, size in sorted(entries))
+        with self._lock:
+            self._files = files
+            self._bytes = sum(files.values())
+            self._scanned = now
+
+    def key(self, booking_id: str, context: Dict[str, Any]) -> str:
+        payload = json.dumps({'v': self.template_version, 'ctx': context}, sort_keys=True, default=str)
+        return f'{booking_id}-{hashlib.sha256(payload.encode("utf-8")).hexdigest()}'
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f'{key}.pdf')
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+        try:
+            os.utime(path)  # keep recency visible to other workers after a restart
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+            if path in self._files:
+                self._files.move_to_end(path)
+            else:
+                self._files[path] = len(data)
+                self._bytes += len(data)
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        path = self._path(key)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+        with self._lock:
+            self._bytes += len(data) - self._files.pop(path, 0)
+            self._files[path] = len(data)
+            rescan = self._bytes > self.max_bytes or time.time() - self._scanned > self.scan_interval
+        if rescan:
+            # This process only knows its own writes; count the other workers' before evicting
+            self._scan()
+        with self._lock:
+            while self._bytes > self.max_bytes and len(self._files) > 1:
+                old_path, size = self._files.popitem(last=False)
+                self._bytes -= size
+                self.evictions += 1
+                try:
+                    os.remove(old_path)
+                except OSError:
+                    pass
+
+    def mark(self, key: str, state: Optional[str]) -> None:
+        """Record a render job as ``pending`` or ``failed``; ``None`` clears the marker."""
+        for name in JOB_STATES:
+            path = os.path.join(self.directory, f'{key}.{name}')
+            try:
+                if name == state:
+                    with open(path, 'wb'):
+                        pass
+                else:
+                    os.remove(path)
+            except OSError:
+                pass
+
+    def job_state(self, key: str) -> Optional[Tuple[str, float]]:
+        """``(state, age_seconds)`` of the marker left by :meth:`mark`, if any."""
+        now = time.time()
+        for name in JOB_STATES:
+            try:
+                return name, now - os.stat(os.path.join(self.directory, f'{key}.{name}')).st_mtime
+            except OSError:
+                continue
+        return None
+
+    def invalidate(self, booking_id: str) -> None:
+        """Remove every cached PDF and job marker of a booking (called when the booking changes)."""
+        prefix = os.path.join(self.directory, f'{glob.escape(str(booking_id))}-*')
+        for name in JOB_STATES:
+            for path in glob.glob(f'{prefix}.{name}'):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        for path in glob.glob(f'{prefix}.pdf'):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            with self._lock:
+                self._bytes -= self._files.pop(path, 0)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': (self.hits / total) if total else 0.0,
+            'evictions': self.evictions,
+            'files': len(self._files),
+            'bytes': self._bytes,
+        }
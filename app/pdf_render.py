@@ -0,0 +1,144 @@
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from io import BytesIO
+from typing import Callable, Dict, Optional
+
+
+def render_pdf(html: str) -> bytes:
+    """Render HTML to PDF bytes with xhtml2pdf (runs in a worker process when pooled)."""
+    from xhtml2pdf import pisa
+    out = BytesIO()
+    pisa.CreatePDF(src=html, dest=out)
+    return out.getvalue()
+
+
+class PdfRenderer:
+    """Bounded process pool that renders receipts off the request thread.
+
+    Jobs are identified by their receipt cache key, and finished PDFs are
+    written to the shared :class:`~app.pdf_cache.ReceiptCache`, so a client
+    polling a different worker process still finds the result on disk. Job
+    state is mirrored into cache markers for the same reason: another worker
+    reports a job as pending (and does not queue it again) until the marker
+    is ``pending_ttl`` seconds old, after which the job counts as abandoned.
+    """
+
+    def __init__(self, cache, workers: int = 2, max_pending: int = 32, job_ttl: float = 600.0,
+                 pending_ttl: float = 120.0):
+        self.cache = cache
+        self.workers = workers
+        self.max_pending = max_pending
+        self.job_ttl = job_ttl
+        self.pending_ttl = pending_ttl
+        self.rendered = 0
+        self.failed = 0
+        self.render_seconds = 0.0
+        # Called as observer(mode, seconds, ok) after each render (see app.metrics)
+        self.observer: Optional[Callable[[str, float, bool], None]] = None
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._jobs: Dict[str, Dict] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.workers > 0
+
+    def _pool(self) -> ProcessPoolExecutor:
+        # Created on first use (after any prefork) with spawn to avoid forking a threaded process
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        return self._executor
+
+    def _prune(self, now: float) -> None:
+        for key in [k for k, j in self._jobs.items() if j['future'].done() and now - j['submitted'] > self.job_ttl]:
+            del self._jobs[key]
+
+    def render_now(self, key: str, html: str) -> bytes:
+        """Render synchronously in the calling thread and store the result."""
+        started = time.perf_counter()
+        data = render_pdf(html)
+        self._record(started, ok=True, mode='inline')
+        self.cache.put(key, data)
+        return data
+
+    def _record(self, started: float, ok: bool, mode: str) -> None:
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.render_seconds += elapsed
+            if ok:
+                self.rendered += 1
+            else:
+                self.failed += 1
+        if self.observer is not None:
+            self.observer(mode, elapsed, ok)
+
+    def _shared_state(self, key: str) -> Optional[str]:
+        found = self.cache.job_state(key)
+        if found is None:
+            return None
+        state, age = found
+        return state if age <= (self.pending_ttl if state == 'pending' else self.job_ttl) else None
+
+    def submit(self, key: str, html: str) -> bool:
+        """Queue a render job; returns False when the pool is saturated."""
+        now = time.monotonic()
+        with self._lock:
+            self._prune(now)
+            job = self._jobs.get(key)
+            if job is not None and not (job['future'].done() and job['future'].exception()):
+                return True
+            if job is None and self._shared_state(key) == 'pending':
+                return True  # queued by another worker
+            pending = sum(1 for j in self._jobs.values() if not j['future'].done())
+            if pending >= self.max_pending:
+                return False
+            started = time.perf_counter()
+            # Marked before submitting so a fast finish cannot be followed by a stale marker
+            self.cache.mark(key, 'pending')
+            future = self._pool().submit(render_pdf, html)
+            self._jobs[key] = {'future': future, 'submitted': now}
+
+        def done(f: Future) -> None:
+            ok = f.exception() is None
+            self._record(started, ok, mode='pool')
+            if ok:
+                self.cache.put(key, f.result())
+                self.cache.mark(key, None)
+                # Served from the cache from now on; failed jobs stay visible until pruned
+                with self._lock:
+                    self._jobs.pop(key, None)
+            else:
+                self.cache.mark(key, 'failed')
+
+        future.add_done_callback(done)
+        return True
+
+    def status(self, key: str) -> str:
+        """One of ``pending``, ``done``, ``failed`` or ``unknown``; finished PDFs are read from the cache.
+
+        Jobs queued by other workers are reported from their cache markers.
+        """
+        with self._lock:
+            job = self._jobs.get(key)
+        if job is None:
+            return self._shared_state(key) or 'unknown'
+        future = job['future']
+        if not future.done():
+            return 'pending'
+        return 'failed' if future.exception() is not None else 'done'
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            pending = sum(1 for j in self._jobs.values() if not j['future'].done())
+        return {
+            'workers': self.workers,
+            'pending': pending,
+            'rendered': self.rendered,
+            'failed': self.failed,
+            'render_seconds': self.render_seconds,
+        }
@@ -0,0 +1,89 @@
+from typing import Any, Dict, Iterable, List, Optional
+
+MIN_BOOKING_AMOUNT = 100
+MAX_QUOTES_PER_REQUEST = 500
+
+# catalog collection -> price field
+PRICE_FIELDS = {
+    'hotels': 'price',
+    'caterings': 'cater_price',
+    'vendors': 'vendor_price',
+}
+
+
+def parse_price(value: Any) -> int:
+    try:
+        return int(value or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _price_table(field: str):
+    def build(docs: List[Dict[str, Any]]) -> Dict[str, int]:
+        return {d['id']: parse_price(d.get(field)) for d in docs if 'id' in d}
+    return build
+
+
+def check_selection(sel: Any) -> None:
+    """Raise ValueError unless ``sel`` is a selection ``quote_many`` can price."""
+    if not isinstance(sel, dict):
+        raise ValueError('a selection must be an object')
+    for field in ('hotel_id', 'catering_id'):
+        if sel.get(field) is not None and not isinstance(sel[field], str):
+            raise ValueError(f'{field} must be a string')
+    vendor_ids = sel.get('vendor_ids')
+    if vendor_ids is not None and (not isinstance(vendor_ids, (list, tuple))
+                                   or not all(isinstance(v, str) for v in vendor_ids)):
+        raise ValueError('vendor_ids must be a list of strings')
+
+
+class PricingEngine:
+    """Prices booking selections from in-memory price tables.
+
+    The tables are derived from the catalog cache, so they are parsed once per
+    catalog load and refreshed whenever an admin edit invalidates the catalog.
+    """
+
+    def __init__(self, catalog):
+        self.catalog = catalog
+
+    def prices(self, collection: str) -> Dict[str, int]:
+        return self.catalog.derived(collection, 'prices', _price_table(PRICE_FIELDS[collection]))
+
+    def quote(self, hotel_id: Optional[str] = None, catering_id: Optional[str] = None,
+              vendor_ids: Iterable[str] = ()) -> Dict[str, Any]:
+        """Total for one selection; unknown ids contribute nothing."""
+        return self.quote_many([{'hotel_id': hotel_id, 'catering_id': catering_id, 'vendor_ids': vendor_ids}])[0]
+
+    def quote_many(self, selections: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Price many candidate selections against one snapshot of the price tables.
+
+        Raises ValueError (see :func:`check_selection`) before pricing anything
+        if a selection is malformed.
+        """
+        selections = list(selections)
+        for n, sel in enumerate(selections):
+            try:
+                check_selection(sel)
+            except ValueError as ex:
+                raise ValueError(f'selection {n}: {ex}') from None
+        hotels, caterings, vendors = self.prices('hotels'), self.prices('caterings'), self.prices('vendors')
+        quotes = []
+        for sel in selections:
+            hotel_id = sel.get('hotel_id') or None
+            catering_id = sel.get('catering_id') or None
+            vendor_ids = [v for v in (sel.get('vendor_ids') or []) if v]
+            lines = {
+                'hotel': hotels.get(hotel_id, 0) if hotel_id else 0,
+                'catering': caterings.get(catering_id, 0) if catering_id else 0,
+                'vendors': sum(vendors.get(v, 0) for v in vendor_ids),
+            }
+            subtotal = sum(lines.values())
+            quotes.append({
+                'hotel_id': hotel_id,
+                'catering_id': catering_id,
+                'vendor_ids': vendor_ids,
+                'lines': lines,
+                'total': subtotal if subtotal > 0 else MIN_BOOKING_AMOUNT,
+            })
+        return quotes
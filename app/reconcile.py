@@ -0,0 +1,105 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from pymongo import UpdateOne
+
+from app.analytics import sync_rollups
+from app.gateway import gateway_stats
+
+PENDING_STATUSES = [0, 2]
+
+
+def gateway_status(client, order_id: str) -> Optional[int]:
+    """Map a gateway order to a booking payment_status, or None if still undecided."""
+    with gateway_stats.track('order.fetch'):
+        order = client.order.fetch(order_id)
+    if order.get('status') == 'paid':
+        return 1
+    if order.get('status') == 'attempted':
+        with gateway_stats.track('order.payments'):
+            payments = client.order.payments(order_id).get('items') or []
+        if any(p.get('status') == 'captured' for p in payments):
+            return 1
+        if payments and all(p.get('status') == 'failed' for p in payments):
+            return 2
+    return None
+
+
+def reconcile_payments(db, client, batch_size: int = 500, concurrency: int = 8, dry_run: bool = False,
+                       on_change: Optional[Callable[[str], None]] = None, progress=None) -> Dict[str, Any]:
+    """Re-check bookings stuck at payment_status 0/2 against the gateway.
+
+    Pending bookings that have a gateway order are paged in ``_id`` order
+    (keyset, served by the payment_status/_id index). Each page's orders are
+    fetched with ``concurrency`` threads and the corrections are written with
+    one ``bulk_write`` per target status. ``fixed_*`` counts only the
+    bookings those writes changed (a booking a webhook settled in the
+    meantime is left alone), and only those are synced into the analytics
+    rollups and passed to ``on_change``. With ``dry_run`` nothing is written
+    and the corrections are counted as ``would_fix_*`` instead.
+    """
+    stats = {'scanned': 0, 'checked': 0, 'fixed_paid': 0, 'fixed_failed': 0,
+             'would_fix_paid': 0, 'would_fix_failed': 0, 'errors': 0}
+    started = time.perf_counter()
+    query: Dict[str, Any] = {'payment_status': {'$in': PENDING_STATUSES}, 'razorpay_order_id': {'$exists': True}}
+    last_id = None
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        while True:
+            page_query = dict(query)
+            if last_id is not None:
+                page_query['_id'] = {'$gt': last_id}
+            page: List[Dict[str, Any]] = list(
+                db.bookings.find(page_query, {'payment_status': 1, 'razorpay_order_id': 1})
+                .sort('_id', 1).limit(batch_size)
+            )
+            if not page:
+                break
+            last_id = page[-1]['_id']
+            stats['scanned'] += len(page)
+
+            def check(booking):
+                try:
+                    return booking, gateway_status(client, booking['razorpay_order_id']), None
+                except Exception as ex:
+                    return booking, None, ex
+
+            # Corrections grouped by the status they set, so each group's modified_count is exact
+            ops: Dict[int, List[UpdateOne]] = {}
+            ids: Dict[int, List[Any]] = {}
+            now = datetime.utcnow()
+            for booking, status, error in pool.map(check, page):
+                if error is not None:
+                    stats['errors'] += 1
+                    continue
+                stats['checked'] += 1
+                if status is None or status == booking.get('payment_status'):
+                    continue
+                # Guard on the status we read so a concurrent webhook/verify is not overwritten
+                ids.setdefault(status, []).append(booking['_id'])
+                ops.setdefault(status, []).append(UpdateOne(
+                    {'_id': booking['_id'], 'payment_status': booking.get('payment_status')},
+                    {'$set': {'payment_status': status, 'updated_at': now}},
+                ))
+            changed = []
+            for status, status_ops in ops.items():
+                kind = 'paid' if status == 1 else 'failed'
+                if dry_run:
+                    stats[f'would_fix_{kind}'] += len(status_ops)
+                    continue
+                stats[f'fixed_{kind}'] += db.bookings.bulk_write(status_ops, ordered=False).modified_count
+                written = db.bookings.find({'_id': {'$in': ids[status]}, 'payment_status': status}, {'_id': 1})
+                changed += [b['_id'] for b in written]
+            if changed:
+                sync_rollups(db, changed)
+                if on_change:
+                    for booking_id in changed:
+                        on_change(str(booking_id))
+            if progress:
+                progress(stats, time.perf_counter() - started)
+    stats['seconds'] = time.perf_counter() - started
+    stats['bookings_per_sec'] = stats['scanned'] / stats['seconds'] if stats['seconds'] else 0.0
+    stats['fixed'] = stats['fixed_paid'] + stats['fixed_failed']
+    stats['would_fix'] = stats['would_fix_paid'] + stats['would_fix_failed']
+    return stats
@@ -1,10 +1,23 @@
-from flask import Blueprint, render_template, request, redirect, url_for, session, flash, current_app
+from flask import Blueprint, render_template, request, redirect, url_for, session, flash, current_app, jsonify
 from bson import ObjectId
 from datetime import datetime
 from functools import wraps
+from pymongo import DESCENDING
+from app.pagination import paginate
+from app.pricing import MAX_QUOTES_PER_REQUEST
+from app.search import SEARCH_FIELDS, SORTS
+from app.availability import SlotUnavailable, availability, booking_window, is_free, month_range, release, reserve
+from app.analytics import STATE_FIELD, booking_state
+from app.mongo import record_deletion, normalize_booking, attach_related, LIST_FIELDS, DETAIL_FIELDS
 
 booking_bp = Blueprint('booking', __name__)
 
+BOOKING_LIST_PROJECTION = {
+    'event_date': 1, 'start_at': 1, 'no_of_guest': 1, 'amount': 1,
+    'accept_status': 1, 'payment_status': 1,
+    'hotel_id': 1, 'catering_id': 1, 'event_id': 1,
+}
+
 def login_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
@@ -19,53 +32,29 @@ def login_required(f):
 def view_bookings():
     """View all bookings for the logged-in user"""
     user_id = session.get('user_id')
-    bookings = list(current_app.mongo_db.bookings.find({'user_id': user_id}).sort('event_date', -1))
-    # Normalize for templates: add id, convert event_date to datetime, attach names
+    page = paginate(current_app.mongo_db.bookings, {'user_id': user_id},
+                    sort=[('event_date', DESCENDING)], projection=BOOKING_LIST_PROJECTION, args=request.args)
+    bookings = page.items
+    # Normalize for templates and attach related names in one query per collection
     for b in bookings:
-        if b.get('_id') is not None:
-            b['id'] = str(b['_id'])
-        # Convert ISO string to datetime for strftime
-        ev = b.get('event_date')
-        if isinstance(ev, str):
-            try:
-                b['event_date'] = datetime.fromisoformat(ev)
-            except Exception:
-                pass
-        # Attach related names for display
-        if b.get('event_id'):
-            evt = current_app.mongo_db.events.find_one({'_id': ObjectId(b['event_id'])})
-            if evt:
-                b['event'] = {'eventname': evt.get('eventname')}
-        if b.get('hotel_id'):
-            ht = current_app.mongo_db.hotels.find_one({'_id': ObjectId(b['hotel_id'])})
-            if ht:
-                b['hotel'] = {'hotel_name': ht.get('hotel_name')}
-        if b.get('catering_id'):
-            ct = current_app.mongo_db.caterings.find_one({'_id': ObjectId(b['catering_id'])})
-            if ct:
-                b['catering'] = {'catername': ct.get('catername')}
-    return render_template('bookings.html', bookings=bookings)
+        normalize_booking(b)
+    attach_related(current_app.mongo_db, bookings, LIST_FIELDS)
+    return render_template('bookings.html', bookings=bookings, page=page)
 
 @booking_bp.route('/new-booking')
 @login_required
 def new_booking_form():
     """Show the new booking form"""
-    hotels = list(current_app.mongo_db.hotels.find())
-    for h in hotels:
-        if h.get('_id') is not None:
-            h['id'] = str(h['_id'])
-    catering_services = list(current_app.mongo_db.caterings.find())
-    for c in catering_services:
-        if c.get('_id') is not None:
-            c['id'] = str(c['_id'])
-    events = list(current_app.mongo_db.events.find())
-    for e in events:
-        if e.get('_id') is not None:
-            e['id'] = str(e['_id'])
+    catalog = current_app.catalog
+    hotels = catalog.all('hotels')
+    catering_services = catalog.all('caterings')
+    events = catalog.all('events')
+    vendors = catalog.all('vendors')
     return render_template('new_booking.html', 
                          hotels=hotels, 
                          catering_services=catering_services, 
-                         events=events)
+                         events=events,
+                         vendors=vendors)
 
 @booking_bp.route('/create-booking', methods=['POST'])
 @login_required
@@ -79,8 +68,6 @@ def create_booking():
         start_at = request.form.get('start_at')
         max_total_hour = request.form.get('max_total_hour')
         no_of_guest = request.form.get('no_of_guest')
-        # Derive amount server-side from selected services to avoid client tampering
-        amount = 0
         
         # Optional services
         photographer_name_desc = request.form.get('photographer_name_desc', '')
@@ -92,27 +79,19 @@ def create_booking():
         hotel_id = request.form.get('hotel_id')
         catering_id = request.form.get('catering_id')
         event_id = request.form.get('event_id')
+        vendor_ids = [v for v in request.form.getlist('vendor_ids') if v]
         
-        # Look up selected services for pricing
+        # Derive amount server-side from selected services to avoid client tampering
+        amount = current_app.pricing.quote(hotel_id, catering_id, vendor_ids)['total']
+
+        # Reserve the hotel slot first so concurrent submissions cannot double-book it
+        booking_oid = ObjectId()
         if hotel_id:
-            hotel = current_app.mongo_db.hotels.find_one({'_id': ObjectId(hotel_id)})
-            if hotel:
-                try:
-                    amount += int(hotel.get('price') or 0)
-                except Exception:
-                    pass
-        if catering_id:
-            catering = current_app.mongo_db.caterings.find_one({'_id': ObjectId(catering_id)})
-            if catering:
-                try:
-                    amount += int(catering.get('cater_price') or 0)
-                except Exception:
-                    pass
-        if amount <= 0:
-            amount = 100
+            start, end = booking_window(start_at, max_total_hour)
+            reserve(current_app.mongo_db, hotel_id, event_date.isoformat(), start, end, str(booking_oid))
 
-        # Insert directly into MongoDB
-        current_app.mongo_db.bookings.insert_one({
+        booking = {
+            '_id': booking_oid,
             'user_id': user_id,
             'event_date': event_date.isoformat() if event_date else None,
             'start_at': start_at,
@@ -129,12 +108,25 @@ def create_booking():
             'hotel_id': hotel_id if hotel_id else None,
             'catering_id': catering_id if catering_id else None,
             'event_id': event_id if event_id else None,
-            'created_at': datetime.utcnow()
-        })
+            'vendor_ids': vendor_ids,
+            'created_at': datetime.utcnow(),
+            'updated_at': datetime.utcnow()
+        }
+        # Counted in the analytics rollups as of insert; see app.analytics
+        booking[STATE_FIELD] = booking_state(booking)
+        try:
+            current_app.mongo_db.bookings.insert_one(booking)
+        except Exception:
+            release(current_app.mongo_db, hotel_id, event_date.isoformat(), str(booking_oid))
+            raise
+        current_app.rollups.record(None, booking[STATE_FIELD])
         
         flash('Booking created successfully!', 'success')
         return redirect(url_for('booking.view_bookings'))
         
+    except SlotUnavailable as e:
+        flash(f'{e} Please choose another date, time or venue.', 'warning')
+        return redirect(url_for('booking.new_booking_form'))
     except Exception as e:
         flash(f'Error creating booking: {str(e)}', 'danger')
         return redirect(url_for('booking.new_booking_form'))
@@ -150,14 +142,8 @@ def view_booking_detail(booking_id):
         flash('Booking not found', 'danger')
         return redirect(url_for('booking.view_bookings'))
     # normalize fields for templates
-    if booking.get('_id') is not None:
-        booking['id'] = str(booking['_id'])
-    ev = booking.get('event_date')
-    if isinstance(ev, str):
-        try:
-            booking['event_date'] = datetime.fromisoformat(ev)
-        except Exception:
-            pass
+    normalize_booking(booking)
+    attach_related(current_app.mongo_db, [booking], DETAIL_FIELDS)
     return render_template('booking_detail.html', booking=booking)
 
 @booking_bp.route('/edit-booking/<booking_id>')
@@ -171,15 +157,19 @@ def edit_booking_form(booking_id):
         flash('Booking not found', 'danger')
         return redirect(url_for('booking.view_bookings'))
     
-    hotels = list(current_app.mongo_db.hotels.find())
-    catering_services = list(current_app.mongo_db.caterings.find())
-    events = list(current_app.mongo_db.events.find())
+    normalize_booking(booking)
+    catalog = current_app.catalog
+    hotels = catalog.all('hotels')
+    catering_services = catalog.all('caterings')
+    events = catalog.all('events')
+    vendors = catalog.all('vendors')
     
     return render_template('edit_booking.html', 
                          booking=booking,
                          hotels=hotels, 
                          catering_services=catering_services, 
-                         events=events)
+                         events=events,
+                         vendors=vendors)
 
 @booking_bp.route('/update-booking/<booking_id>', methods=['POST'])
 @login_required
@@ -195,24 +185,9 @@ def update_booking(booking_id):
         
         hotel_id = request.form.get('hotel_id') or None
         catering_id = request.form.get('catering_id') or None
+        vendor_ids = [v for v in request.form.getlist('vendor_ids') if v]
         # Recompute amount server-side
-        new_amount = 0
-        if hotel_id:
-            hotel = current_app.mongo_db.hotels.find_one({'_id': ObjectId(hotel_id)})
-            if hotel:
-                try:
-                    new_amount += int(hotel.get('price') or 0)
-                except Exception:
-                    pass
-        if catering_id:
-            catering = current_app.mongo_db.caterings.find_one({'_id': ObjectId(catering_id)})
-            if catering:
-                try:
-                    new_amount += int(catering.get('cater_price') or 0)
-                except Exception:
-                    pass
-        if new_amount <= 0:
-            new_amount = 100
+        new_amount = current_app.pricing.quote(hotel_id, catering_id, vendor_ids)['total']
 
         update_doc = {
             'event_date': datetime.strptime(request.form.get('event_date'), '%Y-%m-%d').date().isoformat(),
@@ -226,12 +201,36 @@ def update_booking(booking_id):
             'decorator_name_desc': request.form.get('decorator_name_desc', ''),
             'hotel_id': hotel_id,
             'catering_id': catering_id,
-            'event_id': request.form.get('event_id') or None
+            'event_id': request.form.get('event_id') or None,
+            'vendor_ids': vendor_ids,
+            'updated_at': datetime.utcnow()
         }
-        current_app.mongo_db.bookings.update_one({'_id': ObjectId(booking_id), 'user_id': user_id}, {'$set': update_doc})
+        db = current_app.mongo_db
+        old_hotel, old_date = booking.get('hotel_id'), booking.get('event_date')
+        moved = (old_hotel, old_date) != (hotel_id, update_doc['event_date'])
+        if hotel_id:
+            start, end = booking_window(update_doc['start_at'], update_doc['max_total_hour'])
+            reserve(db, hotel_id, update_doc['event_date'], start, end, booking_id)
+        if moved:
+            release(db, old_hotel, old_date, booking_id)
+        try:
+            db.bookings.update_one({'_id': ObjectId(booking_id), 'user_id': user_id}, {'$set': update_doc})
+        except Exception:
+            # Give the booking its old window back, as create_booking releases its new one
+            if hotel_id and moved:
+                release(db, hotel_id, update_doc['event_date'], booking_id)
+            if old_hotel and old_date and (hotel_id or moved):
+                start, end = booking_window(booking.get('start_at'), booking.get('max_total_hour'))
+                reserve(db, old_hotel, old_date, start, end, booking_id, force=True)
+            raise
+        current_app.rollups.sync([booking_id])
+        current_app.receipt_cache.invalidate(booking_id)
         flash('Booking updated successfully!', 'success')
         return redirect(url_for('booking.view_bookings'))
         
+    except SlotUnavailable as e:
+        flash(f'{e} Please choose another date, time or venue.', 'warning')
+        return redirect(url_for('booking.edit_booking_form', booking_id=booking_id))
     except Exception as e:
         flash(f'Error updating booking: {str(e)}', 'danger')
         return redirect(url_for('booking.edit_booking_form', booking_id=booking_id))
@@ -248,7 +247,13 @@ def delete_booking(booking_id):
             flash('Booking not found', 'danger')
             return redirect(url_for('booking.view_bookings'))
         
-        current_app.mongo_db.bookings.delete_one({'_id': ObjectId(booking_id), 'user_id': user_id})
+        deleted = current_app.mongo_db.bookings.find_one_and_delete(
+            {'_id': ObjectId(booking_id), 'user_id': user_id}, projection={STATE_FIELD: 1})
+        if deleted:
+            current_app.rollups.record(deleted.get(STATE_FIELD), None)
+        record_deletion(current_app.mongo_db, 'bookings', booking_id)
+        release(current_app.mongo_db, booking.get('hotel_id'), booking.get('event_date'), booking_id)
+        current_app.receipt_cache.invalidate(booking_id)
         flash('Booking deleted successfully!', 'success')
         return redirect(url_for('booking.view_bookings'))
         
@@ -267,12 +272,88 @@ def booking_status(booking_id):
         flash('Booking not found', 'danger')
         return redirect(url_for('booking.view_bookings'))
     # normalize for template
-    if booking.get('_id') is not None:
-        booking['id'] = str(booking['_id'])
-    ev = booking.get('event_date')
-    if isinstance(ev, str):
-        try:
-            booking['event_date'] = datetime.fromisoformat(ev)
-        except Exception:
-            pass
-    return render_template('booking_status.html', booking=booking)
\ No newline at end of file
+    normalize_booking(booking)
+    attach_related(current_app.mongo_db, [booking], DETAIL_FIELDS)
+    return render_template('booking_status.html', booking=booking)
+
+
+@booking_bp.route('/api/hotels/<hotel_id>/slot')
+@login_required
+def hotel_slot_check(hotel_id):
+    """Is the hotel free on ?date=YYYY-MM-DD for ?start_at=HH:MM and ?max_total_hour=N"""
+    try:
+        event_date = datetime.strptime(request.args.get('date', ''), '%Y-%m-%d').date().isoformat()
+    except ValueError:
+        return jsonify({'error': 'date must be YYYY-MM-DD'}), 400
+    start, end = booking_window(request.args.get('start_at'), request.args.get('max_total_hour'))
+    free = is_free(current_app.mongo_db, hotel_id, event_date, start, end,
+                   exclude_booking=request.args.get('booking_id'))
+    return jsonify({'hotel_id': hotel_id, 'date': event_date, 'start': start, 'end': end, 'free': free})
+
+
+@booking_bp.route('/api/hotels/<hotel_id>/availability')
+@login_required
+def hotel_availability(hotel_id):
+    """Free/partial/full dates for ?month=YYYY-MM over ?months=N (max 12) months"""
+    try:
+        months = max(1, min(int(request.args.get('months', 1)), 12))
+        first, last = month_range(request.args.get('month') or datetime.now().strftime('%Y-%m'), months)
+    except ValueError:
+        return jsonify({'error': 'month must be YYYY-MM'}), 400
+    return jsonify(availability(current_app.mongo_db, hotel_id, first, last))
+
+
+
+@booking_bp.route('/api/quote', methods=['GET', 'POST'])
+@login_required
+def quote():
+    """Price one selection (query args) or many (JSON body ``{"selections": [...]}``)"""
+    if request.method == 'GET':
+        return jsonify(current_app.pricing.quote(
+            request.args.get('hotel_id'),
+            request.args.get('catering_id'),
+            request.args.getlist('vendor_ids'),
+        ))
+    payload = request.get_json(silent=True) or {}
+    selections = payload.get('selections')
+    if not isinstance(selections, list):
+        return jsonify({'error': 'selections must be a list of objects'}), 400
+    if len(selections) > MAX_QUOTES_PER_REQUEST:
+        return jsonify({'error': f'at most {MAX_QUOTES_PER_REQUEST} selections per request'}), 400
+    try:
+        quotes = current_app.pricing.quote_many(selections)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'quotes': quotes})
+
+
+def search_params(args):
+    """Validated keyword arguments for ``CatalogSearch.search`` from query args; raises ValueError."""
+    kinds = [k for k in (args.get('type') or 'all').split(',') if k]
+    if kinds == ['all']:
+        kinds = list(SEARCH_FIELDS)
+    if not kinds or any(k not in SEARCH_FIELDS for k in kinds):
+        raise ValueError(f"type must be all or a comma-separated list of {', '.join(SEARCH_FIELDS)}")
+    sort = args.get('sort') or 'relevance'
+    if sort not in SORTS:
+        raise ValueError(f"sort must be one of {', '.join(SORTS)}")
+    try:
+        min_price = int(args['min_price']) if args.get('min_price') else None
+        max_price = int(args['max_price']) if args.get('max_price') else None
+        page = int(args.get('page', 1))
+        per_page = int(args.get('per_page', 20))
+    except ValueError:
+        raise ValueError('min_price, max_price, page and per_page must be integers') from None
+    return {'collections': kinds, 'q': args.get('q', ''), 'location': args.get('location', ''),
+            'min_price': min_price, 'max_price': max_price, 'sort': sort, 'page': page, 'per_page': per_page}
+
+
+@booking_bp.route('/api/search')
+@login_required
+def search_catalog():
+    """Venues, caterers and vendors matching ?q=, ?location=, ?min_price=/?max_price=, ranked and paginated"""
+    try:
+        params = search_params(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(current_app.search.search(**params))
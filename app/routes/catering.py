@@ -1,16 +1,13 @@
 from flask import Blueprint, render_template, request, redirect, url_for, session, flash, current_app
 from bson import ObjectId
 from functools import wraps
-import os
-from werkzeug.utils import secure_filename
+from app.mongo import to_str_id, record_deletion
+from datetime import datetime
+from app.pagination import paginate
 
 catering_bp = Blueprint('catering', __name__)
 
-UPLOAD_FOLDER = 'app/static/images/catering/'
-ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
-
-def allowed_file(filename):
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+CATERING_LIST_PROJECTION = {'catername': 1, 'cater_desc': 1, 'cater_location': 1, 'cater_price': 1, 'cater_img': 1}
 
 def admin_required(f):
     @wraps(f)
@@ -23,12 +20,10 @@ def admin_required(f):
 
 @catering_bp.route('/catering')
 def list_catering():
-    catering = list(current_app.mongo_db.caterings.find())
-    for c in catering:
-        if c.get('_id') is not None:
-            c['id'] = str(c['_id'])
+    page = paginate(current_app.mongo_db.caterings, projection=CATERING_LIST_PROJECTION, args=request.args)
+    catering = [to_str_id(c) for c in page]
     is_admin = session.get('user_role') in ['Admin', 'SuperAdmin']
-    return render_template('catering.html', catering=catering, is_admin=is_admin)
+    return render_template('catering.html', catering=catering, is_admin=is_admin, page=page)
 
 @catering_bp.route('/catering/add', methods=['GET', 'POST'])
 @admin_required
@@ -38,21 +33,16 @@ def add_catering():
         desc = request.form.get('cater_desc')
         location = request.form.get('cater_location')
         price = request.form.get('cater_price')
-        img_path = ''
-        if 'cater_img' in request.files:
-            file = request.files['cater_img']
-            if file and allowed_file(file.filename):
-                filename = secure_filename(file.filename)
-                save_path = os.path.join(UPLOAD_FOLDER, filename)
-                file.save(save_path)
-                img_path = f'images/catering/{filename}'
+        img_path = current_app.images.save(request.files.get('cater_img')) or ''
         current_app.mongo_db.caterings.insert_one({
             'catername': name,
             'cater_desc': desc,
             'cater_location': location,
             'cater_price': price,
-            'cater_img': img_path
+            'cater_img': img_path,
+            'updated_at': datetime.utcnow()
         })
+        current_app.catalog.invalidate('caterings')
         flash('Buffet added successfully!', 'success')
         return redirect(url_for('catering.list_catering'))
     return render_template('add_catering.html')
@@ -68,14 +58,12 @@ def edit_catering(catering_id):
             'cater_location': request.form.get('cater_location'),
             'cater_price': request.form.get('cater_price')
         }
-        if 'cater_img' in request.files:
-            file = request.files['cater_img']
-            if file and allowed_file(file.filename):
-                filename = secure_filename(file.filename)
-                save_path = os.path.join(UPLOAD_FOLDER, filename)
-                file.save(save_path)
-                update_doc['cater_img'] = f'images/catering/{filename}'
+        img_path = current_app.images.save(request.files.get('cater_img'))
+        if img_path:
+            update_doc['cater_img'] = img_path
+        update_doc['updated_at'] = datetime.utcnow()
         current_app.mongo_db.caterings.update_one({'_id': ObjectId(catering_id)}, {'$set': update_doc})
+        current_app.catalog.invalidate('caterings')
         flash('Buffet updated successfully!', 'success')
         return redirect(url_for('catering.list_catering'))
     return render_template('edit_catering.html', catering=catering)
@@ -84,5 +72,7 @@ def edit_catering(catering_id):
 @admin_required
 def delete_catering(catering_id):
     current_app.mongo_db.caterings.delete_one({'_id': ObjectId(catering_id)})
+    record_deletion(current_app.mongo_db, 'caterings', catering_id)
+    current_app.catalog.invalidate('caterings')
     flash('Buffet deleted successfully!', 'success')
     return redirect(url_for('catering.list_catering'))
\ No newline at end of file
@@ -1,14 +1,11 @@
 from flask import Blueprint, render_template, request, redirect, url_for, session, flash, current_app
 from bson import ObjectId
 from functools import wraps
-import os
-from werkzeug.utils import secure_filename
+from app.mongo import to_str_id, record_deletion
+from datetime import datetime
+from app.pagination import paginate
 
-UPLOAD_FOLDER = 'app/static/images/hotels/'
-ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
-
-def allowed_file(filename):
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+HOTEL_LIST_PROJECTION = {'hotel_name': 1, 'hotel_desc': 1, 'hotel_img1': 1, 'price': 1, 'location': 1}
 
 hotel_bp = Blueprint('hotel', __name__)
 
@@ -24,11 +21,9 @@ def admin_required(f):
 @hotel_bp.route('/hotels')
 @admin_required
 def list_hotels():
-    hotels = list(current_app.mongo_db.hotels.find())
-    for h in hotels:
-        if h.get('_id') is not None:
-            h['id'] = str(h['_id'])
-    return render_template('hotels.html', hotels=hotels)
+    page = paginate(current_app.mongo_db.hotels, projection=HOTEL_LIST_PROJECTION, args=request.args)
+    hotels = [to_str_id(h) for h in page]
+    return render_template('hotels.html', hotels=hotels, page=page)
 
 @hotel_bp.route('/hotels/add', methods=['GET', 'POST'])
 @admin_required
@@ -38,21 +33,16 @@ def add_hotel():
         desc = request.form.get('hotel_desc')
         price = request.form.get('price')
         location = request.form.get('location')
-        img_path = ''
-        if 'hotel_img1' in request.files:
-            file = request.files['hotel_img1']
-            if file and allowed_file(file.filename):
-                filename = secure_filename(file.filename)
-                save_path = os.path.join(UPLOAD_FOLDER, filename)
-                file.save(save_path)
-                img_path = f'images/hotels/{filename}'
+        img_path = current_app.images.save(request.files.get('hotel_img1')) or ''
         current_app.mongo_db.hotels.insert_one({
             'hotel_name': name,
             'hotel_desc': desc,
             'hotel_img1': img_path,
             'price': price,
-            'location': location
+            'location': location,
+            'updated_at': datetime.utcnow()
         })
+        current_app.catalog.invalidate('hotels')
         flash('Hotel added successfully!', 'success')
         return redirect(url_for('hotel.list_hotels'))
     return render_template('add_hotel.html')
@@ -68,14 +58,12 @@ def edit_hotel(hotel_id):
             'price': request.form.get('price'),
             'location': request.form.get('location')
         }
-        if 'hotel_img1' in request.files:
-            file = request.files['hotel_img1']
-            if file and allowed_file(file.filename):
-                filename = secure_filename(file.filename)
-                save_path = os.path.join(UPLOAD_FOLDER, filename)
-                file.save(save_path)
-                update_doc['hotel_img1'] = f'images/hotels/{filename}'
+        img_path = current_app.images.save(request.files.get('hotel_img1'))
+        if img_path:
+            update_doc['hotel_img1'] = img_path
+        update_doc['updated_at'] = datetime.utcnow()
         current_app.mongo_db.hotels.update_one({'_id': ObjectId(hotel_id)}, {'$set': update_doc})
+        current_app.catalog.invalidate('hotels')
         flash('Hotel updated successfully!', 'success')
         return redirect(url_for('hotel.list_hotels'))
     return render_template('edit_hotel.html', hotel=hotel)
@@ -84,5 +72,7 @@ def edit_hotel(hotel_id):
 @admin_required
 def delete_hotel(hotel_id):
     current_app.mongo_db.hotels.delete_one({'_id': ObjectId(hotel_id)})
+    record_deletion(current_app.mongo_db, 'hotels', hotel_id)
+    current_app.catalog.invalidate('hotels')
     flash('Hotel deleted successfully!', 'success')
     return redirect(url_for('hotel.list_hotels'))
\ No newline at end of file
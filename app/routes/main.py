@@ -1,8 +1,16 @@
-from flask import Blueprint, render_template, session, redirect, url_for, flash, request, current_app
-from functools import wraps
+from flask import Blueprint, render_template, session, redirect, url_for, flash, request, current_app, Response, stream_with_context, jsonify
+from functools import lru_cache, wraps
 import os
-import json
 from app.routes import hotel
+from app.availability import rebuild_slots
+from app.analytics import ALL_MONTHS, DIMENSIONS, TOTAL, recent_months, series, top
+from app.catalog import CATALOG_COLLECTIONS
+from app.mongo import BOOKING_REFS, LIST_FIELDS
+from app.dataio import COMPRESSIONS, export_all, export_delta, stream_export, import_archive, import_dir, open_reader
+from datetime import datetime
+import hmac
+import ipaddress
+import time
 
 main = Blueprint('main', __name__)
 
@@ -41,61 +49,197 @@ def admin_required(f):
     return decorated
 
 
+@main.route('/healthz')
+def healthz():
+    """Liveness: the process is up and serving requests (never touches Mongo)."""
+    return jsonify({'status': 'ok', 'pid': os.getpid(), 'uptime_seconds': round(time.time() - current_app.started_at, 1)})
+
+
+@main.route('/readyz')
+def readyz():
+    """Readiness: Mongo answers a ping within the server selection timeout."""
+    started = time.perf_counter()
+    try:
+        current_app.mongo_client.admin.command('ping')
+        mongo = {'ok': True}
+    except Exception as ex:
+        mongo = {'ok': False, 'error': str(ex)}
+    mongo['ms'] = round((time.perf_counter() - started) * 1000, 1)
+    body = {'status': 'ready' if mongo['ok'] else 'unavailable', 'mongo': mongo, 'schema': current_app.schema_status}
+    return jsonify(body), 200 if mongo['ok'] else 503
+
+
+@lru_cache(maxsize=8)
+def _networks(allow: str):
+    return tuple(ipaddress.ip_network(part.strip(), strict=False) for part in allow.split(',') if part.strip())
+
+
+def _metrics_allowed() -> bool:
+    """METRICS_TOKEN requires a bearer token; otherwise only METRICS_ALLOW addresses, unless METRICS_PUBLIC=1."""
+    token = os.getenv('METRICS_TOKEN')
+    if token:
+        return hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}')
+    if os.getenv('METRICS_PUBLIC') == '1':
+        return True
+    try:
+        addr = ipaddress.ip_address(request.remote_addr or '')
+    except ValueError:
+        return False
+    return any(addr in net for net in _networks(os.getenv('METRICS_ALLOW', '127.0.0.1/32,::1/128')))
+
+
+@main.route('/metrics')
+def metrics():
+    """Prometheus scrape endpoint (per worker process); see _metrics_allowed for who may read it."""
+    if not _metrics_allowed():
+        return Response('Unauthorized\n', status=401, mimetype='text/plain')
+    return Response(current_app.metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
+@main.route('/admin/slow-queries')
+@admin_required
+def admin_slow_queries():
+    """Recent slow Mongo commands of this worker process, newest first."""
+    log = current_app.slow_queries
+    entries = log.recent()
+    if request.args.get('format') == 'json':
+        return jsonify({
+            'stats': log.stats(),
+            'entries': [dict(e, at=e['at'].isoformat()) for e in entries],
+        })
+    return render_template('slow_queries.html', entries=entries, stats=log.stats())
+
+
+@main.route('/admin/slow-queries/clear', methods=['POST'])
+@admin_required
+def admin_clear_slow_queries():
+    current_app.slow_queries.clear()
+    flash('Slow query log cleared.', 'success')
+    return redirect(url_for('main.admin_slow_queries'))
+
+
+def _analytics_months():
+    """``?until=YYYY-MM`` (default: this month) and ``?months=N`` (max 36) -> list of months."""
+    until = request.args.get('until') or datetime.now().strftime('%Y-%m')
+    datetime.strptime(until, '%Y-%m')
+    return recent_months(until, max(1, min(int(request.args.get('months', 12)), 36)))
+
+
+@main.route('/admin/analytics')
+@admin_required
+def admin_analytics():
+    """Revenue and booking counts read from the rollups in a fixed number of queries.
+
+    ``?month=YYYY-MM`` (default all time) selects the period for the top
+    venues, caterers and event types; the trend covers ``?months`` months.
+    """
+    month = request.args.get('month') or ALL_MONTHS
+    try:
+        months = _analytics_months()
+        if month != ALL_MONTHS:
+            datetime.strptime(month, '%Y-%m')
+        limit = max(1, min(int(request.args.get('limit', 10)), 100))
+    except ValueError:
+        return jsonify({'error': 'month/until must be YYYY-MM; months and limit must be integers'}), 400
+    db = current_app.mongo_db
+    trend = series(db, TOTAL, '', months)
+    if month == ALL_MONTHS:
+        selected = trend['all_time']
+    elif month in months:
+        selected = trend['months'][months.index(month)]
+    else:
+        selected = series(db, TOTAL, '', [month])['months'][0]
+    leaders = {}
+    for dim in DIMENSIONS:
+        rows = top(db, dim, month, limit)
+        collection = BOOKING_REFS[dim][1]
+        for row in rows:
+            doc = current_app.catalog.get(collection, row['key']) or {}
+            row['name'] = doc.get(LIST_FIELDS[dim][0]) or row['key']
+        leaders[dim] = rows
+    body = {'month': month, 'selected': selected, 'all_time': trend['all_time'], 'trend': trend['months'], 'top': leaders}
+    if request.args.get('format') == 'json':
+        return jsonify(body)
+    return render_template('analytics.html', **body)
+
+
+@main.route('/admin/analytics/<dim>/<key>')
+@admin_required
+def admin_analytics_series(dim, key):
+    """Monthly rollups of one venue, caterer or event type (``dim`` hotel/catering/event)."""
+    if dim not in DIMENSIONS:
+        return jsonify({'error': f"dim must be one of {', '.join(DIMENSIONS)}"}), 404
+    try:
+        months = _analytics_months()
+    except ValueError:
+        return jsonify({'error': 'until must be YYYY-MM and months an integer'}), 400
+    return jsonify(series(current_app.mongo_db, dim, key, months))
+
+
 @main.route('/admin/export-json', methods=['POST'])
 @admin_required
 def admin_export_json():
-    db = current_app.mongo_db
     data_dir = os.path.join(current_app.root_path, '..', 'data')
     data_dir = os.path.abspath(data_dir)
-    os.makedirs(data_dir, exist_ok=True)
-    collections = ['users', 'events', 'hotels', 'caterings', 'vendors', 'bookings']
-    def default(o):
-        try:
-            from bson import ObjectId
-            if isinstance(o, ObjectId):
-                return str(o)
-        except Exception:
-            pass
-        # Serialize datetime/date to ISO strings
-        import datetime as _dt
-        if isinstance(o, (_dt.datetime, _dt.date)):
-            return o.isoformat()
-        raise TypeError
-    for name in collections:
-        docs = list(db[name].find())
-        out_path = os.path.join(data_dir, f'{name}.json')
-        with open(out_path, 'w', encoding='utf-8') as f:
-            json.dump(docs, f, ensure_ascii=False, indent=2, default=default)
-    flash('Exported collections to data/ folder.', 'success')
+    fmt = request.form.get('format', 'json')
+    compression = request.form.get('compression') or None
+    if fmt not in ('json', 'ndjson') or compression not in COMPRESSIONS:
+        flash('Unsupported export format.', 'danger')
+        return redirect(url_for('main.adminhome'))
+    results = export_all(current_app.mongo_db, data_dir, fmt=fmt, compression=compression)
+    total = sum(r['count'] for r in results)
+    flash(f'Exported {total} documents from {len(results)} collections to data/ folder.', 'success')
+    return redirect(url_for('main.adminhome'))
+
+
+@main.route('/admin/export-delta', methods=['POST'])
+@admin_required
+def admin_export_delta():
+    """Write only documents changed (and tombstones for deletes) since the last export."""
+    data_dir = os.path.abspath(os.path.join(current_app.root_path, '..', 'data'))
+    result = export_delta(current_app.mongo_db, data_dir)
+    total = sum(result['counts'].values())
+    flash(f"Exported {total} changed records to data/deltas/{os.path.basename(result['path'])}.", 'success')
     return redirect(url_for('main.adminhome'))
 
 
+@main.route('/admin/export-download')
+@admin_required
+def admin_export_download():
+    """Stream every collection to the browser as one (gzip) NDJSON file."""
+    compression = None if request.args.get('compression') == 'none' else 'gzip'
+    stamp = datetime.utcnow().strftime('%Y%m%d-%H%M%S')
+    filename = f"event_management-{stamp}.ndjson{'.gz' if compression else ''}"
+    return Response(
+        stream_with_context(stream_export(current_app.mongo_db, compression=compression)),
+        mimetype='application/gzip' if compression else 'application/x-ndjson',
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'},
+    )
+
+
 @main.route('/admin/import-json', methods=['POST'])
 @admin_required
 def admin_import_json():
     db = current_app.mongo_db
-    data_dir = os.path.join(current_app.root_path, '..', 'data')
-    data_dir = os.path.abspath(data_dir)
-    collections = ['users', 'events', 'hotels', 'caterings', 'vendors', 'bookings']
-    from bson import ObjectId
-    for name in collections:
-        path = os.path.join(data_dir, f'{name}.json')
-        if not os.path.isfile(path):
-            continue
-        with open(path, 'r', encoding='utf-8') as f:
-            try:
-                docs = json.load(f)
-            except Exception:
-                docs = []
-        # try to coerce _id back to ObjectId if string
-        for d in docs:
-            if isinstance(d, dict) and '_id' in d and isinstance(d['_id'], str):
-                try:
-                    d['_id'] = ObjectId(d['_id'])
-                except Exception:
-                    pass
-        if docs:
-            db[name].delete_many({})
-            db[name].insert_many(docs)
-    flash('Imported data from data/ folder into MongoDB.', 'success')
-    return redirect(url_for('main.adminhome'))
\ No newline at end of file
+    upload = request.files.get('archive')
+    if upload and upload.filename:
+        # An archive downloaded from /admin/export-download
+        results = import_archive(db, open_reader(upload.stream, upload.filename))
+    else:
+        data_dir = os.path.join(current_app.root_path, '..', 'data')
+        data_dir = os.path.abspath(data_dir)
+        results = import_dir(db, data_dir)
+    for name in CATALOG_COLLECTIONS:
+        current_app.catalog.invalidate(name)
+    swapped = [r for r in results if r['swapped']]
+    if any(r['collection'] == 'bookings' for r in swapped):
+        # Slots and rollups describe the bookings that were just replaced
+        rebuild_slots(db)
+        current_app.rollups.rebuild()
+    failed = [r['collection'] for r in results if r['count'] and not r['swapped']]
+    total = sum(r['count'] for r in swapped)
+    seconds = sum(r['seconds'] for r in results)
+    flash(f'Imported {total} documents into {len(swapped)} collections in {seconds:.1f}s.', 'success')
+    if failed:
+        flash(f"Kept existing data for {', '.join(failed)}: index build failed on the imported copy.", 'warning')
+    return redirect(url_for('main.adminhome'))
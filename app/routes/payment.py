@@ -1,13 +1,11 @@
 from flask import Blueprint, jsonify, request, session, redirect, url_for, flash, current_app
 from functools import wraps
 from bson import ObjectId
+from datetime import datetime
+from app.gateway import gateway_key_id, gateway_stats, get_client
+from app.webhooks import parse_event, verify_webhook_signature
 import os
 
-try:
-    import razorpay
-except Exception:  # pragma: no cover
-    razorpay = None
-
 
 payment_bp = Blueprint('payment', __name__)
 
@@ -23,13 +21,8 @@ def login_required(f):
 
 
 def get_razorpay_client():
-    key_id = os.getenv('RAZORPAY_KEY_ID')
-    key_secret = os.getenv('RAZORPAY_KEY_SECRET')
-    if not key_id or not key_secret:
-        raise RuntimeError('Razorpay keys are not configured. Set RAZORPAY_KEY_ID and RAZORPAY_KEY_SECRET environment variables.')
-    if razorpay is None:
-        raise RuntimeError('razorpay package is not installed. Add "razorpay" to requirements and install dependencies.')
-    return razorpay.Client(auth=(key_id, key_secret))
+    # One pooled client per worker process (or the local fake with PAYMENT_GATEWAY=fake)
+    return get_client()
 
 
 @payment_bp.route('/payment/create-order/<booking_id>', methods=['POST'])
@@ -45,24 +38,31 @@ def create_order(booking_id: str):
     amount_paise = int(booking.get('amount', 0)) * 100
     client = get_razorpay_client()
 
-    order = client.order.create(
-        data={
-            'amount': amount_paise,
-            'currency': 'INR',
-            'receipt': f"booking_{booking_id}",
-            'payment_capture': 1,
-            'notes': {
-                'booking_id': booking_id,
-                'user_id': str(user_id),
-            },
-        }
+    with gateway_stats.track('order.create'):
+        order = client.order.create(
+            data={
+                'amount': amount_paise,
+                'currency': 'INR',
+                'receipt': f"booking_{booking_id}",
+                'payment_capture': 1,
+                'notes': {
+                    'booking_id': booking_id,
+                    'user_id': str(user_id),
+                },
+            }
+        )
+
+    # Remember the order so pending payments can be reconciled against the gateway later
+    current_app.mongo_db.bookings.update_one(
+        {'_id': ObjectId(booking_id)},
+        {'$set': {'razorpay_order_id': order.get('id'), 'updated_at': datetime.utcnow()}},
     )
 
     return jsonify({
         'order_id': order.get('id'),
         'amount': amount_paise,
         'currency': 'INR',
-        'key_id': os.getenv('RAZORPAY_KEY_ID'),
+        'key_id': gateway_key_id(),
         'booking_id': booking_id,
         'user': {
             'name': f"{(booking.get('first_name') or '')} {(booking.get('last_name') or '')}".strip(),
@@ -88,11 +88,14 @@ def verify_payment():
         return redirect(url_for('booking.booking_status', booking_id=booking_id or '0'))
 
     try:
-        client.utility.verify_payment_signature(payload)
+        with gateway_stats.track('verify_signature'):
+            client.utility.verify_payment_signature(payload)
     except Exception as ex:  # signature mismatch or error
         booking = current_app.mongo_db.bookings.find_one({'_id': ObjectId(booking_id), 'user_id': session.get('user_id')})
         if booking:
-            current_app.mongo_db.bookings.update_one({'_id': ObjectId(booking_id)}, {'$set': {'payment_status': 2}})
+            current_app.mongo_db.bookings.update_one({'_id': ObjectId(booking_id)}, {'$set': {'payment_status': 2, 'updated_at': datetime.utcnow()}})
+            current_app.rollups.sync([booking_id])
+            current_app.receipt_cache.invalidate(booking_id)
         flash('Payment verification failed. Please try again.', 'danger')
         return redirect(url_for('booking.booking_status', booking_id=booking_id))
 
@@ -101,9 +104,25 @@ def verify_payment():
         flash('Booking not found after payment.', 'danger')
         return redirect(url_for('booking.view_bookings'))
 
-    current_app.mongo_db.bookings.update_one({'_id': ObjectId(booking_id)}, {'$set': {'payment_status': 1}})
+    current_app.mongo_db.bookings.update_one({'_id': ObjectId(booking_id)}, {'$set': {'payment_status': 1, 'updated_at': datetime.utcnow()}})
+    current_app.rollups.sync([booking_id])
+    current_app.receipt_cache.invalidate(booking_id)
 
     flash('Payment successful! Your booking is confirmed.', 'success')
     return redirect(url_for('booking.booking_status', booking_id=booking_id))
 
 
+@payment_bp.route('/payment/webhook', methods=['POST'])
+def payment_webhook():
+    """Razorpay webhook receiver: verify, store once per payment/event, apply asynchronously."""
+    secret = os.getenv('RAZORPAY_WEBHOOK_SECRET')
+    if not secret:
+        return jsonify({'error': 'Webhook secret is not configured'}), 503
+    body = request.get_data()
+    if not verify_webhook_signature(body, request.headers.get('X-Razorpay-Signature'), secret):
+        return jsonify({'error': 'Invalid signature'}), 400
+    event = parse_event(request.get_json(silent=True) or {})
+    if event is None:
+        return jsonify({'status': 'ignored'})
+    queued = current_app.payment_events.enqueue(event)
+    return jsonify({'status': 'queued' if queued else 'duplicate'})
@@ -1,8 +1,7 @@
-from flask import Blueprint, render_template, session, redirect, url_for, flash, Response, current_app
+from flask import Blueprint, render_template, session, redirect, url_for, flash, Response, current_app, request, jsonify
 from functools import wraps
 from bson import ObjectId
-from io import BytesIO
-from xhtml2pdf import pisa
+from app.mongo import normalize_booking, attach_related, DETAIL_FIELDS
 import datetime
 import os
 
@@ -20,24 +19,35 @@ def login_required(f):
     return decorated_function
 
 
+def _load_booking(booking_id: str):
+    if not ObjectId.is_valid(booking_id):
+        return None
+    user_id = session.get('user_id')
+    return current_app.mongo_db.bookings.find_one({'_id': ObjectId(booking_id), 'user_id': user_id})
+
+
+def _pdf_response(booking_id: str, is_proforma: bool, pdf_bytes: bytes) -> Response:
+    filename = f"{'Proforma-' if is_proforma else ''}Receipt-Booking-{booking_id}.pdf"
+    return Response(
+        pdf_bytes,
+        mimetype='application/pdf',
+        headers={
+            'Content-Disposition': f'attachment; filename="{filename}"'
+        }
+    )
+
+
 @receipt.route('/receipt/download/<booking_id>')
 @login_required
 def download_receipt(booking_id: str):
-    user_id = session.get('user_id')
-    booking = current_app.mongo_db.bookings.find_one({'_id': ObjectId(booking_id), 'user_id': user_id})
+    booking = _load_booking(booking_id)
     if not booking:
         flash('Booking not found', 'danger')
         return redirect(url_for('booking.view_bookings'))
 
     # Normalize fields used in template
-    if booking.get('_id') is not None:
-        booking['id'] = str(booking['_id'])
-    ev = booking.get('event_date')
-    if isinstance(ev, str):
-        try:
-            booking['event_date'] = datetime.datetime.fromisoformat(ev)
-        except Exception:
-            pass
+    normalize_booking(booking)
+    attach_related(current_app.mongo_db, [booking], DETAIL_FIELDS)
     # Attach user info if available in session
     booking['user_first_name'] = session.get('user_firstname')
     booking['user_last_name'] = session.get('user_lastname')
@@ -47,19 +57,46 @@ def download_receipt(booking_id: str):
     is_proforma = booking.get('payment_status') != 1
     today_str = datetime.datetime.now().strftime('%Y-%m-%d')
 
+    cache = current_app.receipt_cache
+    cache_key = cache.key(booking_id, {'booking': booking, 'is_proforma': is_proforma, 'generated_on': today_str})
+    pdf_bytes = cache.get(cache_key)
+    if pdf_bytes is not None:
+        return _pdf_response(booking_id, is_proforma, pdf_bytes)
+
     html = render_template('receipt.html', booking=booking, is_proforma=is_proforma, generated_on=today_str)
+    renderer = current_app.pdf_renderer
+    # Render inline only when pooling is off or the document is under RECEIPT_SYNC_MAX_HTML
+    if not renderer.enabled or len(html) <= current_app.config['RECEIPT_SYNC_MAX_HTML']:
+        return _pdf_response(booking_id, is_proforma, renderer.render_now(cache_key, html))
+    if not renderer.submit(cache_key, html):
+        # Pool saturated: ask the client to come back rather than tie up this request thread with a render
+        return render_template('receipt_pending.html', booking_id=booking_id, busy=True,
+                               refresh_url=url_for('receipt.download_receipt', booking_id=booking_id)), \
+            503, {'Retry-After': '2'}
+    return redirect(url_for('receipt.receipt_job', job_id=cache_key))
 
-    pdf_io = BytesIO()
-    pisa.CreatePDF(src=html, dest=pdf_io)
-    pdf_io.seek(0)
-
-    filename = f"{'Proforma-' if is_proforma else ''}Receipt-Booking-{booking_id}.pdf"
-    return Response(
-        pdf_io.read(),
-        mimetype='application/pdf',
-        headers={
-            'Content-Disposition': f'attachment; filename="{filename}"'
-        }
-    )
 
+@receipt.route('/receipt/job/<job_id>')
+@login_required
+def receipt_job(job_id: str):
+    """Poll a queued receipt render; returns the PDF once it is ready."""
+    booking_id = job_id.split('-', 1)[0]
+    booking = _load_booking(booking_id)
+    if not booking:
+        flash('Booking not found', 'danger')
+        return redirect(url_for('booking.view_bookings'))
 
+    pdf_bytes = current_app.receipt_cache.get(job_id)
+    status = 'ready' if pdf_bytes is not None else current_app.pdf_renderer.status(job_id)
+    if request.args.get('format') == 'json':
+        return jsonify({'job_id': job_id, 'booking_id': booking_id, 'status': status})
+    if pdf_bytes is not None:
+        return _pdf_response(booking_id, booking.get('payment_status') != 1, pdf_bytes)
+    if status == 'failed':
+        flash('Could not generate the receipt. Please try again.', 'danger')
+        return redirect(url_for('booking.booking_status', booking_id=booking_id))
+    if status == 'unknown':
+        # No job here or in the shared markers: it expired, its worker died, or the booking changed; start over
+        return redirect(url_for('receipt.download_receipt', booking_id=booking_id))
+    return render_template('receipt_pending.html', booking_id=booking_id,
+                           refresh_url=url_for('receipt.receipt_job', job_id=job_id)), 202, {'Retry-After': '1'}
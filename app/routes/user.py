@@ -2,9 +2,13 @@ from flask import Blueprint, render_template, request, redirect, url_for, sessio
 from bson import ObjectId
 from datetime import datetime
 from functools import wraps
+from app.mongo import to_str_id
+from app.pagination import paginate
 
 user_bp = Blueprint('user', __name__)
 
+USER_LIST_PROJECTION = {'email': 1, 'first_name': 1, 'last_name': 1, 'role': 1}
+
 def admin_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
@@ -41,7 +45,8 @@ def user_register():
         'contactno': contactno,
         'role': role,
         'gender': gender,
-        'address': address
+        'address': address,
+        'updated_at': datetime.utcnow()
     }
     res = current_app.mongo_db.users.insert_one(doc)
     # Stub: send SMS/email here
@@ -105,6 +110,7 @@ def update_user_profile():
         update_doc['password'] = request.form.get('password')
     if request.form.get('confirm_password'):
         update_doc['confirm_password'] = request.form.get('confirm_password')
+    update_doc['updated_at'] = datetime.utcnow()
     current_app.mongo_db.users.update_one({'_id': ObjectId(user_id)}, {'$set': update_doc})
     # Update session
     session['user_firstname'] = update_doc.get('first_name')
@@ -119,18 +125,16 @@ def update_user_profile():
 @user_bp.route('/users')
 @admin_required
 def list_users():
-    users = list(current_app.mongo_db.users.find())
-    for u in users:
-        if u.get('_id') is not None:
-            u['id'] = str(u['_id'])
-    return render_template('users.html', users=users)
+    page = paginate(current_app.mongo_db.users, projection=USER_LIST_PROJECTION, args=request.args)
+    users = [to_str_id(u) for u in page]
+    return render_template('users.html', users=users, page=page)
 
 @user_bp.route('/users/change-role/<user_id>', methods=['POST'])
 @admin_required
 def change_role(user_id):
     new_role = request.form.get('role')
     if new_role in ['Admin', 'User', 'SuperAdmin', 'SubAdmin']:
-        current_app.mongo_db.users.update_one({'_id': ObjectId(user_id)}, {'$set': {'role': new_role}})
+        current_app.mongo_db.users.update_one({'_id': ObjectId(user_id)}, {'$set': {'role': new_role, 'updated_at': datetime.utcnow()}})
         flash(f"Role updated to {new_role}", 'success')
     else:
         flash('Invalid role selected.', 'danger')
@@ -1,16 +1,13 @@
 from flask import Blueprint, render_template, request, redirect, url_for, session, flash, current_app
 from bson import ObjectId
 from functools import wraps
-import os
-from werkzeug.utils import secure_filename
+from app.mongo import to_str_id, record_deletion
+from datetime import datetime
+from app.pagination import paginate
 
 vendor_bp = Blueprint('vendor', __name__)
 
-UPLOAD_FOLDER = 'app/static/images/vendors/'
-ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
-
-def allowed_file(filename):
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+VENDOR_LIST_PROJECTION = {'vendorname': 1, 'vendor_desc': 1, 'vendor_location': 1, 'vendor_price': 1, 'vendor_img': 1}
 
 def admin_required(f):
     @wraps(f)
@@ -24,11 +21,9 @@ def admin_required(f):
 @vendor_bp.route('/vendors')
 @admin_required
 def list_vendors():
-    vendors = list(current_app.mongo_db.vendors.find())
-    for v in vendors:
-        if v.get('_id') is not None:
-            v['id'] = str(v['_id'])
-    return render_template('vendors.html', vendors=vendors)
+    page = paginate(current_app.mongo_db.vendors, projection=VENDOR_LIST_PROJECTION, args=request.args)
+    vendors = [to_str_id(v) for v in page]
+    return render_template('vendors.html', vendors=vendors, page=page)
 
 @vendor_bp.route('/vendors/add', methods=['GET', 'POST'])
 @admin_required
@@ -38,21 +33,16 @@ def add_vendor():
         desc = request.form.get('vendor_desc')
         location = request.form.get('vendor_location')
         price = request.form.get('vendor_price')
-        img_path = ''
-        if 'vendor_img' in request.files:
-            file = request.files['vendor_img']
-            if file and allowed_file(file.filename):
-                filename = secure_filename(file.filename)
-                save_path = os.path.join(UPLOAD_FOLDER, filename)
-                file.save(save_path)
-                img_path = f'images/vendors/{filename}'
+        img_path = current_app.images.save(request.files.get('vendor_img')) or ''
         current_app.mongo_db.vendors.insert_one({
             'vendorname': name,
             'vendor_desc': desc,
             'vendor_location': location,
             'vendor_price': price,
-            'vendor_img': img_path
+            'vendor_img': img_path,
+            'updated_at': datetime.utcnow()
         })
+        current_app.catalog.invalidate('vendors')
         flash('Vendor added successfully!', 'success')
         return redirect(url_for('vendor.list_vendors'))
     return render_template('add_vendor.html')
@@ -68,14 +58,12 @@ def edit_vendor(vendor_id):
             'vendor_location': request.form.get('vendor_location'),
             'vendor_price': request.form.get('vendor_price')
         }
-        if 'vendor_img' in request.files:
-            file = request.files['vendor_img']
-            if file and allowed_file(file.filename):
-                filename = secure_filename(file.filename)
-                save_path = os.path.join(UPLOAD_FOLDER, filename)
-                file.save(save_path)
-                update_doc['vendor_img'] = f'images/vendors/{filename}'
+        img_path = current_app.images.save(request.files.get('vendor_img'))
+        if img_path:
+            update_doc['vendor_img'] = img_path
+        update_doc['updated_at'] = datetime.utcnow()
         current_app.mongo_db.vendors.update_one({'_id': ObjectId(vendor_id)}, {'$set': update_doc})
+        current_app.catalog.invalidate('vendors')
         flash('Vendor updated successfully!', 'success')
         return redirect(url_for('vendor.list_vendors'))
     return render_template('edit_vendor.html', vendor=vendor)
@@ -84,5 +72,7 @@ def edit_vendor(vendor_id):
 @admin_required
 def delete_vendor(vendor_id):
     current_app.mongo_db.vendors.delete_one({'_id': ObjectId(vendor_id)})
+    record_deletion(current_app.mongo_db, 'vendors', vendor_id)
+    current_app.catalog.invalidate('vendors')
     flash('Vendor deleted successfully!', 'success')
     return redirect(url_for('vendor.list_vendors'))
\ No newline at end of file
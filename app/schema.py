@@ -0,0 +1,145 @@
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import DuplicateKeyError, OperationFailure
+
+from app.analytics import rebuild_rollups
+from app.availability import backfill_slots
+
+MIGRATIONS_COLLECTION = 'schema_migrations'
+# A 'running' claim older than this is presumed dead (worker killed mid-migration) and may be taken over
+MIGRATION_LEASE_SECONDS = 1800
+
+# (collection, keys, options) -- applied idempotently by ensure_indexes()
+INDEXES: List[Tuple[str, List[Tuple[str, int]], Dict[str, Any]]] = [
+    ('users', [('email', ASCENDING)], {'name': 'users_email_unique', 'unique': True}),
+    # _id is the keyset pagination tie-breaker, so it is part of the sort index
+    ('bookings', [('user_id', ASCENDING), ('event_date', DESCENDING), ('_id', DESCENDING)], {'name': 'bookings_user_event_date_id'}),
+    ('bookings', [('hotel_id', ASCENDING), ('event_date', ASCENDING)], {'name': 'bookings_hotel_event_date'}),
+    ('bookings', [('catering_id', ASCENDING)], {'name': 'bookings_catering'}),
+    ('bookings', [('event_id', ASCENDING)], {'name': 'bookings_event'}),
+    ('bookings', [('payment_status', ASCENDING), ('_id', ASCENDING)], {'name': 'bookings_payment_status_id'}),
+    ('hotel_slots', [('hotel_id', ASCENDING), ('date', ASCENDING)], {'name': 'hotel_slots_hotel_date'}),
+    # top-N per dimension and month on the analytics dashboard
+    ('booking_rollups', [('dim', ASCENDING), ('month', ASCENDING), ('revenue', DESCENDING)],
+     {'name': 'booking_rollups_dim_month_revenue'}),
+    ('payment_events', [('status', ASCENDING), ('received_at', ASCENDING)], {'name': 'payment_events_status_received'}),
+    # incremental export scans
+    ('bookings', [('updated_at', ASCENDING)], {'name': 'bookings_updated_at'}),
+    ('users', [('updated_at', ASCENDING)], {'name': 'users_updated_at'}),
+    ('tombstones', [('collection', ASCENDING), ('deleted_at', ASCENDING)], {'name': 'tombstones_collection_deleted_at'}),
+    ('tombstones', [('deleted_at', ASCENDING)], {'name': 'tombstones_ttl', 'expireAfterSeconds': 90 * 24 * 3600}),
+]
+
+
+def ensure_indexes(db, collection: Optional[str] = None, target=None) -> Dict[str, List[str]]:
+    """Create registered indexes; returns created index names and failures.
+
+    ``collection`` limits the run to one collection's indexes and ``target``
+    builds them on another collection object (e.g. an import staging copy).
+    """
+    created, failed = [], []
+    for name, keys, options in INDEXES:
+        if collection is not None and name != collection:
+            continue
+        coll = target if target is not None else db[name]
+        try:
+            created.append(coll.create_index(keys, **options))
+        except OperationFailure as ex:
+            # e.g. duplicate emails blocking a unique index; leave the rest intact
+            failed.append(f"{name}.{options.get('name')}: {ex}")
+    return {'created': created, 'failed': failed}
+
+
+def _backfill_booking_created_at(db) -> None:
+    """Bookings restored from JSON may lack created_at; derive it from the ObjectId."""
+    for b in db.bookings.find({'created_at': {'$exists': False}}, {'_id': 1}):
+        db.bookings.update_one(
+            {'_id': b['_id'], 'created_at': {'$exists': False}},
+            {'$set': {'created_at': b['_id'].generation_time.replace(tzinfo=None)}},
+        )
+
+
+def _drop_index(collection: str, name: str) -> Callable[[Any], None]:
+    def migrate(db) -> None:
+        if name in db[collection].index_information():
+            db[collection].drop_index(name)
+    return migrate
+
+
+# (version, description, function) -- append only, never renumber
+MIGRATIONS: List[Tuple[int, str, Callable[[Any], None]]] = [
+    (1, 'backfill bookings.created_at', _backfill_booking_created_at),
+    (2, 'drop bookings_user_event_date (superseded by bookings_user_event_date_id)',
+     _drop_index('bookings', 'bookings_user_event_date')),
+    (3, 'build hotel_slots from existing bookings', backfill_slots),
+    (4, 'build booking_rollups from existing bookings', rebuild_rollups),
+]
+
+
+def applied_versions(db) -> List[int]:
+    return sorted(d['_id'] for d in db[MIGRATIONS_COLLECTION].find({'status': 'applied'}, {'_id': 1}))
+
+
+def pending_versions(db) -> List[int]:
+    applied = set(applied_versions(db))
+    return [version for version, _, _ in sorted(MIGRATIONS, key=lambda m: m[0]) if version not in applied]
+
+
+def _claim(db, version: int, description: str, owner: str, lease_seconds: float) -> bool:
+    """Take the lease on a migration: a fresh claim, or one whose holder has not finished within the lease."""
+    now = datetime.utcnow()
+    try:
+        db[MIGRATIONS_COLLECTION].insert_one({
+            '_id': version,
+            'description': description,
+            'status': 'running',
+            'owner': owner,
+            'started_at': now,
+        })
+        return True
+    except DuplicateKeyError:
+        pass
+    taken = db[MIGRATIONS_COLLECTION].find_one_and_update(
+        {'_id': version, 'status': 'running', 'started_at': {'$lt': now - timedelta(seconds=lease_seconds)}},
+        {'$set': {'owner': owner, 'started_at': now}},
+    )
+    return taken is not None
+
+
+def run_migrations(db, lease_seconds: float = MIGRATION_LEASE_SECONDS) -> List[int]:
+    """Apply pending migrations in version order.
+
+    Each migration is claimed with a lease (``owner`` + ``started_at``) before
+    it runs, so when several workers boot at once only one of them runs it. A
+    claim older than ``lease_seconds`` belongs to a worker that died and is
+    taken over. A worker that finds a version claimed by someone else stops
+    there instead of running later versions before it; see
+    :func:`pending_versions`. Migrations must therefore be safe to run while
+    the app serves traffic, and to run again after an interrupted attempt.
+    """
+    owner = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+    applied = set(applied_versions(db))
+    ran = []
+    for version, description, fn in sorted(MIGRATIONS, key=lambda m: m[0]):
+        if version in applied:
+            continue
+        if not _claim(db, version, description, owner, lease_seconds):
+            if db[MIGRATIONS_COLLECTION].find_one({'_id': version, 'status': 'applied'}, {'_id': 1}):
+                continue
+            break
+        try:
+            fn(db)
+        except Exception:
+            db[MIGRATIONS_COLLECTION].delete_one({'_id': version, 'status': 'running', 'owner': owner})
+            raise
+        db[MIGRATIONS_COLLECTION].update_one(
+            {'_id': version},
+            {'$set': {'status': 'applied', 'applied_at': datetime.utcnow()}, '$unset': {'owner': ''}},
+        )
+        ran.append(version)
+    return ran
@@ -0,0 +1,175 @@
+import math
+import re
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from app.pricing import PRICE_FIELDS, parse_price
+
+MAX_PER_PAGE = 50
+SORTS = ('relevance', 'price_asc', 'price_desc', 'name')
+
+# collection -> field roles; text fields are (field, weight)
+SEARCH_FIELDS = {
+    'hotels': {
+        'name': 'hotel_name', 'description': 'hotel_desc', 'location': 'location', 'image': 'hotel_img1',
+        'text': (('hotel_name', 3.0), ('location', 2.0), ('hotel_desc', 1.0)),
+    },
+    'caterings': {
+        'name': 'catername', 'description': 'cater_desc', 'location': 'cater_location', 'image': 'cater_img',
+        'text': (('catername', 3.0), ('cater_location', 2.0), ('cater_desc', 1.0)),
+    },
+    'vendors': {
+        'name': 'vendorname', 'description': 'vendor_desc', 'location': 'vendor_location', 'image': 'vendor_img',
+        'text': (('vendorname', 3.0), ('vendor_location', 2.0), ('vendor_desc', 1.0)),
+    },
+}
+
+_TOKEN = re.compile(r'[^\W_]+')
+
+
+def tokenize(text: Any) -> List[str]:
+    return _TOKEN.findall(str(text or '').casefold())
+
+
+class SearchIndex:
+    """Inverted text index, location index and sorted price index over one catalog collection.
+
+    Built once per catalog load (see :meth:`CatalogSearch.index`). Query terms
+    must all match; the last one also matches as a prefix so the index can back
+    type-ahead. Matches are ranked by field-weighted TF-IDF.
+    """
+
+    def __init__(self, collection: str, docs: List[Dict[str, Any]]):
+        fields = SEARCH_FIELDS[collection]
+        price_field = PRICE_FIELDS[collection]
+        self.collection = collection
+        self.items: List[Dict[str, Any]] = []
+        self.postings: Dict[str, Dict[int, float]] = {}
+        self.locations: Dict[str, Set[int]] = {}
+        for doc in docs:
+            if 'id' not in doc:
+                continue
+            i = len(self.items)
+            self.items.append({
+                'id': doc['id'],
+                'type': collection,
+                'name': str(doc.get(fields['name']) or ''),
+                'description': str(doc.get(fields['description']) or ''),
+                'location': str(doc.get(fields['location']) or ''),
+                'price': parse_price(doc.get(price_field)),
+                'image': doc.get(fields['image']) or '',
+            })
+            for field, weight in fields['text']:
+                for token in tokenize(doc.get(field)):
+                    entry = self.postings.setdefault(token, {})
+                    entry[i] = entry.get(i, 0.0) + weight
+            for token in set(tokenize(doc.get(fields['location']))):
+                self.locations.setdefault(token, set()).add(i)
+        self.vocabulary = sorted(self.postings)
+        n = len(self.items)
+        self.idf = {t: math.log(1 + n / len(p)) for t, p in self.postings.items()}
+        # Parallel arrays sorted by price, for range filters and price ordering
+        self.by_price = sorted(range(n), key=lambda i: (self.items[i]['price'], self.items[i]['name'].casefold()))
+        self.prices = [self.items[i]['price'] for i in self.by_price]
+
+    def _expand(self, term: str, prefix: bool) -> List[str]:
+        if not prefix:
+            return [term] if term in self.postings else []
+        start = bisect_left(self.vocabulary, term)
+        end = bisect_left(self.vocabulary, term + '\uffff', start)
+        return self.vocabulary[start:end]
+
+    def _text_scores(self, terms: List[str]) -> Dict[int, float]:
+        scores: Optional[Dict[int, float]] = None
+        for n, term in enumerate(terms):
+            term_scores: Dict[int, float] = {}
+            for token in self._expand(term, prefix=n == len(terms) - 1):
+                idf = self.idf[token]
+                for i, weight in self.postings[token].items():
+                    # An exact hit outranks a prefix completion
+                    score = weight * idf * (1.0 if token == term else 0.5)
+                    if score > term_scores.get(i, 0.0):
+                        term_scores[i] = score
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {i: s + term_scores[i] for i, s in scores.items() if i in term_scores}
+            if not scores:
+                return {}
+        return scores or {}
+
+    def _price_range(self, min_price: Optional[int], max_price: Optional[int]) -> List[int]:
+        lo = 0 if min_price is None else bisect_left(self.prices, min_price)
+        hi = len(self.prices) if max_price is None else bisect_right(self.prices, max_price)
+        return self.by_price[lo:hi]
+
+    def search(self, q: str = '', location: str = '', min_price: Optional[int] = None,
+               max_price: Optional[int] = None) -> List[Tuple[float, Dict[str, Any]]]:
+        """``(score, item)`` for every match; items are shared, copy before changing them.
+
+        Without a text query the matches come in price order.
+        """
+        candidates: Optional[Set[int]] = None
+        if min_price is not None or max_price is not None:
+            candidates = set(self._price_range(min_price, max_price))
+        for token in tokenize(location):
+            found = self.locations.get(token, set())
+            candidates = found if candidates is None else candidates & found
+            if not candidates:
+                return []
+        terms = tokenize(q)
+        if terms:
+            scores = self._text_scores(terms)
+            matches = scores.keys() if candidates is None else scores.keys() & candidates
+            return [(scores[i], self.items[i]) for i in matches]
+        return [(0.0, self.items[i]) for i in self.by_price if candidates is None or i in candidates]
+
+
+class CatalogSearch:
+    """Search over venues, caterers and vendors, served from the catalog cache.
+
+    Each collection's :class:`SearchIndex` is derived from the cached catalog,
+    so it is built once per load and rebuilt whenever an admin edit
+    invalidates the collection (like the price tables in app.pricing).
+    """
+
+    def __init__(self, catalog):
+        self.catalog = catalog
+
+    def index(self, collection: str) -> SearchIndex:
+        return self.catalog.derived(collection, 'search', lambda docs: SearchIndex(collection, docs))
+
+    def search(self, collections: Iterable[str], q: str = '', location: str = '', min_price: Optional[int] = None,
+               max_price: Optional[int] = None, sort: str = 'relevance', page: int = 1,
+               per_page: int = 20) -> Dict[str, Any]:
+        """Ranked, paginated matches across ``collections``.
+
+        ``relevance`` falls back to price order when there is no text query.
+        """
+        collections = list(collections)
+        matches: List[Tuple[float, Dict[str, Any]]] = []
+        for collection in collections:
+            matches += self.index(collection).search(q, location, min_price, max_price)
+        text = bool(tokenize(q))
+        if sort == 'relevance' and not text:
+            sort = 'price_asc'
+        if sort == 'relevance':
+            matches.sort(key=lambda m: (-m[0], m[1]['price'], m[1]['name'].casefold()))
+        elif sort == 'price_desc':
+            matches.sort(key=lambda m: (-m[1]['price'], m[1]['name'].casefold()))
+        elif sort == 'name':
+            matches.sort(key=lambda m: (m[1]['name'].casefold(), m[1]['price']))
+        elif text or len(collections) > 1:
+            # A single index without a text query already returns price order
+            matches.sort(key=lambda m: (m[1]['price'], m[1]['name'].casefold()))
+        per_page = max(1, min(per_page, MAX_PER_PAGE))
+        page = max(1, page)
+        start = (page - 1) * per_page
+        return {
+            'items': [dict(item, score=round(score, 4)) for score, item in matches[start:start + per_page]],
+            'total': len(matches),
+            'page': page,
+            'per_page': per_page,
+            'pages': max(1, math.ceil(len(matches) / per_page)),
+            'sort': sort,
+        }
@@ -0,0 +1,192 @@
+import queue
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set
+
+from pymongo import monitoring
+
+# Commands the server can explain; anything else is logged without a plan
+EXPLAINABLE = {'find', 'aggregate', 'count', 'distinct', 'update', 'delete', 'findAndModify'}
+# Driver/session fields that must not be sent back inside an explain
+DRIVER_FIELDS = {'lsid', '$db', '$clusterTime', '$readPreference', 'txnNumber', 'autocommit', 'startTransaction',
+                 'readConcern', 'writeConcern', 'apiVersion', 'apiStrict', 'apiDeprecationErrors'}
+MAX_LIST_ITEMS = 3
+
+
+def summarize(value: Any, depth: int = 0) -> Any:
+    """Shallow, bounded copy of a command for display (long arrays such as insert batches are cut)."""
+    if depth > 6:
+        return '...'
+    if isinstance(value, dict):
+        return {k: summarize(v, depth + 1) for k, v in value.items() if k not in DRIVER_FIELDS}
+    if isinstance(value, (list, tuple)):
+        items = [summarize(v, depth + 1) for v in value[:MAX_LIST_ITEMS]]
+        if len(value) > MAX_LIST_ITEMS:
+            items.append(f'... {len(value) - MAX_LIST_ITEMS} more')
+        return items
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    return str(value)
+
+
+def plan_stages(plan: Any, found: Optional[Set[str]] = None, indexes: Optional[Set[str]] = None):
+    """Collect every ``stage`` name and index used anywhere in an explain document."""
+    found = set() if found is None else found
+    indexes = set() if indexes is None else indexes
+    if isinstance(plan, dict):
+        stage = plan.get('stage')
+        if isinstance(stage, str):
+            found.add(stage)
+            if plan.get('indexName'):
+                indexes.add(plan['indexName'])
+        for key, value in plan.items():
+            # Rejected plans were not executed; only the winner matters
+            if key != 'rejectedPlans':
+                plan_stages(value, found, indexes)
+    elif isinstance(plan, list):
+        for item in plan:
+            plan_stages(item, found, indexes)
+    return found, indexes
+
+
+def plan_flags(explain: Dict[str, Any]) -> Dict[str, Any]:
+    stages, indexes = plan_stages(explain)
+    return {
+        'collscan': 'COLLSCAN' in stages,
+        # A blocking SORT stage means the index could not provide the order
+        'in_memory_sort': 'SORT' in stages,
+        'stages': sorted(stages),
+        'indexes': sorted(indexes),
+    }
+
+
+class SlowQueryLog(monitoring.CommandListener):
+    """Bounded log of Mongo commands slower than ``threshold_ms``.
+
+    Registered as a pymongo command listener next to the metrics listener.
+    Slow commands are recorded with the route that issued them, and readable
+    commands are explained (``queryPlanner`` verbosity) on a background
+    thread so the request never waits for the extra round trip. Plans are
+    flagged for collection scans and in-memory sorts. Only the newest
+    ``capacity`` entries are kept.
+    """
+
+    def __init__(self, threshold_ms: float = 100.0, capacity: int = 200, explain: bool = True):
+        self.threshold = threshold_ms / 1000.0
+        self.explain = explain
+        self.client = None
+        self.entries: deque = deque(maxlen=capacity)
+        self.total = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._queue: queue.Queue = queue.Queue(maxsize=capacity)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold > 0
+
+    # --- listener -----------------------------------------------------------------
+
+    def started(self, event):
+        if not self.enabled or getattr(self._local, 'explaining', False):
+            return
+        pending = getattr(self._local, 'pending', None)
+        if pending is None:
+            pending = self._local.pending = {}
+        pending[event.request_id] = event.command
+
+    def _finish(self, event, ok: bool):
+        pending = getattr(self._local, 'pending', None)
+        command = pending.pop(event.request_id, None) if pending else None
+        if command is None or event.duration_micros / 1e6 < self.threshold:
+            return
+        self._record(event, command, ok)
+
+    def succeeded(self, event):
+        self._finish(event, ok=True)
+
+    def failed(self, event):
+        self._finish(event, ok=False)
+
+    def _record(self, event, command, ok: bool) -> None:
+        endpoint, path = None, None
+        try:
+            from flask import has_request_context, request
+            if has_request_context():
+                endpoint, path = request.endpoint, request.path
+        except ImportError:  # pragma: no cover
+            pass
+        entry = {
+            'at': datetime.utcnow(),
+            'ms': event.duration_micros / 1000.0,
+            'ok': ok,
+            'command_name': event.command_name,
+            'database': event.database_name,
+            'collection': command.get(event.command_name) if isinstance(command.get(event.command_name), str) else None,
+            'command': summarize(command),
+            'endpoint': endpoint or 'background',
+            'path': path,
+            'plan': None,
+            'flags': None,
+            'explain_error': None,
+        }
+        with self._lock:
+            self.entries.append(entry)
+            self.total += 1
+        if self.explain and event.command_name in EXPLAINABLE and self.client is not None:
+            explain_cmd = {k: v for k, v in command.items() if k not in DRIVER_FIELDS}
+            try:
+                self._queue.put_nowait((entry, event.database_name, explain_cmd))
+            except queue.Full:
+                entry['explain_error'] = 'explain queue full'
+                return
+            self._ensure_thread()
+
+    # --- background explain ------------------------------------------------------
+
+    def _ensure_thread(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='slow-query-explain', daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        self._local.explaining = True
+        while True:
+            entry, database, command = self._queue.get()
+            try:
+                plan = self.client[database].command({'explain': command, 'verbosity': 'queryPlanner'})
+                plan.pop('$clusterTime', None)
+                plan.pop('operationTime', None)
+                entry['flags'] = plan_flags(plan)
+                entry['plan'] = summarize(plan.get('queryPlanner') or plan.get('stages') or plan)
+            except Exception as ex:
+                entry['explain_error'] = str(ex)
+
+    # --- reading -------------------------------------------------------------------
+
+    def recent(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Newest first."""
+        with self._lock:
+            items = list(self.entries)
+        items.reverse()
+        return items[:limit] if limit else items
+
+    def clear(self) -> None:
+        with self._lock:
+            self.entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = list(self.entries)
+        return {
+            'threshold_ms': self.threshold * 1000.0,
+            'total': self.total,
+            'kept': len(entries),
+            'collscans': sum(1 for e in entries if e['flags'] and e['flags']['collscan']),
+            'in_memory_sorts': sum(1 for e in entries if e['flags'] and e['flags']['in_memory_sort']),
+        }
@@ -0,0 +1,35 @@
+// Warn on the booking form when the selected venue is already taken for the chosen date/time.
+document.addEventListener('DOMContentLoaded', function() {
+  const hotelSelect = document.getElementById('hotel_id');
+  const hint = document.getElementById('hotel_availability');
+  if (!hotelSelect || !hint) return;
+  const fields = ['event_date', 'start_at', 'max_total_hour'].map(function(id) {
+    return document.getElementById(id);
+  });
+
+  function checkSlot() {
+    const [dateInput, startInput, hoursInput] = fields;
+    if (!hotelSelect.value || !dateInput.value) {
+      hint.textContent = '';
+      return;
+    }
+    const params = new URLSearchParams({
+      date: dateInput.value,
+      start_at: startInput.value,
+      max_total_hour: hoursInput.value
+    });
+    if (hotelSelect.dataset.bookingId) params.set('booking_id', hotelSelect.dataset.bookingId);
+    fetch(`/api/hotels/${hotelSelect.value}/slot?${params}`)
+      .then(function(res) { return res.ok ? res.json() : null; })
+      .then(function(data) {
+        if (!data) return;
+        hint.textContent = data.free ? 'Venue is available for this time.' : 'Venue is already booked for this time.';
+        hint.className = 'form-text ' + (data.free ? 'text-success' : 'text-danger');
+      })
+      .catch(function() { hint.textContent = ''; });
+  }
+
+  hotelSelect.addEventListener('change', checkSlot);
+  fields.forEach(function(input) { if (input) input.addEventListener('change', checkSlot); });
+  checkSlot();
+});
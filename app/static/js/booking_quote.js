@@ -0,0 +1,28 @@
+// Live total on the booking forms, priced by /api/quote exactly as the server prices the submitted booking.
+document.addEventListener('DOMContentLoaded', function() {
+  const amountInput = document.getElementById('amount');
+  const selects = ['hotel_id', 'catering_id', 'vendor_ids'].map(function(id) {
+    return document.getElementById(id);
+  }).filter(Boolean);
+  if (!amountInput || !selects.length) return;
+  let latest = 0;
+
+  function updateTotal() {
+    const params = new URLSearchParams();
+    selects.forEach(function(select) {
+      Array.from(select.selectedOptions).forEach(function(opt) {
+        if (opt.value) params.append(select.name, opt.value);
+      });
+    });
+    const request = ++latest;
+    fetch(`/api/quote?${params}`)
+      .then(function(res) { return res.ok ? res.json() : null; })
+      .then(function(data) {
+        if (data && request === latest) amountInput.value = data.total;
+      })
+      .catch(function() {});
+  }
+
+  selects.forEach(function(select) { select.addEventListener('change', updateTotal); });
+  updateTotal();
+});
@@ -0,0 +1,59 @@
+// Type-ahead filter for the venue/catering dropdowns on the booking forms, backed by /api/search.
+// Each <select data-search="hotels|caterings"> gets a search box; the current choice is always kept.
+document.addEventListener('DOMContentLoaded', function() {
+  document.querySelectorAll('select[data-search]').forEach(function(select) {
+    const input = document.createElement('input');
+    input.type = 'search';
+    input.className = 'form-control form-control-sm mb-1';
+    input.placeholder = 'Search by name, location or description';
+    input.setAttribute('aria-label', 'Search ' + select.dataset.search);
+    select.parentNode.insertBefore(input, select);
+
+    const placeholder = select.options[0];
+    const initial = Array.from(select.options).slice(1);
+    let timer = null;
+    let latest = 0;
+
+    function option(value, label, price) {
+      const opt = document.createElement('option');
+      opt.value = value;
+      opt.dataset.price = price;
+      opt.textContent = label;
+      return opt;
+    }
+
+    function show(options) {
+      const selected = select.value ? select.options[select.selectedIndex] : null;
+      select.replaceChildren(placeholder);
+      if (selected && !options.some(function(o) { return o.value === selected.value; })) {
+        select.appendChild(selected);
+      }
+      options.forEach(function(o) { select.appendChild(o); });
+      if (selected) select.value = selected.value;
+    }
+
+    function search() {
+      const q = input.value.trim();
+      if (!q) {
+        show(initial);
+        return;
+      }
+      const request = ++latest;
+      const params = new URLSearchParams({type: select.dataset.search, q: q, per_page: 50});
+      fetch(`/api/search?${params}`)
+        .then(function(res) { return res.ok ? res.json() : null; })
+        .then(function(data) {
+          if (!data || request !== latest) return;
+          show(data.items.map(function(item) {
+            return option(item.id, `${item.name} - ₹${item.price}`, item.price);
+          }));
+        })
+        .catch(function() {});
+    }
+
+    input.addEventListener('input', function() {
+      clearTimeout(timer);
+      timer = setTimeout(search, 150);
+    });
+  });
+});
@@ -0,0 +1,177 @@
+import hashlib
+import hmac
+import os
+import socket
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+EVENTS_COLLECTION = 'payment_events'
+
+# webhook event -> booking payment_status
+EVENT_STATUS = {
+    'payment.captured': 1,
+    'order.paid': 1,
+    'payment.failed': 2,
+}
+
+
+def verify_webhook_signature(body: bytes, signature: Optional[str], secret: str) -> bool:
+    expected = hmac.new(secret.encode('utf-8'), body, hashlib.sha256).hexdigest()
+    return bool(signature) and hmac.compare_digest(expected, signature)
+
+
+def parse_event(payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Extract the fields we act on from a Razorpay webhook body, or None if irrelevant."""
+    event = payload.get('event')
+    if event not in EVENT_STATUS:
+        return None
+    body = payload.get('payload') or {}
+    payment = (body.get('payment') or {}).get('entity') or {}
+    order = (body.get('order') or {}).get('entity') or {}
+    booking_id = (payment.get('notes') or {}).get('booking_id') or (order.get('notes') or {}).get('booking_id')
+    receipt = order.get('receipt') or ''
+    if not booking_id and receipt.startswith('booking_'):
+        booking_id = receipt[len('booking_'):]
+    payment_id = payment.get('id') or order.get('id')
+    if not booking_id or not payment_id or not ObjectId.is_valid(str(booking_id)):
+        return None
+    return {
+        '_id': f'{payment_id}:{event}',
+        'event': event,
+        'payment_id': payment_id,
+        'order_id': payment.get('order_id') or order.get('id'),
+        'booking_id': str(booking_id),
+        'status': 'pending',
+        'received_at': datetime.utcnow(),
+    }
+
+
+class PaymentEventProcessor:
+    """Durable, deduplicated queue of payment webhooks applied in batches.
+
+    :meth:`enqueue` stores the event in ``payment_events`` keyed by payment id
+    and event type (a redelivery hits the duplicate key and is dropped) and
+    wakes a background thread. That thread applies pending events with a
+    single unordered ``bulk_write`` per batch. Each worker process starts it on
+    its first request and it also polls every ``interval`` seconds, so events
+    left pending by a crash or deploy are applied shortly after any worker
+    serves traffic again. Every worker runs an applier, so each batch is
+    first claimed (``status: 'processing'`` with this batch's token) and only
+    the claimed events are applied; a claim older than ``claim_timeout``
+    seconds belongs to an applier that died and is taken over. A captured
+    payment is never downgraded to failed.
+    """
+
+    def __init__(self, app, batch_size: int = 200, interval: float = 1.0, claim_timeout: float = 60.0):
+        self.app = app
+        self.batch_size = batch_size
+        self.interval = interval
+        self.claim_timeout = claim_timeout
+        self.received = 0
+        self.duplicates = 0
+        self.applied = 0
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        # A cheap pid/liveness check per request; starts the applier after boot or a fork
+        app.before_request(self._ensure_thread)
+
+    @property
+    def db(self):
+        return self.app.mongo_db
+
+    def enqueue(self, event: Dict[str, Any]) -> bool:
+        """Store an event; returns False when it was already received."""
+        try:
+            self.db[EVENTS_COLLECTION].insert_one(event)
+        except DuplicateKeyError:
+            self.duplicates += 1
+            return False
+        self.received += 1
+        self._ensure_thread()
+        self._wake.set()
+        return True
+
+    def _ensure_thread(self) -> None:
+        # Started per process, never before a fork, so each worker runs its own applier
+        pid = os.getpid()
+        if self._thread is not None and self._thread.is_alive() and self._pid == pid:
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive() or self._pid != pid:
+                self._wake = threading.Event()
+                self._thread = threading.Thread(target=self._run, name='payment-events', daemon=True)
+                self._pid = pid
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                while self.process_pending() >= self.batch_size:
+                    pass
+            except Exception as ex:  # keep the applier alive; events stay pending
+                self.app.logger.warning('Applying payment events failed: %s', ex)
+
+    def _claim(self) -> List[Dict[str, Any]]:
+        """Mark the oldest claimable events as this batch's and return the ones actually won."""
+        now = datetime.utcnow()
+        claimable = {'$or': [
+            {'status': 'pending'},
+            {'status': 'processing', 'claimed_at': {'$lt': now - timedelta(seconds=self.claim_timeout)}},
+        ]}
+        ids = [e['_id'] for e in self.db[EVENTS_COLLECTION].find(claimable, {'_id': 1})
+               .sort('received_at', 1).limit(self.batch_size)]
+        if not ids:
+            return []
+        token = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:12]}'
+        self.db[EVENTS_COLLECTION].update_many(
+            {'_id': {'$in': ids}, **claimable},
+            {'$set': {'status': 'processing', 'claimed_by': token, 'claimed_at': now}},
+        )
+        return list(self.db[EVENTS_COLLECTION].find({'status': 'processing', 'claimed_by': token}))
+
+    def process_pending(self) -> int:
+        """Claim and apply one batch of pending events; returns how many events this worker applied."""
+        events = self._claim()
+        if not events:
+            return 0
+        # Collapse to one transition per booking; success wins over failure
+        target: Dict[str, Dict[str, Any]] = {}
+        for e in events:
+            status = EVENT_STATUS[e['event']]
+            current = target.get(e['booking_id'])
+            if current is None or status == 1:
+                target[e['booking_id']] = {'status': status, 'payment_id': e['payment_id']}
+        now = datetime.utcnow()
+        ops = []
+        for booking_id, t in target.items():
+            query: Dict[str, Any] = {'_id': ObjectId(booking_id)}
+            if t['status'] != 1:
+                query['payment_status'] = {'$ne': 1}
+            ops.append(UpdateOne(query, {'$set': {
+                'payment_status': t['status'],
+                'payment_id': t['payment_id'],
+                'updated_at': now,
+            }}))
+        self.db.bookings.bulk_write(ops, ordered=False)
+        self.db[EVENTS_COLLECTION].update_many(
+            {'_id': {'$in': [e['_id'] for e in events]}, 'claimed_by': events[0]['claimed_by']},
+            {'$set': {'status': 'processed', 'processed_at': now}},
+        )
+        self.app.rollups.sync(target)
+        for booking_id in target:
+            self.app.receipt_cache.invalidate(booking_id)
+        self.applied += len(events)
+        return len(events)
+
+    def stats(self) -> Dict[str, int]:
+        return {'received': self.received, 'duplicates': self.duplicates, 'applied': self.applied}
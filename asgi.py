@@ -0,0 +1,10 @@
+"""ASGI entry point: ``uvicorn asgi:app --workers 4``.
+
+Bookings, booking detail/status, catalog lists and the quote/availability
+APIs are served on the event loop with pymongo's ``AsyncMongoClient``; every
+other route runs the regular Flask views on a thread pool (see app.asgi).
+"""
+from app import create_app
+from app.asgi import AsgiApp
+
+app = AsgiApp(create_app())
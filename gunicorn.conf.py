@@ -0,0 +1,23 @@
+# Gunicorn settings for `gunicorn -c gunicorn.conf.py wsgi:app` (also used by `python serve.py`).
+# Every value can be overridden from the environment.
+import multiprocessing
+import os
+
+bind = os.getenv('BIND', f"0.0.0.0:{os.getenv('PORT', '8000')}")
+workers = int(os.getenv('WEB_CONCURRENCY', str(multiprocessing.cpu_count() * 2 + 1)))
+threads = int(os.getenv('WEB_THREADS', '8'))
+# create_app sizes each worker's Mongo pool from WEB_THREADS
+os.environ['WEB_THREADS'] = str(threads)
+worker_class = 'gthread'
+# Preloading imports the app once in the master and shares the memory with workers. Code changes
+# are then only picked up by a full restart, not by a SIGHUP reload.
+preload_app = os.getenv('WEB_PRELOAD', '0') == '1'
+timeout = int(os.getenv('WEB_TIMEOUT', '60'))
+graceful_timeout = int(os.getenv('WEB_GRACEFUL_TIMEOUT', '30'))
+keepalive = int(os.getenv('WEB_KEEPALIVE', '5'))
+# Recycle workers now and then to bound memory growth; jitter avoids restarting all at once
+max_requests = int(os.getenv('WEB_MAX_REQUESTS', '0'))
+max_requests_jitter = max_requests // 10
+accesslog = os.getenv('WEB_ACCESS_LOG') or None
+errorlog = '-'
+
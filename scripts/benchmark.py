@@ -0,0 +1,509 @@
+import argparse
+import json
+import os
+import random
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+# Ensure project root is on sys.path to import app
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.append(PROJECT_ROOT)
+
+from pymongo import monitoring
+
+BASELINE_PATH = os.path.join(PROJECT_ROOT, 'scripts', 'benchmark_baseline.json')
+PASSWORD = 'bench-password'
+
+
+class QueryCounter(monitoring.CommandListener):
+    """Counts Mongo commands issued by the current thread (listeners run in the caller's thread)."""
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def reset(self):
+        self._local.count = 0
+
+    @property
+    def count(self):
+        return getattr(self._local, 'count', 0)
+
+    def started(self, event):
+        self._local.count = self.count + 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+query_counter = QueryCounter()
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    k = max(0, min(len(values) - 1, int(round(pct / 100.0 * len(values) + 0.5)) - 1))
+    return values[k]
+
+
+# --- Mongo backends ------------------------------------------------------------
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+class SpawnedMongod:
+    def __init__(self):
+        self.dbpath = tempfile.mkdtemp(prefix='bench-mongod-')
+        self.port = free_port()
+        self.proc = subprocess.Popen(
+            ['mongod', '--dbpath', self.dbpath, '--port', str(self.port), '--bind_ip', '127.0.0.1', '--quiet'],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        self.uri = f'mongodb://127.0.0.1:{self.port}'
+
+    def wait(self, timeout=20):
+        from pymongo import MongoClient
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            try:
+                MongoClient(self.uri, serverSelectionTimeoutMS=500).admin.command('ping')
+                return
+            except Exception:
+                time.sleep(0.2)
+        raise RuntimeError('mongod did not start')
+
+    def stop(self):
+        self.proc.terminate()
+        try:
+            self.proc.wait(10)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+        shutil.rmtree(self.dbpath, ignore_errors=True)
+
+
+def make_app(backend, db_name):
+    """Return ``(app, cleanup, startup)`` for the chosen backend; ``startup`` holds boot timings in seconds."""
+    os.environ['MONGO_DB_NAME'] = db_name
+    os.environ.setdefault('RECEIPT_RENDER_WORKERS', '0')
+    # Indexes and migrations are applied explicitly once the dataset is seeded
+    os.environ.setdefault('MONGO_AUTO_MIGRATE', '0')
+    os.environ.setdefault('RECEIPT_CACHE_DIR', tempfile.mkdtemp(prefix='bench-receipts-'))
+    cleanup = lambda: None
+    client = None
+    if backend == 'mongomock':
+        import mongomock
+        client = mongomock.MongoClient()
+    elif backend == 'spawn':
+        if not shutil.which('mongod'):
+            raise SystemExit('mongod not found on PATH; use --mongo mongomock or --mongo uri')
+        server = SpawnedMongod()
+        server.wait()
+        os.environ['MONGO_URI'] = server.uri
+        cleanup = server.stop
+
+    started = time.perf_counter()
+    from app import create_app
+    imported = time.perf_counter()
+    app = create_app(mongo_client=client)
+    created = time.perf_counter()
+    # First request pays for lazy initialisation (Mongo client, template compilation)
+    app.test_client().get('/readyz')
+    ready = time.perf_counter()
+    startup = {'import': imported - started, 'create_app': created - imported, 'first_request': ready - created}
+    if backend == 'uri':
+        cleanup = lambda: app.mongo_client.drop_database(db_name)
+    return app, cleanup, startup
+
+
+# --- seeding -------------------------------------------------------------------
+
+def seed(db, users, bookings_per_user, hotels, caterings, vendors):
+    """Insert a realistic, cross-referenced dataset and return handles used by scenarios."""
+    rng = random.Random(42)
+    events = [{'eventname': n} for n in ['Wedding', 'Birthday Party', 'Corporate Event', 'Anniversary', 'Graduation Party']]
+    db.events.insert_many(events)
+    hotel_docs = [{'hotel_name': f'Hotel {i}', 'hotel_desc': 'Banquet hall', 'price': str(rng.randrange(1000, 20000, 100)),
+                   'location': rng.choice(['Chennai', 'Bengaluru', 'Mumbai', 'Delhi']), 'hotel_img1': ''}
+                  for i in range(hotels)]
+    db.hotels.insert_many(hotel_docs)
+    catering_docs = [{'catername': f'Caterer {i}', 'cater_desc': 'Buffet', 'cater_location': 'Chennai',
+                      'cater_price': str(rng.randrange(200, 5000, 50)), 'cater_img': ''} for i in range(caterings)]
+    db.caterings.insert_many(catering_docs)
+    vendor_docs = [{'vendorname': f'Vendor {i}', 'vendor_desc': 'Photography', 'vendor_location': 'Chennai',
+                    'vendor_price': str(rng.randrange(500, 10000, 100)), 'vendor_img': ''} for i in range(vendors)]
+    db.vendors.insert_many(vendor_docs)
+    user_docs = [{'email': f'user{i}@bench.local', 'first_name': 'Bench', 'last_name': str(i), 'password': PASSWORD,
+                  'role': 'Admin' if i == 0 else 'User'} for i in range(users)]
+    db.users.insert_many(user_docs)
+    today = date.today()
+    batch = []
+    for u in user_docs:
+        for _ in range(bookings_per_user):
+            batch.append({
+                'user_id': str(u['_id']),
+                'event_date': (today + timedelta(days=rng.randrange(-365, 365))).isoformat(),
+                'start_at': f'{rng.randrange(8, 20):02d}:00',
+                'max_total_hour': str(rng.randrange(2, 8)),
+                'no_of_guest': str(rng.randrange(20, 500)),
+                'amount': rng.randrange(1000, 30000),
+                'accept_status': rng.choice([0, 0, 1, 2]),
+                'payment_status': rng.choice([0, 1, 1, 2]),
+                'hotel_id': str(rng.choice(hotel_docs)['_id']),
+                'catering_id': str(rng.choice(catering_docs)['_id']),
+                'event_id': str(rng.choice(events)['_id']),
+            })
+            if len(batch) >= 1000:
+                db.bookings.insert_many(batch)
+                batch = []
+    if batch:
+        db.bookings.insert_many(batch)
+    return {'users': user_docs, 'hotels': hotel_docs, 'caterings': catering_docs, 'events': events}
+
+
+# --- scenarios -----------------------------------------------------------------
+
+def login(client, user):
+    client.post('/login-validation', data={'email': user['email'], 'password': PASSWORD})
+
+
+def scenario_requests(name, client, ctx, rng, user):
+    """Issue one request for scenario ``name`` and return the response."""
+    if name == 'login':
+        return client.post('/login-validation', data={'email': user['email'], 'password': PASSWORD})
+    if name == 'bookings':
+        return client.get('/bookings')
+    if name == 'new_booking':
+        return client.get('/new-booking')
+    if name == 'create_booking':
+        day = date.today() + timedelta(days=rng.randrange(1, 3650))
+        return client.post('/create-booking', data={
+            'event_date': day.isoformat(), 'start_at': f'{rng.randrange(8, 20):02d}:00', 'max_total_hour': '3',
+            'no_of_guest': '50', 'hotel_id': str(rng.choice(ctx['hotels'])['_id']),
+            'catering_id': str(rng.choice(ctx['caterings'])['_id']), 'event_id': str(rng.choice(ctx['events'])['_id']),
+        })
+    if name in ('booking_detail', 'booking_status'):
+        page = 'booking' if name == 'booking_detail' else 'booking-status'
+        return client.get(f"/{page}/{rng.choice(ctx['booking_ids'][user['email']])}")
+    if name == 'availability':
+        month = (date.today() + timedelta(days=rng.randrange(0, 365))).strftime('%Y-%m')
+        return client.get(f"/api/hotels/{rng.choice(ctx['hotels'])['_id']}/availability?month={month}&months=2")
+    if name == 'quote':
+        return client.get(f"/api/quote?hotel_id={rng.choice(ctx['hotels'])['_id']}"
+                          f"&catering_id={rng.choice(ctx['caterings'])['_id']}")
+    if name == 'search':
+        low = rng.randrange(1000, 15000, 500)
+        return client.get(f"/api/search?type=hotels&q=banquet+hot&location={rng.choice(['Chennai', 'Mumbai'])}"
+                          f"&min_price={low}&max_price={low + 5000}")
+    if name == 'catering_list':
+        return client.get('/catering')
+    if name == 'receipt':
+        return client.get(f"/receipt/download/{rng.choice(ctx['booking_ids'][user['email']])}")
+    if name == 'admin_export':
+        resp = client.get('/admin/export-download')
+        ctx['last_export'] = resp.get_data()
+        return resp
+    if name == 'admin_import':
+        from io import BytesIO
+        return client.post('/admin/import-json', data={'archive': (BytesIO(ctx['last_export']), 'export.ndjson.gz')},
+                           content_type='multipart/form-data')
+    raise ValueError(name)
+
+
+SCENARIOS = ['login', 'bookings', 'new_booking', 'create_booking', 'booking_detail', 'booking_status', 'availability',
+             'quote', 'search', 'catering_list', 'receipt', 'admin_export', 'admin_import']
+# Heavy admin paths run single-threaded with fewer iterations
+ADMIN_SCENARIOS = {'admin_export', 'admin_import'}
+
+
+def run_scenario(make_client, ctx, name, requests, concurrency, count_queries=True):
+    """Drive one scenario; ``queries_per_request`` is None when commands cannot be counted (mongomock)."""
+    latencies, queries, statuses = [], [], {}
+    lock = threading.Lock()
+    admin = name in ADMIN_SCENARIOS
+    threads = 1 if admin else concurrency
+    per_thread = max(1, (max(1, requests // 20) if admin else requests) // threads)
+
+    def worker(idx):
+        rng = random.Random(idx)
+        user = ctx['users'][0] if admin else ctx['users'][1 + idx % (len(ctx['users']) - 1)]
+        client = make_client()
+        if name != 'login':
+            login(client, user)
+        local_lat, local_q = [], []
+        for _ in range(per_thread):
+            query_counter.reset()
+            started = time.perf_counter()
+            resp = scenario_requests(name, client, ctx, rng, user)
+            local_lat.append(time.perf_counter() - started)
+            local_q.append(query_counter.count)
+            with lock:
+                statuses[resp.status_code] = statuses.get(resp.status_code, 0) + 1
+        with lock:
+            latencies.extend(local_lat)
+            queries.extend(local_q)
+
+    if name == 'admin_import' and not ctx.get('last_export'):
+        run_scenario(make_client, ctx, 'admin_export', 20, 1)
+    started = time.perf_counter()
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - started
+    return {
+        'requests': len(latencies),
+        'concurrency': threads,
+        'rps': len(latencies) / elapsed if elapsed else 0.0,
+        'p50_ms': 1000 * percentile(latencies, 50),
+        'p95_ms': 1000 * percentile(latencies, 95),
+        'p99_ms': 1000 * percentile(latencies, 99),
+        'queries_per_request': (sum(queries) / len(queries) if queries else 0.0) if count_queries else None,
+        'statuses': {str(k): v for k, v in sorted(statuses.items())},
+    }
+
+
+# --- real HTTP servers ------------------------------------------------------------
+
+class HttpClient:
+    """The subset of Flask's test client the scenarios use, over real HTTP with keep-alive."""
+
+    def __init__(self, base_url):
+        import requests
+        self.base_url = base_url.rstrip('/')
+        self.session = requests.Session()
+
+    def get(self, path):
+        return HttpResponse(self.session.get(self.base_url + path, allow_redirects=False))
+
+    def post(self, path, data=None, content_type=None):
+        data = data or {}
+        files = {k: (v[1], v[0]) for k, v in data.items() if isinstance(v, tuple)}
+        form = {k: v for k, v in data.items() if not isinstance(v, tuple)}
+        return HttpResponse(self.session.post(self.base_url + path, data=form, files=files or None,
+                                              allow_redirects=False))
+
+
+class HttpResponse:
+    def __init__(self, response):
+        self.status_code = response.status_code
+        self._data = response.content
+
+    def get_data(self):
+        return self._data
+
+
+HTTP_SCENARIOS = ['login', 'bookings', 'new_booking', 'create_booking']
+# Endpoints with an async variant in app/asgi.py, compared by --compare-async
+READ_SCENARIOS = ['bookings', 'booking_detail', 'booking_status', 'availability', 'quote', 'search', 'catering_list']
+
+
+def server_commands(port, workers, threads):
+    """Servers compared by --compare-servers (dev, serve) and --compare-async (serve, asgi)."""
+    dev = ('from app import create_app; '
+           f'create_app().run(host="127.0.0.1", port={port}, threaded=True, debug=False)')
+    return {
+        'dev': [sys.executable, '-c', dev],
+        'serve': [sys.executable, os.path.join(PROJECT_ROOT, 'serve.py'), '--host', '127.0.0.1', '--port', str(port),
+                  '--workers', str(workers), '--threads', str(threads)],
+        'asgi': [sys.executable, '-m', 'uvicorn', 'asgi:app', '--host', '127.0.0.1', '--port', str(port),
+                 '--workers', str(workers), '--log-level', 'warning', '--no-access-log'],
+    }
+
+
+def start_server(cmd, port, timeout=30):
+    import requests
+    env = dict(os.environ, MONGO_AUTO_MIGRATE='0', SLOW_QUERY_EXPLAIN='0')
+    proc = subprocess.Popen(cmd, cwd=PROJECT_ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f'server exited with status {proc.returncode}: {" ".join(cmd)}')
+        try:
+            if requests.get(f'http://127.0.0.1:{port}/healthz', timeout=1).ok:
+                return proc
+        except requests.RequestException:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError(f'server did not become healthy: {" ".join(cmd)}')
+
+
+def stop_server(proc):
+    proc.send_signal(signal.SIGTERM)
+    try:
+        proc.wait(30)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+
+
+def compare_servers(ctx, args, labels=('dev', 'serve'), scenarios=HTTP_SCENARIOS):
+    """Run HTTP scenarios against each server on the same database; returns results per server."""
+    results = {}
+    for label in labels:
+        port = free_port()
+        proc = start_server(server_commands(port, args.workers, args.threads)[label], port)
+        try:
+            base_url = f'http://127.0.0.1:{port}'
+            results[label] = {}
+            for name in scenarios:
+                r = run_scenario(lambda: HttpClient(base_url), ctx, name, args.requests, args.concurrency)
+                r.pop('queries_per_request')
+                results[label][name] = r
+        finally:
+            stop_server(proc)
+    print(f"\n{'server':<8}{'scenario':<16}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}  statuses")
+    for label, scenarios in results.items():
+        for name, r in scenarios.items():
+            print(f"{label:<8}{name:<16}{r['rps']:>9.1f}{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}{r['p99_ms']:>9.1f}"
+                  f"  {r['statuses']}")
+    first, last = labels[0], labels[-1]
+    for name in scenarios:
+        before, after = results[first][name]['rps'], results[last][name]['rps']
+        print(f"{name}: {last} {after / before if before else 0:.1f}x {first} throughput")
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Return a list of regressions versus the stored baseline."""
+    regressions = []
+    base_startup = baseline.get('startup_seconds') or {}
+    for phase, seconds in results['startup_seconds'].items():
+        # Ignore sub-10 ms phases, which are dominated by noise
+        if base_startup.get(phase) and seconds > max(0.01, base_startup[phase] * (1 + tolerance)):
+            regressions.append(f"startup {phase}: {seconds * 1000:.0f} ms vs baseline {base_startup[phase] * 1000:.0f} ms")
+    for name, r in results['scenarios'].items():
+        b = baseline.get('scenarios', {}).get(name)
+        if not b:
+            continue
+        # As for startup, a p95 within 10 ms of the baseline is noise, not a regression
+        if b['p95_ms'] and r['p95_ms'] > max(b['p95_ms'] * (1 + tolerance), b['p95_ms'] + 10):
+            regressions.append(f"{name}: p95 {r['p95_ms']:.1f} ms vs baseline {b['p95_ms']:.1f} ms")
+        if b['rps'] and r['rps'] < b['rps'] * (1 - tolerance):
+            regressions.append(f"{name}: {r['rps']:.0f} req/s vs baseline {b['rps']:.0f} req/s")
+        if None not in (r['queries_per_request'], b.get('queries_per_request')) \
+                and r['queries_per_request'] > b['queries_per_request'] + 0.5:
+            regressions.append(f"{name}: {r['queries_per_request']:.1f} queries/request vs baseline "
+                               f"{b['queries_per_request']:.1f}")
+    return regressions
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Route-level load and latency benchmark.')
+    parser.add_argument('--mongo', choices=['mongomock', 'spawn', 'uri'], default='spawn',
+                        help='mongomock (in-process), spawn a temporary mongod, or use MONGO_URI')
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--bookings-per-user', type=int, default=200)
+    parser.add_argument('--hotels', type=int, default=50)
+    parser.add_argument('--caterings', type=int, default=50)
+    parser.add_argument('--vendors', type=int, default=50)
+    parser.add_argument('--requests', type=int, default=400, help='requests per scenario')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--scenarios', nargs='*', default=SCENARIOS, choices=SCENARIOS)
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true', help='store these results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed relative regression (default 25%%)')
+    parser.add_argument('--json', help='also write results to this file')
+    parser.add_argument('--compare-servers', action='store_true',
+                        help='also run login/booking scenarios over HTTP against the dev server and serve.py '
+                             '(needs --mongo spawn or uri)')
+    parser.add_argument('--compare-async', action='store_true',
+                        help='also run the read scenarios over HTTP against serve.py (sync) and uvicorn asgi:app '
+                             '(async; needs uvicorn and asgiref, and --mongo spawn or uri)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2,
+                        help='worker processes for --compare-servers/--compare-async')
+    parser.add_argument('--threads', type=int, default=8, help='serve.py threads per worker for --compare-servers')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    monitoring.register(query_counter)
+    app, cleanup, startup = make_app(args.mongo, f'bench_{os.getpid()}')
+    try:
+        with app.app_context():
+            db = app.mongo_db
+            started = time.perf_counter()
+            ctx = seed(db, args.users, args.bookings_per_user, args.hotels, args.caterings, args.vendors)
+            seed_seconds = time.perf_counter() - started
+            ctx['booking_ids'] = {}
+            for u in ctx['users']:
+                ids = [str(b['_id']) for b in db.bookings.find({'user_id': str(u['_id'])}, {'_id': 1}).limit(50)]
+                ctx['booking_ids'][u['email']] = ids or ['000000000000000000000000']
+            # Build indexes and slots for the seeded data
+            from app import bootstrap_schema
+            from app.availability import backfill_slots
+            bootstrap_schema(db)
+            backfill_slots(db)
+
+        results = {
+            'backend': args.mongo,
+            'dataset': {'users': args.users, 'bookings': args.users * args.bookings_per_user,
+                        'hotels': args.hotels, 'caterings': args.caterings, 'vendors': args.vendors},
+            'seed_seconds': seed_seconds,
+            'startup_seconds': startup,
+            'scenarios': {},
+        }
+        print(f"startup: import {startup['import'] * 1000:.0f} ms, create_app {startup['create_app'] * 1000:.0f} ms, "
+              f"first request {startup['first_request'] * 1000:.0f} ms")
+        print(f"dataset: {results['dataset']} seeded in {seed_seconds:.1f}s")
+        print(f"{'scenario':<16}{'reqs':>7}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'q/req':>7}  statuses")
+        # mongomock does not emit command events, so there is nothing to count
+        count_queries = args.mongo != 'mongomock'
+        for name in args.scenarios:
+            r = run_scenario(app.test_client, ctx, name, args.requests, args.concurrency, count_queries)
+            results['scenarios'][name] = r
+            q = 'n/a' if r['queries_per_request'] is None else f"{r['queries_per_request']:.1f}"
+            print(f"{name:<16}{r['requests']:>7}{r['rps']:>9.1f}{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}"
+                  f"{r['p99_ms']:>9.1f}{q:>7}  {r['statuses']}")
+        if (args.compare_servers or args.compare_async) and args.mongo == 'mongomock':
+            print('--compare-servers/--compare-async need a real MongoDB shared with the server processes; skipped.')
+        else:
+            if args.compare_servers:
+                results['servers'] = compare_servers(ctx, args)
+            if args.compare_async:
+                results['async'] = compare_servers(ctx, args, ('serve', 'asgi'), READ_SCENARIOS)
+    finally:
+        cleanup()
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f'Saved baseline to {args.baseline}')
+        return
+    if os.path.isfile(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if (baseline.get('backend'), baseline.get('dataset')) != (results['backend'], results['dataset']):
+            print(f"Baseline at {args.baseline} was recorded with --mongo {baseline.get('backend')} and "
+                  f"{baseline.get('dataset')}; rerun with the same options to compare.")
+            return
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print('Regressions versus baseline:')
+            for line in regressions:
+                print(f'  {line}')
+            sys.exit(1)
+        print('No regressions versus baseline.')
+    else:
+        print(f'No baseline at {args.baseline}; run with --save-baseline to record one.')
+
+
+if __name__ == '__main__':
+    main()
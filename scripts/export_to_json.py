@@ -1,6 +1,7 @@
-import json
+import argparse
 import os
 import sys
+import time
 
 # Ensure project root is on sys.path to import app
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
@@ -8,32 +9,43 @@ if PROJECT_ROOT not in sys.path:
     sys.path.append(PROJECT_ROOT)
 
 from app import create_app
+from app.dataio import COLLECTIONS, export_all, export_delta
 
 OUTPUT_DIR = os.path.join(PROJECT_ROOT, 'data')
 
 
-def default(o):
-    try:
-        from bson import ObjectId
-        if isinstance(o, ObjectId):
-            return str(o)
-    except Exception:
-        pass
-    raise TypeError
+def parse_args():
+    parser = argparse.ArgumentParser(description='Export MongoDB collections to data/ files.')
+    parser.add_argument('--format', choices=['json', 'ndjson'], default='json',
+                        help='json writes data/<name>.json arrays; ndjson writes one document per line')
+    parser.add_argument('--compress', choices=['gzip', 'zstd'], default=None)
+    parser.add_argument('--out', default=OUTPUT_DIR, help='output directory (default: data/)')
+    parser.add_argument('--workers', type=int, default=3, help='collections exported in parallel')
+    parser.add_argument('--delta', action='store_true',
+                        help='write only changes since the last export to <out>/deltas (gzip NDJSON)')
+    parser.add_argument('collections', nargs='*', default=COLLECTIONS)
+    return parser.parse_args()
 
 
 def main():
+    args = parse_args()
     app = create_app()
     with app.app_context():
-        db = app.mongo_db
-        os.makedirs(OUTPUT_DIR, exist_ok=True)
-        collections = ['users', 'events', 'hotels', 'caterings', 'vendors', 'bookings']
-        for name in collections:
-            data = list(db[name].find())
-            out_path = os.path.abspath(os.path.join(OUTPUT_DIR, f'{name}.json'))
-            with open(out_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2, default=default)
-            print(f'Wrote {len(data)} docs to {out_path}')
+        started = time.perf_counter()
+        if args.delta:
+            result = export_delta(app.mongo_db, os.path.abspath(args.out), collections=args.collections)
+            for name, count in result['counts'].items():
+                since = result['since'][name]
+                print(f"{name}: {count} records since {since.isoformat() if since else 'the beginning'}")
+            print(f"Wrote {result['path']} in {time.perf_counter() - started:.2f}s")
+            return
+        results = export_all(app.mongo_db, os.path.abspath(args.out), collections=args.collections,
+                             fmt=args.format, compression=args.compress, workers=args.workers)
+        for r in results:
+            print(f"Wrote {r['count']} docs to {r['path']}")
+        elapsed = time.perf_counter() - started
+        total = sum(r['count'] for r in results)
+        print(f'Exported {total} docs in {elapsed:.2f}s ({total / elapsed if elapsed else 0:.0f} docs/s)')
 
 
 if __name__ == '__main__':
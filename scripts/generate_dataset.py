@@ -0,0 +1,302 @@
+import argparse
+import calendar
+import gzip
+import os
+import random
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+from math import gcd
+
+# Ensure project root is on sys.path to import app
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.append(PROJECT_ROOT)
+
+from app.dataio import dumps, export_filename
+
+OUTPUT_DIR = os.path.join(PROJECT_ROOT, 'data', 'synthetic')
+
+# One tag byte per collection keeps generated ids unique across collections
+TAGS = {'users': 1, 'events': 2, 'hotels': 3, 'caterings': 4, 'vendors': 5, 'bookings': 6}
+BASE_TS = calendar.timegm((2022, 1, 1, 0, 0, 0))
+
+EVENT_TYPES = ['Wedding', 'Birthday Party', 'Corporate Event', 'Anniversary', 'Graduation Party',
+               'Engagement', 'Baby Shower', 'Conference', 'Reunion', 'Product Launch']
+CITIES = ['Chennai', 'Bengaluru', 'Mumbai', 'Delhi', 'Hyderabad', 'Pune', 'Kolkata', 'Coimbatore', 'Madurai', 'Kochi']
+FIRST_NAMES = ['Arun', 'Priya', 'Karthik', 'Divya', 'Rahul', 'Anjali', 'Vikram', 'Sneha', 'Suresh', 'Meena',
+               'Ravi', 'Lakshmi', 'Ajay', 'Kavya', 'Dinesh', 'Pooja', 'Manoj', 'Nisha', 'Ganesh', 'Deepa']
+LAST_NAMES = ['Kumar', 'Sharma', 'Iyer', 'Reddy', 'Nair', 'Patel', 'Singh', 'Menon', 'Rao', 'Das']
+HOTEL_KINDS = ['Grand Hall', 'Palace', 'Banquets', 'Convention Centre', 'Gardens', 'Resort']
+HOTEL_DESCS = ['Luxury ballroom with valet parking', 'Open lawn with stage and lighting',
+               'Air-conditioned hall for large gatherings', 'Rooftop venue with city views']
+CATER_DESCS = ['South Indian vegetarian buffet', 'North Indian and Chinese live counters',
+               'Premium gourmet menus', 'Traditional banana-leaf meals']
+VENDOR_KINDS = [('Photography', 'Candid and traditional photography'), ('DJ', 'Sound, lights and DJ'),
+                ('Makeup', 'Bridal and party makeup'), ('Decor', 'Floral and stage decoration')]
+# (start_at choices, max_total_hour choices) per daily slot; slots of one hotel-day never overlap
+DAY_SLOTS = [(['08:00', '09:00'], ['3', '4']), (['13:00', '14:00'], ['3', '4']), (['18:00', '19:00'], ['3', '4', '5'])]
+
+
+def make_id(collection: str, seq: int, ts: int = None) -> str:
+    """Deterministic ObjectId hex: 4-byte timestamp, collection tag, 7-byte sequence number.
+
+    Any worker can compute the id of a referenced document from its sequence
+    number alone; the importers turn these strings back into ObjectIds.
+    """
+    ts = BASE_TS + seq // 1000 if ts is None else ts
+    return f'{ts:08x}{TAGS[collection]:02x}{seq:014x}'
+
+
+def iso(ts: float) -> str:
+    return datetime.utcfromtimestamp(ts).isoformat()
+
+
+def catalog_docs(args):
+    """Events, hotels, caterings and vendors (small, generated in the parent process)."""
+    rng = random.Random(args.seed)
+    docs = {
+        'events': [
+            {'_id': make_id('events', i), 'eventname': name, 'event_desc': f'{name} celebrations',
+             'updated_at': iso(BASE_TS)}
+            for i, name in enumerate(EVENT_TYPES[:args.events])
+        ],
+        'hotels': [],
+        'caterings': [],
+        'vendors': [],
+    }
+    for i in range(args.hotels):
+        city = rng.choice(CITIES)
+        docs['hotels'].append({
+            '_id': make_id('hotels', i), 'hotel_name': f'{rng.choice(LAST_NAMES)} {rng.choice(HOTEL_KINDS)} {i}',
+            'hotel_desc': rng.choice(HOTEL_DESCS), 'hotel_img1': '', 'location': city,
+            'price': int(rng.lognormvariate(9.2, 0.6)) // 100 * 100 + 1000, 'updated_at': iso(BASE_TS),
+        })
+    for i in range(args.caterings):
+        docs['caterings'].append({
+            '_id': make_id('caterings', i), 'catername': f'{rng.choice(LAST_NAMES)} Caterers {i}',
+            'cater_desc': rng.choice(CATER_DESCS), 'cater_location': rng.choice(CITIES), 'cater_img': '',
+            'cater_price': int(rng.lognormvariate(7.8, 0.5)) // 50 * 50 + 200, 'updated_at': iso(BASE_TS),
+        })
+    for i in range(args.vendors):
+        kind, desc = rng.choice(VENDOR_KINDS)
+        docs['vendors'].append({
+            '_id': make_id('vendors', i), 'vendorname': f'{rng.choice(FIRST_NAMES)} {kind} {i}',
+            'vendor_desc': desc, 'vendor_location': rng.choice(CITIES), 'vendor_img': '',
+            'vendor_price': int(rng.lognormvariate(8.3, 0.5)) // 100 * 100 + 500, 'updated_at': iso(BASE_TS),
+        })
+    return docs
+
+
+def user_doc(rng, seq: int, admins: int):
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    created = BASE_TS + seq // 1000
+    return {
+        '_id': make_id('users', seq),
+        'email': f'{first.lower()}.{last.lower()}{seq}@example.com',
+        'first_name': first,
+        'last_name': last,
+        'password': 'password123',
+        'confirm_password': 'password123',
+        'contactno': f'9{rng.randrange(10 ** 8, 10 ** 9)}',
+        'role': 'Admin' if seq < admins else 'User',
+        'gender': rng.choice(['Male', 'Female', 'Other']),
+        'address': f'{rng.randrange(1, 500)} Main Road, {rng.choice(CITIES)}',
+        'created_at': iso(created),
+        'updated_at': iso(created),
+    }
+
+
+def booking_doc(rng, seq: int, slot: int, ctx):
+    """Booking number ``seq`` occupying hotel-day slot ``slot`` (a permutation keeps slots unique)."""
+    hotel, rest = divmod(slot, ctx['days'] * len(DAY_SLOTS))
+    day, window = divmod(rest, len(DAY_SLOTS))
+    starts, hours = DAY_SLOTS[window]
+    # Skew bookings toward a minority of active users
+    user = int(ctx['users'] * rng.random() ** 2)
+    catering = rng.randrange(ctx['caterings']) if ctx['caterings'] and rng.random() < 0.85 else None
+    vendors = rng.sample(range(ctx['vendors']), k=min(ctx['vendors'], rng.choice([0, 0, 1, 1, 2, 3])))
+    amount = (ctx['hotel_prices'][hotel] + (ctx['cater_prices'][catering] if catering is not None else 0)
+              + sum(ctx['vendor_prices'][v] for v in vendors))
+
+    event_ts = ctx['first_ts'] + day * 86400
+    created_ts = min(ctx['now'] - rng.randrange(0, 86400), event_ts - rng.randrange(1, 180) * 86400)
+    created_ts = max(created_ts, BASE_TS)
+    past = event_ts < ctx['today_ts']
+    r = rng.random()
+    if past:
+        accept, payment = (1, 1) if r < 0.8 else (2, 0) if r < 0.9 else (1, 2) if r < 0.95 else (0, 0)
+    else:
+        accept, payment = (0, 0) if r < 0.45 else (1, 1) if r < 0.8 else (1, 0) if r < 0.9 else (1, 2) if r < 0.95 else (2, 0)
+    updated_ts = min(ctx['now'], created_ts + rng.randrange(0, 14) * 86400)
+    booking_id = make_id('bookings', seq, ts=int(created_ts))
+    doc = {
+        '_id': booking_id,
+        'user_id': make_id('users', user),
+        'event_date': ctx['day_strs'][day],
+        'start_at': rng.choice(starts),
+        'max_total_hour': rng.choice(hours),
+        'no_of_guest': str(rng.choice([25, 50, 75, 100, 150, 200, 300, 500])),
+        'amount': amount,
+        'photographer_name_desc': '',
+        'dj_name_desc': '',
+        'makeupartist_name_desc': '',
+        'decorator_name_desc': '',
+        'current_date': iso(created_ts)[:10],
+        'accept_status': accept,
+        'payment_status': payment,
+        'hotel_id': ctx['hotel_ids'][hotel],
+        'catering_id': ctx['cater_ids'][catering] if catering is not None else None,
+        'event_id': ctx['event_ids'][rng.randrange(len(ctx['event_ids']))],
+        'vendor_ids': [ctx['vendor_ids'][v] for v in vendors],
+        'created_at': iso(created_ts),
+        'updated_at': iso(updated_ts),
+    }
+    if payment in (1, 2) or (accept == 1 and rng.random() < 0.3):
+        doc['razorpay_order_id'] = f'order_{booking_id}'
+    if payment == 1:
+        doc['payment_id'] = f'pay_{booking_id}'
+    return doc
+
+
+def _open(path: str, compress: bool, level: int):
+    return gzip.open(path, 'wt', encoding='utf-8', compresslevel=level) if compress else open(path, 'w', encoding='utf-8')
+
+
+def write_shard(task):
+    """Worker: write one shard of users or bookings to its own part file."""
+    name, lo, hi, path, ctx = task
+    rng = random.Random(f"{ctx['seed']}:{name}:{lo}")
+    with _open(path, ctx['compress'], ctx['level']) as out:
+        lines = []
+        for seq in range(lo, hi):
+            if name == 'users':
+                doc = user_doc(rng, seq, ctx['admins'])
+            else:
+                doc = booking_doc(rng, seq, (ctx['step'] * seq + ctx['offset']) % ctx['slots'], ctx)
+            lines.append(dumps(doc))
+            if len(lines) >= 1000:
+                out.write('\n'.join(lines) + '\n')
+                lines = []
+        if lines:
+            out.write('\n'.join(lines) + '\n')
+    return hi - lo
+
+
+def coprime_step(n: int, rng) -> int:
+    """A multiplier coprime with ``n`` so ``(step * i + offset) % n`` permutes range(n)."""
+    while True:
+        step = rng.randrange(n // 3 + 1, n) if n > 3 else 1
+        if gcd(step, n) == 1:
+            return step
+
+
+def concat(parts, path: str) -> None:
+    """Join part files; gzip members and plain NDJSON both concatenate into one valid file."""
+    with open(path, 'wb') as out:
+        for part in parts:
+            with open(part, 'rb') as f:
+                shutil.copyfileobj(f, out, 1 << 20)
+            os.remove(part)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Generate a large, consistent synthetic dataset in the format scripts/import_from_json.py reads.')
+    parser.add_argument('--out', default=OUTPUT_DIR, help='output directory (default: data/synthetic/)')
+    parser.add_argument('--bookings', type=int, default=1_000_000)
+    parser.add_argument('--users', type=int, default=None, help='default: bookings / 10')
+    parser.add_argument('--hotels', type=int, default=None, help='default: enough to hold every booking')
+    parser.add_argument('--caterings', type=int, default=None, help='default: hotels')
+    parser.add_argument('--vendors', type=int, default=None, help='default: 2 x hotels')
+    parser.add_argument('--events', type=int, default=len(EVENT_TYPES))
+    parser.add_argument('--admins', type=int, default=1, help='the first N users get the Admin role')
+    parser.add_argument('--past-days', type=int, default=730, help='event dates start this many days ago')
+    parser.add_argument('--future-days', type=int, default=365, help='and end this many days ahead')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2)
+    parser.add_argument('--shard-size', type=int, default=250_000, help='documents per worker task')
+    parser.add_argument('--compress', choices=['gzip', 'none'], default='gzip')
+    parser.add_argument('--level', type=int, default=1, help='gzip level (1 is fastest)')
+    parser.add_argument('--seed', type=int, default=42)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    started = time.perf_counter()
+    days = args.past_days + args.future_days
+    args.users = args.users or max(1, args.bookings // 10)
+    args.events = max(1, min(args.events, len(EVENT_TYPES)))
+    # Each hotel has len(DAY_SLOTS) non-overlapping windows per day; keep overall occupancy near 60%
+    args.hotels = args.hotels or max(10, -(-args.bookings // int(days * len(DAY_SLOTS) * 0.6)))
+    args.caterings = args.caterings if args.caterings is not None else args.hotels
+    args.vendors = args.vendors if args.vendors is not None else 2 * args.hotels
+    slots = args.hotels * days * len(DAY_SLOTS)
+    if args.bookings > slots:
+        sys.exit(f'{args.bookings} bookings do not fit into {slots} hotel slots; raise --hotels or the date range.')
+
+    os.makedirs(args.out, exist_ok=True)
+    compress = args.compress == 'gzip'
+    suffix = 'gzip' if compress else None
+
+    catalog = catalog_docs(args)
+    for name, docs in catalog.items():
+        with _open(os.path.join(args.out, export_filename(name, 'ndjson', suffix)), compress, args.level) as out:
+            for doc in docs:
+                out.write(dumps(doc) + '\n')
+
+    rng = random.Random(args.seed)
+    today = date.today()
+    first_day = today - timedelta(days=args.past_days)
+    ctx = {
+        'seed': args.seed,
+        'compress': compress,
+        'level': args.level,
+        'admins': args.admins,
+        'users': args.users,
+        'caterings': args.caterings,
+        'vendors': args.vendors,
+        'hotel_prices': [d['price'] for d in catalog['hotels']],
+        'cater_prices': [d['cater_price'] for d in catalog['caterings']],
+        'vendor_prices': [d['vendor_price'] for d in catalog['vendors']],
+        'hotel_ids': [d['_id'] for d in catalog['hotels']],
+        'cater_ids': [d['_id'] for d in catalog['caterings']],
+        'vendor_ids': [d['_id'] for d in catalog['vendors']],
+        'event_ids': [d['_id'] for d in catalog['events']],
+        'days': days,
+        'day_strs': [(first_day + timedelta(days=i)).isoformat() for i in range(days)],
+        'first_ts': calendar.timegm(first_day.timetuple()),
+        'today_ts': calendar.timegm(today.timetuple()),
+        'now': time.time(),
+        'slots': slots,
+        'step': coprime_step(slots, rng),
+        'offset': rng.randrange(slots),
+    }
+
+    tasks = []
+    parts = {'users': [], 'bookings': []}
+    for name, total in (('users', args.users), ('bookings', args.bookings)):
+        for i, lo in enumerate(range(0, total, args.shard_size)):
+            path = os.path.join(args.out, f'{name}.part{i:05d}')
+            parts[name].append(path)
+            tasks.append((name, lo, min(total, lo + args.shard_size), path, ctx))
+
+    written = 0
+    with ProcessPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        for count in pool.map(write_shard, tasks):
+            written += count
+            elapsed = time.perf_counter() - started
+            print(f'\r{written} docs ({written / elapsed:.0f} docs/s)', end='', flush=True)
+    print()
+    for name, paths in parts.items():
+        concat(paths, os.path.join(args.out, export_filename(name, 'ndjson', suffix)))
+
+    print(f"Generated {args.users} users, {args.bookings} bookings, {args.hotels} hotels, {args.caterings} caterings, "
+          f"{args.vendors} vendors and {args.events} events in {time.perf_counter() - started:.1f}s -> {args.out}")
+    print(f'Load with: python scripts/import_from_json.py --dir {args.out}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,4 @@
-import json
+import argparse
 import os
 import sys
 
@@ -8,45 +8,81 @@ if PROJECT_ROOT not in sys.path:
     sys.path.append(PROJECT_ROOT)
 
 from app import create_app
+from app.availability import rebuild_slots
+from app.catalog import CATALOG_COLLECTIONS
+from app.dataio import BATCH_SIZE, COLLECTIONS, apply_delta, import_archive, import_dir, list_deltas, open_reader
 
 INPUT_DIR = os.path.join(PROJECT_ROOT, 'data')
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description='Import data/ files (JSON or NDJSON, optionally compressed) into MongoDB.')
+    parser.add_argument('--dir', default=INPUT_DIR, help='input directory (default: data/)')
+    parser.add_argument('--archive', help='archive downloaded from /admin/export-download')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--delta', nargs='+', default=[], metavar='FILE',
+                        help='delta archives to replay, in order, after the base import')
+    parser.add_argument('--deltas-only', action='store_true',
+                        help='skip the base import and only replay --delta files (or all of <dir>/deltas)')
+    parser.add_argument('collections', nargs='*', default=COLLECTIONS)
+    return parser.parse_args()
+
+
+def progress(name, count, elapsed):
+    rate = count / elapsed if elapsed else 0
+    print(f'\r{name}: {count} docs ({rate:.0f} docs/s)', end='', flush=True)
+
+
 def main():
+    args = parse_args()
     app = create_app()
     with app.app_context():
         db = app.mongo_db
-        if not os.path.isdir(INPUT_DIR):
-            print(f'No data folder found at {INPUT_DIR}')
+        if args.deltas_only:
+            replay_deltas(db, args.delta or list_deltas(args.dir), args.batch_size)
+            rebuild_booking_views(app)
             return
-        collections = ['users', 'events', 'hotels', 'caterings', 'vendors', 'bookings']
-        for name in collections:
-            path = os.path.join(INPUT_DIR, f'{name}.json')
-            if not os.path.isfile(path):
-                print(f'Skipping {name}: {path} not found')
-                continue
-            with open(path, 'r', encoding='utf-8') as f:
-                docs = json.load(f)
-            if not isinstance(docs, list):
-                print(f'{name}: invalid JSON format (expected list)')
-                continue
-            # Convert _id strings back to ObjectId if present
-            from bson import ObjectId
-            for d in docs:
-                if isinstance(d, dict) and '_id' in d and isinstance(d['_id'], dict) and '$oid' in d['_id']:
-                    d['_id'] = ObjectId(d['_id']['$oid'])
-                elif isinstance(d, dict) and '_id' in d and isinstance(d['_id'], str):
-                    try:
-                        d['_id'] = ObjectId(d['_id'])
-                    except Exception:
-                        pass
-            if docs:
-                db[name].delete_many({})
-                db[name].insert_many(docs)
-            print(f'Imported {len(docs)} docs into {name}')
+        if args.archive:
+            results = import_archive(db, open_reader(args.archive), batch_size=args.batch_size, progress=progress)
+        else:
+            if not os.path.isdir(args.dir):
+                print(f'No data folder found at {args.dir}')
+                return
+            results = import_dir(db, args.dir, collections=args.collections, batch_size=args.batch_size,
+                                 progress=progress)
+        print()
+        for r in results:
+            status = 'swapped in' if r['swapped'] else 'NOT swapped (live collection kept)'
+            print(f"Imported {r['count']} docs into {r['collection']} in {r['seconds']:.2f}s "
+                  f"({r['docs_per_sec']:.0f} docs/s, {r['errors']} errors) - {status}")
+            for err in r.get('index_errors', []):
+                print(f'  index error: {err}')
+        replay_deltas(db, args.delta, args.batch_size)
+        for name in CATALOG_COLLECTIONS:
+            app.catalog.invalidate(name)
+        if args.delta or any(r['collection'] == 'bookings' and r['swapped'] for r in results):
+            rebuild_booking_views(app)
 
 
-if __name__ == '__main__':
-    main()
+def rebuild_booking_views(app):
+    # Venue slots and rollups describe the bookings that were just replaced
+    result = rebuild_slots(app.mongo_db)
+    print(f"Rebuilt {result['slots']} venue slots from {result['bookings']} bookings in {result['seconds']:.2f}s")
+    result = app.rollups.rebuild()
+    print(f"Rebuilt {result['rollups']} analytics rollups from {result['bookings']} bookings "
+          f"in {result['seconds']:.2f}s")
+
+
+def replay_deltas(db, paths, batch_size):
+    for path in paths:
+        reader = open_reader(path)
+        try:
+            stats = apply_delta(db, reader, batch_size=batch_size)
+        finally:
+            reader.close()
+        summary = ', '.join(f"{n}: +{s['written']}/-{s['deleted']}" for n, s in stats.items()) or 'no changes'
+        print(f'Replayed {path} ({summary})')
 
 
+if __name__ == '__main__':
+    main()
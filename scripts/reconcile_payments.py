@@ -0,0 +1,56 @@
+import argparse
+import os
+import sys
+
+# Ensure project root is on sys.path to import app
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.append(PROJECT_ROOT)
+
+from app import create_app
+from app.gateway import gateway_mode, gateway_stats, get_client
+from app.reconcile import reconcile_payments
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Re-check pending/failed booking payments against the gateway.')
+    parser.add_argument('--batch-size', type=int, default=500, help='bookings per page and per bulk_write')
+    parser.add_argument('--concurrency', type=int, default=8, help='parallel gateway requests')
+    parser.add_argument('--dry-run', action='store_true', help='report corrections without writing them')
+    return parser.parse_args()
+
+
+def progress(stats, elapsed):
+    rate = stats['scanned'] / elapsed if elapsed else 0
+    fixed = stats['fixed_paid'] + stats['fixed_failed'] + stats['would_fix_paid'] + stats['would_fix_failed']
+    print(f"\rscanned {stats['scanned']} ({rate:.0f}/s), fixed {fixed}, "
+          f"errors {stats['errors']}", end='', flush=True)
+
+
+def main():
+    args = parse_args()
+    if gateway_mode() == 'fake':
+        # The fake gateway's orders live in the memory of the process that created them
+        sys.exit('PAYMENT_GATEWAY=fake has no orders to check outside the app process; '
+                 'reconcile against Razorpay, or call app.reconcile.reconcile_payments with the fake client in-process.')
+    app = create_app()
+    with app.app_context():
+        stats = reconcile_payments(
+            app.mongo_db, get_client(),
+            batch_size=args.batch_size, concurrency=args.concurrency, dry_run=args.dry_run,
+            on_change=app.receipt_cache.invalidate, progress=progress,
+        )
+        print()
+        print(f"Scanned {stats['scanned']} bookings in {stats['seconds']:.2f}s ({stats['bookings_per_sec']:.0f}/s)")
+        if args.dry_run:
+            print(f"Would fix {stats['would_fix']} ({stats['would_fix_paid']} paid, {stats['would_fix_failed']} failed) "
+                  f"[dry run, nothing written]; {stats['errors']} gateway errors")
+        else:
+            print(f"Fixed {stats['fixed']} ({stats['fixed_paid']} paid, {stats['fixed_failed']} failed); "
+                  f"{stats['errors']} gateway errors")
+        for op, s in gateway_stats.snapshot().items():
+            print(f"  gateway {op}: {s['calls']} calls, avg {s['avg_ms']:.1f} ms, {s['errors']} errors")
+
+
+if __name__ == '__main__':
+    main()
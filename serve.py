@@ -0,0 +1,201 @@
+"""Production server: multi-process, multi-threaded, with graceful reload.
+
+    python serve.py [--workers N] [--threads T] [--port 8000] [--server auto|gunicorn|builtin]
+
+``gunicorn`` (POSIX) is used when installed; otherwise a small prefork server
+built on Werkzeug takes over. Both run ``wsgi:app`` and react to signals the
+same way:
+
+- SIGHUP: graceful reload. A new set of workers is started (re-importing the
+  code unless ``--preload`` is used), then the old workers stop accepting and
+  finish their in-flight requests.
+- SIGTERM / SIGINT: graceful shutdown.
+
+Every worker creates its own MongoDB client after the fork, with a pool
+sized to its thread count (see ``MONGO_MAX_POOL_SIZE`` in the README).
+"""
+import argparse
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+import traceback
+
+GRACEFUL_TIMEOUT = 30
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Run the app with several worker processes.')
+    parser.add_argument('--host', default=os.getenv('HOST', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=int(os.getenv('PORT', '8000')))
+    parser.add_argument('--workers', type=int, default=int(os.getenv('WEB_CONCURRENCY', str((os.cpu_count() or 1) * 2 + 1))))
+    parser.add_argument('--threads', type=int, default=int(os.getenv('WEB_THREADS', '8')))
+    parser.add_argument('--preload', action='store_true', default=os.getenv('WEB_PRELOAD', '0') == '1',
+                        help='import the app once before forking (less memory; reload keeps the old code)')
+    parser.add_argument('--graceful-timeout', type=int, default=int(os.getenv('WEB_GRACEFUL_TIMEOUT', str(GRACEFUL_TIMEOUT))))
+    parser.add_argument('--server', choices=['auto', 'gunicorn', 'builtin'], default=os.getenv('WEB_SERVER', 'auto'))
+    return parser.parse_args()
+
+
+def run_gunicorn(args):
+    os.environ.update({
+        'BIND': f'{args.host}:{args.port}',
+        'WEB_CONCURRENCY': str(args.workers),
+        'WEB_THREADS': str(args.threads),
+        'WEB_PRELOAD': '1' if args.preload else '0',
+        'WEB_GRACEFUL_TIMEOUT': str(args.graceful_timeout),
+    })
+    here = os.path.dirname(os.path.abspath(__file__))
+    os.chdir(here)
+    os.execvp(sys.executable, [sys.executable, '-m', 'gunicorn', '-c', os.path.join(here, 'gunicorn.conf.py'), 'wsgi:app'])
+
+
+# --- builtin prefork server -------------------------------------------------------
+
+def load_app():
+    from wsgi import app
+    return app
+
+
+def worker_main(listener: socket.socket, threads: int, graceful_timeout: int, app=None) -> None:
+    """Serve on the inherited socket until SIGTERM, then drain in-flight requests."""
+    from werkzeug.serving import ThreadedWSGIServer
+
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # the master coordinates shutdown
+    app = app or load_app()
+    host, port = listener.getsockname()[:2]
+    server = ThreadedWSGIServer(host, port, app, fd=listener.fileno())
+    # Let server_close() wait for running requests instead of killing daemon threads
+    server.daemon_threads = False
+    server.block_on_close = True
+    limiter = threading.BoundedSemaphore(threads)
+    process_request, shutdown_request = server.process_request, server.shutdown_request
+
+    def bounded_process_request(request, client_address):
+        # At most `threads` requests run at once; further connections wait in the accept backlog.
+        # The slot is released by shutdown_request, which socketserver calls on every path.
+        limiter.acquire()
+        process_request(request, client_address)
+
+    def releasing_shutdown_request(request):
+        try:
+            shutdown_request(request)
+        finally:
+            limiter.release()
+
+    server.process_request = bounded_process_request
+    server.shutdown_request = releasing_shutdown_request
+
+    def stop(signum, frame):
+        threading.Thread(target=server.shutdown, daemon=True).start()
+        # Hard stop if draining takes too long
+        signal.signal(signal.SIGALRM, lambda *_: os._exit(1))
+        signal.alarm(graceful_timeout)
+
+    signal.signal(signal.SIGTERM, stop)
+    server.serve_forever()
+    server.server_close()
+    os._exit(0)
+
+
+class Master:
+    def __init__(self, args):
+        self.args = args
+        self.listener = socket.create_server((args.host, args.port), backlog=2048)
+        self.listener.set_inheritable(True)
+        self.app = load_app() if args.preload else None
+        self.workers = {}  # pid -> generation
+        self.generation = 0
+        self.stopping = False
+        self.reload_requested = False
+
+    def spawn(self) -> None:
+        pid = os.fork()
+        if pid == 0:
+            try:
+                worker_main(self.listener, self.args.threads, self.args.graceful_timeout, self.app)
+            except BaseException:
+                traceback.print_exc()
+            finally:
+                sys.stderr.flush()
+                os._exit(1)
+        self.workers[pid] = self.generation
+
+    def spawn_generation(self) -> None:
+        self.generation += 1
+        for _ in range(self.args.workers):
+            self.spawn()
+
+    def retire(self, generation_below: int) -> None:
+        for pid, gen in list(self.workers.items()):
+            if gen < generation_below:
+                self._signal(pid, signal.SIGTERM)
+
+    @staticmethod
+    def _signal(pid: int, sig) -> None:
+        try:
+            os.kill(pid, sig)
+        except ProcessLookupError:
+            pass
+
+    def reap(self) -> None:
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            gen = self.workers.pop(pid, None)
+            if gen == self.generation and not self.stopping:
+                print(f'[serve] worker {pid} exited with status {status}; restarting', file=sys.stderr)
+                time.sleep(1)  # avoid a tight respawn loop when workers fail at import
+                self.spawn()
+
+    def run(self) -> None:
+        signal.signal(signal.SIGHUP, lambda *_: setattr(self, 'reload_requested', True))
+        signal.signal(signal.SIGTERM, lambda *_: setattr(self, 'stopping', True))
+        signal.signal(signal.SIGINT, lambda *_: setattr(self, 'stopping', True))
+        self.spawn_generation()
+        print(f'[serve] pid {os.getpid()} listening on {self.args.host}:{self.args.port} with '
+              f'{self.args.workers} workers x {self.args.threads} threads', file=sys.stderr)
+        while not self.stopping:
+            if self.reload_requested:
+                self.reload_requested = False
+                print('[serve] reloading workers', file=sys.stderr)
+                self.spawn_generation()
+                self.retire(self.generation)
+            self.reap()
+            time.sleep(0.2)
+        self.retire(self.generation + 1)
+        deadline = time.monotonic() + self.args.graceful_timeout
+        while self.workers and time.monotonic() < deadline:
+            self.reap()
+            time.sleep(0.1)
+        for pid in list(self.workers):
+            self._signal(pid, signal.SIGKILL)
+        self.listener.close()
+
+
+def main():
+    args = parse_args()
+    # create_app sizes each worker's Mongo pool from WEB_THREADS
+    os.environ['WEB_THREADS'] = str(args.threads)
+    server = args.server
+    if server == 'auto':
+        try:
+            import gunicorn  # noqa: F401
+            server = 'gunicorn'
+        except ImportError:
+            server = 'builtin'
+    if server == 'gunicorn':
+        run_gunicorn(args)
+    if not hasattr(os, 'fork'):
+        sys.exit('The builtin multi-process server needs fork(); on Windows run a WSGI server such as waitress with wsgi:app.')
+    Master(args).run()
+
+
+if __name__ == '__main__':
+    main()
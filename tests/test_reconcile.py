@@ -0,0 +1,103 @@
+import pytest
+
+mongomock = pytest.importorskip('mongomock')
+
+from app.analytics import ROLLUPS_COLLECTION, rebuild_rollups, rollup_id
+from app.gateway import FakeRazorpayClient
+from app.reconcile import reconcile_payments
+
+
+@pytest.fixture(autouse=True)
+def _bulk_update_sort(monkeypatch):
+    # pymongo passes UpdateOne(sort=...) through to the builder; mongomock 4.3 does not accept it yet
+    from mongomock.collection import BulkOperationBuilder
+    add_update = BulkOperationBuilder.add_update
+    monkeypatch.setattr(BulkOperationBuilder, 'add_update',
+                        lambda self, *args, sort=None, **kwargs: add_update(self, *args, **kwargs))
+
+
+@pytest.fixture
+def db():
+    return mongomock.MongoClient().db
+
+
+@pytest.fixture
+def gateway():
+    return FakeRazorpayClient()
+
+
+def add_booking(db, gateway, amount, payment_status=0, paid=None, order_id=None):
+    if order_id is None:
+        order_id = gateway.order.create({'amount': amount * 100, 'currency': 'INR'})['id']
+        if paid is not None:
+            gateway.pay(order_id, 'captured' if paid else 'failed')
+    return db.bookings.insert_one({
+        'hotel_id': 'h1', 'event_date': '2025-03-14', 'amount': amount,
+        'payment_status': payment_status, 'razorpay_order_id': order_id,
+    }).inserted_id
+
+
+def total(db):
+    return db[ROLLUPS_COLLECTION].find_one({'_id': rollup_id('total', '', 'all')})
+
+
+def test_reconcile_fixes_counts_and_rollups(db, gateway):
+    paid = add_booking(db, gateway, 1000, paid=True)
+    failed = add_booking(db, gateway, 2000, paid=False)
+    unchanged = add_booking(db, gateway, 3000)
+    retried = add_booking(db, gateway, 4000, payment_status=2, paid=False)
+    missing = add_booking(db, gateway, 5000, order_id='order_missing')
+    rebuild_rollups(db)
+    changed = []
+
+    stats = reconcile_payments(db, gateway, batch_size=2, concurrency=2, on_change=changed.append)
+
+    assert stats['scanned'] == 5
+    assert stats['checked'] == 4
+    assert stats['errors'] == 1
+    assert (stats['fixed_paid'], stats['fixed_failed'], stats['fixed']) == (1, 1, 2)
+    assert stats['would_fix'] == 0
+    assert sorted(changed) == sorted([str(paid), str(failed)])
+    statuses = {b['_id']: b['payment_status'] for b in db.bookings.find()}
+    assert statuses == {paid: 1, failed: 2, unchanged: 0, retried: 2, missing: 0}
+
+    row = total(db)
+    assert row['bookings'] == 5
+    assert row['revenue'] == 1000
+    assert row['payment_status']['1'] == {'bookings': 1, 'amount': 1000}
+    assert row['payment_status']['2'] == {'bookings': 2, 'amount': 6000}
+    assert row['payment_status']['0'] == {'bookings': 2, 'amount': 8000}
+
+
+def test_reconcile_dry_run_writes_nothing(db, gateway):
+    add_booking(db, gateway, 1000, paid=True)
+    add_booking(db, gateway, 2000, paid=False)
+    rebuild_rollups(db)
+    changed = []
+
+    stats = reconcile_payments(db, gateway, dry_run=True, on_change=changed.append)
+
+    assert (stats['would_fix_paid'], stats['would_fix_failed'], stats['would_fix']) == (1, 1, 2)
+    assert stats['fixed'] == 0
+    assert changed == []
+    assert db.bookings.count_documents({'payment_status': 0}) == 2
+    assert total(db)['revenue'] == 0
+
+
+def test_reconcile_counts_only_bookings_it_changed(db, gateway, monkeypatch):
+    paid = add_booking(db, gateway, 1000, paid=True)
+    rebuild_rollups(db)
+    changed = []
+    fetch = gateway.order.fetch
+
+    def settled_meanwhile(order_id):
+        # A webhook marks the booking failed between the read and the guarded write
+        db.bookings.update_one({'_id': paid}, {'$set': {'payment_status': 2}})
+        return fetch(order_id)
+
+    monkeypatch.setattr(gateway.order, 'fetch', settled_meanwhile)
+    stats = reconcile_payments(db, gateway, on_change=changed.append)
+
+    assert stats['fixed'] == 0
+    assert changed == []
+    assert db.bookings.find_one({'_id': paid})['payment_status'] == 2
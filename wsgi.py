@@ -0,0 +1,9 @@
+"""Production WSGI entry point: ``gunicorn -c gunicorn.conf.py wsgi:app`` or ``python serve.py``.
+
+Importing this module does not connect to MongoDB; each worker process
+creates its own client on first use, so the app can be preloaded before
+forking workers.
+"""
+from app import create_app
+
+app = create_app()